@@ -1,24 +1,94 @@
+import hashlib
+import secrets
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.config import settings
 from app.database import get_db
 from app.models import User
 from app.schemas import TokenData
+from app.utils.cache_helpers import TTLCache
+from app.utils.executor_helpers import BoundedExecutor
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with any other cost factor count as outdated and are redone on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+# bcrypt releases the GIL, so hashing on these threads keeps the event loop free
+password_hasher = BoundedExecutor(
+    "bcrypt",
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
 security = HTTPBearer()
 
+# Per-worker caches so authenticated requests skip JWT verification and the
+# user query in the steady state. Keys are token hashes, never raw tokens.
+_token_claims = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+# Revocations are never evicted early (an evicted one would let a logged-out
+# token back in); each is held only until its token expires anyway. They are
+# not shared between worker processes: see revoke_token.
+_revoked_tokens = TTLCache(maxsize=None, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+_users = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
+class CachedUser:
+    """Session-independent copy of the user fields request handlers need"""
+    __slots__ = ('id', 'email', 'tier', 'created_at', 'updated_at')
+
+    def __init__(self, user: User):
+        self.id = user.id
+        self.email = user.email
+        self.tier = user.tier
+        self.created_at = user.created_at
+        self.updated_at = user.updated_at
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def hash_password(password: str) -> str:
+    """Hash a password on the bcrypt executor (raises ExecutorBusy when it is saturated)"""
+    return await password_hasher.run(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """Check a password on the bcrypt executor
+
+    Returns (valid, new_hash); new_hash is set when the stored hash used a
+    different cost factor and should be replaced. Pass hashed_password=None
+    for an unknown user: a dummy hash is checked instead, so the response
+    takes as long as for a real account and does not reveal which emails exist.
+    """
+    if hashed_password is None:
+        return await password_hasher.run(_verify_unknown_user, plain_password)
+    return await password_hasher.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+@lru_cache(maxsize=1)
+def dummy_password_hash() -> str:
+    """Hash checked for unknown users, made with the configured cost factor
+
+    A hash with any other cost would make failed logins for unknown emails
+    faster or slower than for real accounts.
+    """
+    return pwd_context.hash(secrets.token_urlsafe(16))
+
+def _verify_unknown_user(plain_password: str) -> Tuple[bool, Optional[str]]:
+    pwd_context.verify(plain_password, dummy_password_hash())
+    return False, None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -29,18 +99,82 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+def _seconds_until_expiry(claims: dict) -> float:
+    expires_at = claims.get("exp")
+    if expires_at is None:
+        return float(settings.AUTH_CACHE_TTL_SECONDS)
+    return expires_at - time.time()
+
+def decode_token(token: str) -> dict:
+    """Verify a JWT and return its claims, reusing the result until the token expires"""
+    key = _token_key(token)
+    if key in _revoked_tokens:
+        raise JWTError("Token has been revoked")
+    claims = _token_claims.get(key)
+    if claims is None:
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        ttl = min(_seconds_until_expiry(claims), settings.AUTH_CACHE_TTL_SECONDS)
+        if ttl > 0:
+            _token_claims.put(key, claims, ttl)
+    return claims
+
+def revoke_token(token: str):
+    """Reject a token from now until it expires (on logout)
+
+    The revocation is kept in this worker process only. When the app runs with
+    several workers, the others keep accepting the token until it expires, so
+    logout is only a hard guarantee with a single worker; otherwise rely on
+    short ACCESS_TOKEN_EXPIRE_MINUTES.
+    """
+    key = _token_key(token)
+    claims = _token_claims.pop(key)
+    if claims is None:
+        try:
+            claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            return
+    ttl = _seconds_until_expiry(claims)
+    if ttl > 0:
+        _revoked_tokens.put(key, True, ttl)
+
+def invalidate_user(email: str):
+    """Drop a cached user record so the next request reloads it"""
+    _users.pop(email)
+
+@event.listens_for(User, "after_update")
+def _invalidate_updated_user(mapper, connection, target):
+    # Covers tier changes and any other edit made through the ORM in this worker
+    invalidate_user(target.email)
+    for previous_email in inspect(target).attrs.email.history.deleted:
+        invalidate_user(previous_email)
+
+@event.listens_for(User, "after_delete")
+def _invalidate_deleted_user(mapper, connection, target):
+    invalidate_user(target.email)
+
+def _load_user(db: Session, email: str) -> Optional[CachedUser]:
+    user = db.query(User).filter(User.email == email).first()
+    return CachedUser(user) if user is not None else None
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
+) -> CachedUser:
+    """Resolve the bearer token to its user, from cache when possible
+
+    The session is only used on a cache miss, and then from a worker thread
+    so the query does not block the event loop.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_token(credentials.credentials)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -48,7 +182,10 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == token_data.email).first()
+    user = _users.get(token_data.email)
     if user is None:
-        raise credentials_exception
+        user = await run_in_threadpool(_load_user, db, token_data.email)
+        if user is None:
+            raise credentials_exception
+        _users.put(token_data.email, user)
     return user
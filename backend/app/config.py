@@ -6,6 +6,11 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_CACHE_SIZE: int = 10000  # decoded tokens and user records kept per worker
+    AUTH_CACHE_TTL_SECONDS: int = 300  # how long a cached user record may be stale
+    BCRYPT_ROUNDS: int = 12  # changing it rehashes passwords on their next login
+    PASSWORD_HASH_WORKERS: int = 2  # threads per worker process doing bcrypt
+    PASSWORD_HASH_MAX_PENDING: int = 64  # hashing calls running or queued before logins get a 503
     FRONTEND_URL: str = "http://localhost:3000"
     
     class Config:
@@ -1,7 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import pdf, encoder, json_editor
+from app.routers import pdf, encoder, json_editor, auth
 from app.utils.file_helpers import ensure_directories, schedule_cleanup_task
+from app.utils.ndjson import shutdown_pool
 from app.config import settings
 import asyncio
 
@@ -21,6 +22,11 @@ async def startup_event():
     asyncio.create_task(schedule_cleanup_task())
     print("✅ Background file cleanup task started (runs every 30 minutes)")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the NDJSON worker processes"""
+    shutdown_pool()
+
 # CORS middleware
 # Get allowed origins from environment variable, fallback to localhost for development
 allowed_origins = [
@@ -44,6 +50,7 @@ app.add_middleware(
 app.include_router(pdf.router)
 app.include_router(encoder.router)
 app.include_router(json_editor.router)
+app.include_router(auth.router)
 
 @app.get("/")
 async def root():
@@ -1,19 +1,48 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.database import get_db
 from app.models import User
 from app.schemas import UserCreate, UserLogin, UserResponse, Token
-from app.auth import get_password_hash, verify_password, create_access_token, get_current_user
+from app.auth import (
+    hash_password, verify_and_update_password, create_access_token, get_current_user,
+    security, revoke_token, invalidate_user, CachedUser, password_hasher
+)
+from app.utils.executor_helpers import ExecutorBusy
 from app.config import settings
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+def busy_exception() -> HTTPException:
+    """503 for when password hashing is saturated; only login and register see it"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in attempts in progress, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+# Blocking database work, run from worker threads by the async handlers
+def find_user(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+def create_user(db: Session, email: str, hashed_password: str) -> User:
+    user = User(email=email, hashed_password=hashed_password)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+def store_password_hash(db: Session, user: User, hashed_password: str):
+    user.hashed_password = hashed_password
+    db.commit()
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await run_in_threadpool(find_user, db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -21,38 +50,63 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
-    new_user = User(
-        email=user_data.email,
-        hashed_password=hashed_password
-    )
-    
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
-    return new_user
+    try:
+        hashed_password = await hash_password(user_data.password)
+    except ExecutorBusy:
+        raise busy_exception()
+    return await run_in_threadpool(create_user, db, user_data.email, hashed_password)
 
 @router.post("/login", response_model=Token)
 async def login(user_data: UserLogin, db: Session = Depends(get_db)):
     """Login user and return JWT token"""
-    user = db.query(User).filter(User.email == user_data.email).first()
+    user = await run_in_threadpool(find_user, db, user_data.email)
+    
+    try:
+        valid, new_hash = await verify_and_update_password(
+            user_data.password, user.hashed_password if user else None
+        )
+    except ExecutorBusy:
+        raise busy_exception()
     
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Read before the commit below expires the instance's attributes
+    email = user.email
+    if new_hash:
+        # The cost factor changed since this hash was made
+        await run_in_threadpool(store_password_hash, db, user, new_hash)
+    
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": email}, expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: CachedUser = Depends(get_current_user)
+):
+    """Revoke the current token and drop the cached user record
+
+    Revocation is local to the worker process that handles the logout; with
+    several workers the token stays valid on the others until it expires.
+    """
+    revoke_token(credentials.credentials)
+    invalidate_user(current_user.email)
+
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: CachedUser = Depends(get_current_user)):
     """Get current user information"""
     return current_user
+
+@router.get("/metrics")
+async def auth_metrics():
+    """Password hashing queue depth, wait and run times, and rejected calls, for monitoring"""
+    return {"password_hasher": password_hasher.stats()}
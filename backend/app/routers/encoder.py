@@ -1,9 +1,117 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form, WebSocket, WebSocketDisconnect
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List, Dict
+import asyncio
+import json
 from app.utils.encoder_helpers import *
-
-router = APIRouter(prefix="/encoder", tags=["Encoder/Decoder"])
+from app.utils import json_codec
+from app.utils.file_helpers import save_upload_file, cleanup_files, TEMP_DIR
+from app.utils.sort_helpers import external_sort_lines
+
+RAW_MEDIA_TYPES = ("application/octet-stream", "text/plain")
+
+def preferred_media_type(accept: str) -> Optional[str]:
+    """Return the highest-quality media type from an Accept header"""
+    best, best_q = None, 0.0
+    for part in accept.split(","):
+        fields = part.strip().split(";")
+        media_type = fields[0].strip().lower()
+        q = 1.0
+        for field in fields[1:]:
+            name, _, value = field.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_type and q > best_q:
+            best, best_q = media_type, q
+    return best
+
+TRUE_FLAGS = ("1", "true", "yes", "on")
+FALSE_FLAGS = ("0", "false", "no", "off")
+
+def parse_flag(value) -> bool:
+    """Read a boolean parameter from a JSON body or a query string value"""
+    if value is None or isinstance(value, bool):
+        return bool(value)
+    flag = str(value).strip().lower()
+    if flag in TRUE_FLAGS:
+        return True
+    if flag in FALSE_FLAGS:
+        return False
+    raise ValueError(f"Invalid boolean value: {value}")
+
+class NegotiatedRoute(APIRoute):
+    """Route that serves raw bodies when the client sends or asks for them
+    
+    Requests for an encoder operation with a text/plain or
+    application/octet-stream body, or whose preferred Accept type is one of
+    those, run the bytes-level operation directly (parameters come from the
+    query string for raw bodies). Other EncodeResponse endpoints have their
+    result unwrapped when a raw Accept type is preferred.
+    """
+    def get_route_handler(self):
+        original_handler = super().get_route_handler()
+        operation = self.path.split("/", 2)[-1]
+        returns_encode_response = self.response_model is EncodeResponse
+        
+        async def negotiated_handler(request: Request) -> Response:
+            content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+            accept = preferred_media_type(request.headers.get("accept", ""))
+            raw_output = accept if accept in RAW_MEDIA_TYPES else None
+            raw_input = content_type in RAW_MEDIA_TYPES
+            if not raw_input and not raw_output:
+                return await original_handler(request)
+            
+            if operation in OPERATION_NAMES:
+                if raw_input:
+                    data = await request.body()
+                    params = request.query_params
+                else:
+                    try:
+                        params = await request.json()
+                        data = str(params["text"]).encode()
+                    except (ValueError, KeyError, TypeError):
+                        raise HTTPException(status_code=422, detail="Request body must be JSON with a text field")
+                try:
+                    indent = params.get("indent")
+                    level = params.get("level")
+                    func = resolve_bytes_operation(
+                        operation,
+                        params.get("secret"),
+                        params.get("algorithm") or "HS256",
+                        int(indent) if indent is not None else None,
+                        int(level) if level is not None else None,
+                        parse_flag(params.get("reverse"))
+                    )
+                    result = await run_in_threadpool(func, data)
+                except DecompressionLimitError as e:
+                    raise HTTPException(status_code=413, detail=str(e))
+                except Exception as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+                if raw_output:
+                    return Response(content=result, media_type=raw_output)
+                try:
+                    return JSONResponse({"result": result.decode()})
+                except UnicodeDecodeError:
+                    raise HTTPException(
+                        status_code=406,
+                        detail="Result is not valid UTF-8; request it with Accept: application/octet-stream"
+                    )
+            
+            response = await original_handler(request)
+            if raw_output and returns_encode_response and response.status_code == 200:
+                result = json.loads(response.body)["result"]
+                return Response(content=result.encode(), media_type=raw_output)
+            return response
+        
+        return negotiated_handler
+
+router = APIRouter(prefix="/encoder", tags=["Encoder/Decoder"], route_class=NegotiatedRoute)
 
 class EncodeRequest(BaseModel):
     text: str
@@ -12,22 +120,163 @@ class EncodeRequest(BaseModel):
     indent: Optional[int] = None
     paragraphs: Optional[int] = 3
     use_lorem: Optional[bool] = False
+    seed: Optional[int] = None
+    level: Optional[int] = None  # compression level for compressed codecs
+    reverse: Optional[bool] = False  # text/sort order
 
 class EncodeResponse(BaseModel):
     result: str
 
+class BatchEncodeRequest(BaseModel):
+    inputs: List[str]
+    operations: List[str]  # applied in order, e.g. ["unicode/escape", "base64/encode"]
+    secret: Optional[str] = None
+    algorithm: Optional[str] = "HS256"
+    indent: Optional[int] = None
+    level: Optional[int] = None
+
+class BatchItemResult(BaseModel):
+    index: int
+    result: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchEncodeResponse(BaseModel):
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
+
+# Batch Endpoint
+@router.post("/batch", response_model=BatchEncodeResponse)
+async def batch_encode_endpoint(request: BatchEncodeRequest):
+    """Apply a chain of operations to many inputs in one request"""
+    try:
+        chain = resolve_operation_chain(request.operations, request.secret, request.algorithm, request.indent, request.level)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    results = []
+    failed = 0
+    for index, text in enumerate(request.inputs):
+        try:
+            results.append(BatchItemResult(index=index, result=apply_operation_chain(text, chain)))
+        except Exception as e:
+            failed += 1
+            results.append(BatchItemResult(index=index, error=str(e)))
+    
+    return BatchEncodeResponse(results=results, succeeded=len(results) - failed, failed=failed)
+
+class GenerateTextRequest(BaseModel):
+    characters: int
+    seed: Optional[int] = None
+    use_lorem: Optional[bool] = False
+
+class BulkUUIDRequest(BaseModel):
+    count: int
+    version: int = 4  # 4 (random) or 7 (time-ordered)
+
+class MultiDigestRequest(BaseModel):
+    text: str
+    algorithms: List[str] = ["md5", "sha1", "sha256", "sha512"]
+    hmac_algorithms: List[str] = []
+    secret: Optional[str] = None
+
+class MultiDigestResponse(BaseModel):
+    digests: Dict[str, str]
+
+# Live Encoding WebSocket
+def run_live_operation(message: dict) -> str:
+    """Run a single live-preview operation message
+
+    Malformed messages raise ValueError with a fixed description rather than
+    whatever error the bad value would cause further in.
+    """
+    params = message.get("params") or {}
+    if not isinstance(params, dict):
+        raise ValueError("params must be an object")
+    for name in ("secret", "algorithm"):
+        if params.get(name) is not None and not isinstance(params[name], str):
+            raise ValueError(f"params.{name} must be a string")
+    for name in ("indent", "level"):
+        value = params.get(name)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+            raise ValueError(f"params.{name} must be an integer")
+    if params.get("reverse") is not None and not isinstance(params["reverse"], bool):
+        raise ValueError("params.reverse must be a boolean")
+    func = resolve_operation(
+        str(message.get("op", "")),
+        params.get("secret"),
+        params.get("algorithm") or "HS256",
+        params.get("indent"),
+        params.get("level"),
+        bool(params.get("reverse"))
+    )
+    return func(str(message.get("text", "")))
+
+@router.websocket("/ws")
+async def encoder_websocket(websocket: WebSocket):
+    """Live encoding channel
+    
+    Clients send {"seq", "op", "text", "params"} messages and receive
+    {"seq", "result"} or {"seq", "error"} replies. Only the newest message is
+    processed; requests superseded while another is running are dropped.
+    """
+    await websocket.accept()
+    latest = {"message": None, "seq": -1}
+    has_work = asyncio.Event()
+    
+    async def receive_messages():
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                await websocket.send_json({"seq": None, "error": "Invalid JSON message"})
+                continue
+            seq = message.get("seq") if isinstance(message, dict) else None
+            if not isinstance(seq, int):
+                await websocket.send_json({"seq": seq, "error": "Message must include an integer seq"})
+                continue
+            if seq > latest["seq"]:
+                latest["message"], latest["seq"] = message, seq
+                has_work.set()
+    
+    receiver = asyncio.create_task(receive_messages())
+    try:
+        while True:
+            waiter = asyncio.create_task(has_work.wait())
+            await asyncio.wait({waiter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver.done():
+                waiter.cancel()
+                receiver.result()  # re-raise disconnects
+                return
+            has_work.clear()
+            message, seq = latest["message"], latest["seq"]
+            try:
+                reply = {"seq": seq, "result": await run_in_threadpool(run_live_operation, message)}
+            except ValueError as e:
+                # Invalid input or parameters, described for the client
+                reply = {"seq": seq, "error": str(e)}
+            except Exception as e:
+                print(f"Live encoder operation failed: {e!r}")
+                reply = {"seq": seq, "error": "Operation failed"}
+            # Drop the reply if a newer request arrived while this one ran
+            if seq == latest["seq"]:
+                await websocket.send_json(reply)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+
 # JWT Endpoints
 @router.post("/jwt/encode", response_model=EncodeResponse)
 async def jwt_encode_endpoint(request: EncodeRequest):
     """Encode JWT token"""
     try:
-        import json
-        payload = json.loads(request.text)
+        payload = json_codec.loads(request.text)
         if not request.secret:
             raise HTTPException(status_code=400, detail="Secret key is required for JWT encoding")
         result = encode_jwt(payload, request.secret, request.algorithm)
         return EncodeResponse(result=result)
-    except json.JSONDecodeError:
+    except json_codec.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -39,8 +288,7 @@ async def jwt_decode_endpoint(request: EncodeRequest):
         if not request.secret:
             raise HTTPException(status_code=400, detail="Secret key is required for JWT decoding")
         result = decode_jwt(request.text, request.secret, request.algorithm)
-        import json
-        return EncodeResponse(result=json.dumps(result, indent=2))
+        return EncodeResponse(result=json_codec.dumps(result, indent=2, ensure_ascii=True))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid JWT token: {str(e)}")
 
@@ -177,6 +425,29 @@ async def unicode_unescape_endpoint(request: EncodeRequest):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# Compressed Codec Endpoints (e.g. /gzip-base64/encode, /lzma-base85/decode)
+def make_compressed_codec_endpoint(operation: str):
+    """Build the JSON endpoint for a compressed codec operation"""
+    async def compressed_codec_endpoint(request: EncodeRequest):
+        try:
+            func = resolve_operation(operation, level=request.level)
+            return EncodeResponse(result=func(request.text))
+        except DecompressionLimitError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid input for {operation}: {str(e)}")
+    return compressed_codec_endpoint
+
+for codec in COMPRESSED_CODECS:
+    for direction in ("encode", "decode"):
+        router.add_api_route(
+            f"/{codec}/{direction}",
+            make_compressed_codec_endpoint(f"{codec}/{direction}"),
+            methods=["POST"],
+            response_model=EncodeResponse,
+            summary=f"{codec} {direction}"
+        )
+
 # Hashing Endpoints
 @router.post("/hash/md5", response_model=EncodeResponse)
 async def hash_md5_endpoint(request: EncodeRequest):
@@ -202,6 +473,15 @@ async def hash_sha512_endpoint(request: EncodeRequest):
     result = hash_sha512(request.text)
     return EncodeResponse(result=result)
 
+@router.post("/hash/multi", response_model=MultiDigestResponse)
+async def hash_multi_endpoint(request: MultiDigestRequest):
+    """Generate several hashes and HMACs in a single pass"""
+    try:
+        digests = multi_digest_stream([request.text.encode()], request.algorithms, request.hmac_algorithms, request.secret)
+        return MultiDigestResponse(digests=digests)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # HMAC Endpoints
 @router.post("/hmac/md5", response_model=EncodeResponse)
 async def hmac_md5_endpoint(request: EncodeRequest):
@@ -235,6 +515,112 @@ async def hmac_sha512_endpoint(request: EncodeRequest):
     result = hmac_sha512(request.text, request.secret)
     return EncodeResponse(result=result)
 
+# File Streaming Endpoints (constant memory, raw responses)
+STREAM_CODECS = {
+    'base64/encode': (lambda chunks, level: base64_encode_stream(chunks), "text/plain"),
+    'base64/decode': (lambda chunks, level: base64_decode_stream(chunks), "application/octet-stream"),
+    'url-base64/encode': (lambda chunks, level: base64_encode_stream(chunks, urlsafe=True), "text/plain"),
+    'url-base64/decode': (lambda chunks, level: base64_decode_stream(chunks, urlsafe=True), "application/octet-stream"),
+    'base32/encode': (lambda chunks, level: base32_encode_stream(chunks), "text/plain"),
+    'base32/decode': (lambda chunks, level: base32_decode_stream(chunks), "application/octet-stream"),
+}
+for codec in COMPRESSED_CODECS:
+    STREAM_CODECS[f"{codec}/encode"] = (
+        lambda chunks, level, codec=codec: compressed_encode_stream(chunks, codec, level), "text/plain"
+    )
+    STREAM_CODECS[f"{codec}/decode"] = (
+        lambda chunks, level, codec=codec: compressed_decode_stream(chunks, codec), "application/octet-stream"
+    )
+
+def stream_saved_file(file_path: str, stream, level: Optional[int] = None):
+    """Stream a codec over a saved upload, deleting it once the response is sent"""
+    try:
+        with open(file_path, "rb") as f:
+            yield from stream(iter_file_chunks(f), level)
+    finally:
+        cleanup_files([file_path])
+
+@router.post("/file/hash/{algorithm}", response_class=PlainTextResponse)
+def file_hash_endpoint(algorithm: str, file: UploadFile = File(...)):
+    """Hash an uploaded file in chunks"""
+    if algorithm not in HASH_ALGORITHMS:
+        raise HTTPException(status_code=400, detail=f"Unsupported hash algorithm: {algorithm}")
+    return hash_stream(iter_file_chunks(file.file), algorithm)
+
+@router.post("/file/hmac/{algorithm}", response_class=PlainTextResponse)
+def file_hmac_endpoint(algorithm: str, file: UploadFile = File(...), secret: str = Form(...)):
+    """Generate HMAC of an uploaded file in chunks"""
+    if algorithm not in HASH_ALGORITHMS:
+        raise HTTPException(status_code=400, detail=f"Unsupported HMAC algorithm: {algorithm}")
+    if not secret:
+        raise HTTPException(status_code=400, detail="Secret key is required for HMAC")
+    return hmac_stream(iter_file_chunks(file.file), secret, algorithm)
+
+@router.post("/file/hash-multi", response_model=MultiDigestResponse)
+def file_hash_multi_endpoint(
+    file: UploadFile = File(...),
+    algorithms: str = Form("md5,sha1,sha256,sha512"),
+    hmac_algorithms: str = Form(""),
+    secret: Optional[str] = Form(None)
+):
+    """Generate several hashes and HMACs of an uploaded file in one parallel pass"""
+    algorithm_list = [a.strip() for a in algorithms.split(",") if a.strip()]
+    hmac_list = [a.strip() for a in hmac_algorithms.split(",") if a.strip()]
+    try:
+        digests = multi_digest_stream(iter_file_chunks(file.file), algorithm_list, hmac_list, secret, parallel=True)
+        return MultiDigestResponse(digests=digests)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def sort_saved_file(file_path: str, **options):
+    """Stream the sorted lines of a saved upload, deleting it afterwards"""
+    try:
+        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            yield from external_sort_lines(f, temp_dir=TEMP_DIR, **options)
+    finally:
+        cleanup_files([file_path])
+
+@router.post("/file/sort")
+async def file_sort_endpoint(
+    file: UploadFile = File(...),
+    reverse: bool = Form(False),
+    numeric: bool = Form(False),
+    ignore_case: bool = Form(False),
+    unique: bool = Form(False),
+    limit: Optional[int] = Form(None)
+):
+    """Sort the lines of an uploaded file with an external merge sort"""
+    if limit is not None and limit < 0:
+        raise HTTPException(status_code=400, detail="limit must not be negative")
+    file_path = await save_upload_file(file, TEMP_DIR)
+    lines = sort_saved_file(
+        file_path,
+        reverse=reverse,
+        numeric=numeric,
+        ignore_case=ignore_case,
+        unique=unique,
+        limit=limit
+    )
+    return StreamingResponse(lines, media_type="text/plain")
+
+@router.post("/file/{codec}/{direction}")
+async def file_codec_endpoint(
+    codec: str,
+    direction: str,
+    file: UploadFile = File(...),
+    level: Optional[int] = Form(None)
+):
+    """Stream Base64/Base32 or compressed-codec encoding or decoding of an uploaded file"""
+    operation = f"{codec}/{direction}"
+    if operation not in STREAM_CODECS:
+        raise HTTPException(status_code=400, detail=f"Unsupported streaming operation: {operation}")
+    if level is not None and not 0 <= level <= 9:
+        raise HTTPException(status_code=400, detail="Compression level must be between 0 and 9")
+    stream, media_type = STREAM_CODECS[operation]
+    # The upload is closed when the endpoint returns, so spool it to disk first
+    file_path = await save_upload_file(file, TEMP_DIR)
+    return StreamingResponse(stream_saved_file(file_path, stream, level), media_type=media_type)
+
 # JSON Formatting Endpoints
 @router.post("/json/format", response_model=EncodeResponse)
 async def json_format_endpoint(request: EncodeRequest):
@@ -283,16 +669,30 @@ async def text_reverse_endpoint(request: EncodeRequest):
 @router.post("/text/sort", response_model=EncodeResponse)
 async def text_sort_endpoint(request: EncodeRequest):
     """Sort lines"""
-    result = text_sort_lines(request.text)
+    result = text_sort_lines(request.text, reverse=bool(request.reverse))
     return EncodeResponse(result=result)
 
 # Generators
 @router.post("/generate/uuid", response_model=EncodeResponse)
-async def generate_uuid_endpoint():
+async def generate_uuid_endpoint(version: int = 4):
     """Generate UUID"""
-    result = generate_uuid()
+    try:
+        result = generate_uuid(version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return EncodeResponse(result=result)
 
+MAX_BULK_UUIDS = 10_000_000
+
+@router.post("/generate/uuid/bulk")
+async def generate_uuid_bulk_endpoint(request: BulkUUIDRequest):
+    """Stream newline-delimited UUIDs"""
+    if request.count <= 0 or request.count > MAX_BULK_UUIDS:
+        raise HTTPException(status_code=400, detail=f"count must be between 1 and {MAX_BULK_UUIDS}")
+    if request.version not in UUID_VERSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported UUID version: {request.version}")
+    return StreamingResponse(iter_uuids(request.count, request.version), media_type="text/plain")
+
 @router.post("/generate/lorem", response_model=EncodeResponse)
 async def generate_lorem_endpoint(request: Optional[EncodeRequest] = None):
     """Generate Lorem Ipsum or Random Text"""
@@ -304,6 +704,17 @@ async def generate_lorem_endpoint(request: Optional[EncodeRequest] = None):
         characters = request.indent  # Reusing indent field for characters count
     
     print(f"DEBUG: paragraphs={paragraphs}, use_lorem={use_lorem}, characters={characters}")
-    result = generate_lorem_ipsum(paragraphs, use_lorem, characters)
+    seed = request.seed if request else None
+    result = generate_lorem_ipsum(paragraphs, use_lorem, characters, seed)
     print(f"DEBUG: result length={len(result)}")
     return EncodeResponse(result=result)
+
+MAX_GENERATED_CHARACTERS = 1024 * 1024 * 1024  # 1 GB
+
+@router.post("/generate/text/stream")
+async def generate_text_stream_endpoint(request: GenerateTextRequest):
+    """Stream large, reproducible placeholder text"""
+    if request.characters <= 0 or request.characters > MAX_GENERATED_CHARACTERS:
+        raise HTTPException(status_code=400, detail=f"characters must be between 1 and {MAX_GENERATED_CHARACTERS}")
+    chunks = iter_placeholder_text(request.characters, request.seed, bool(request.use_lorem))
+    return StreamingResponse(chunks, media_type="text/plain")
@@ -1,53 +1,124 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Depends, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Optional, Any
-import json
-import re
+from typing import Optional, Any, List, Dict, BinaryIO
+import io
+import itertools
+import ijson
+from app.utils import json_codec
+from app.utils.document_store import document_store, parsed_size
+from app.utils.file_helpers import save_upload_file, cleanup_files, TEMP_DIR
+from app.utils.json_diff import diff_json
+from app.utils.json_export import export_records
+from app.utils.json_patch import apply_patch, apply_patch_copy
+from app.utils.json_query import query_json, query_json_many
+from app.utils.json_schema import validate_against_schema
+from app.utils.json_pipeline import run_pipeline
+from app.utils.json_stream import iter_array_items, iter_reformatted, scan_json, stream_query
+from app.utils.ndjson import ndjson_aggregate, ndjson_map
 
 router = APIRouter(prefix="/json-editor", tags=["JSON Editor"])
 
 class JSONTransformRequest(BaseModel):
-    input_json: str
+    input_json: Optional[str] = None
+    document_id: Optional[str] = None  # use a stored document instead of input_json
     expression: Optional[str] = None
+    expressions: Optional[List[str]] = None  # query: several expressions over one parse
     operation: Optional[str] = "format"  # format, query, transform
+    validation_schema: Optional[str] = None  # validate: JSON Schema to check the document against
 
 class JSONTransformResponse(BaseModel):
     result: str
     success: bool
     error: Optional[str] = None
 
+class DocumentResponse(BaseModel):
+    document_id: str
+    size: int  # approximate in-memory bytes of the parsed document
+    expires_in: int
+
+class JSONPatchRequest(BaseModel):
+    operations: List[Dict[str, Any]]
+
+class JSONDiffRequest(BaseModel):
+    input_json: Optional[str] = None  # source document
+    document_id: Optional[str] = None  # use a stored document as the source
+    target_json: str
+
+class JSONApplyPatchRequest(BaseModel):
+    input_json: str
+    operations: List[Dict[str, Any]]
+
+class JSONExportRequest(BaseModel):
+    input_json: Optional[str] = None
+    document_id: Optional[str] = None
+    expression: Optional[str] = None  # query selecting the rows; defaults to the whole document
+    format: str = "csv"  # csv, parquet
+    columns: Optional[List[str]] = None  # pick and order columns (dotted names for nested fields)
+    key_union: str = "all"  # all, batch
+    column_order: str = "first_seen"  # first_seen, sorted
+
+def document_owner(request: Request) -> str:
+    """Identify who a stored document belongs to (the client address until routes are authenticated)"""
+    return request.client.host if request.client else "anonymous"
+
+def load_document(request: JSONTransformRequest, owner: str) -> Any:
+    """Return the parsed document for a request, from the store or from input_json"""
+    if request.document_id:
+        try:
+            return document_store.get(request.document_id, owner).data
+        except KeyError:
+            raise ValueError("Document not found or expired")
+    if request.input_json is None:
+        raise ValueError("Either input_json or document_id is required")
+    return json_codec.loads(request.input_json)
+
+def document_response(document) -> DocumentResponse:
+    return DocumentResponse(
+        document_id=document.id,
+        size=document.size,
+        expires_in=int(document_store.ttl_seconds)
+    )
+
 @router.post("/transform", response_model=JSONTransformResponse)
-async def transform_json(request: JSONTransformRequest):
+async def transform_json(request: JSONTransformRequest, owner: str = Depends(document_owner)):
     """Transform JSON with various operations"""
     try:
-        # Parse input JSON
-        data = json.loads(request.input_json)
+        if request.operation in ("format", "minify") and not request.document_id:
+            # Format with indentation or minify straight from the text
+            indent = 2 if request.operation == "format" else None
+            result = json_codec.reformat(request.input_json or "", indent=indent)
+            return JSONTransformResponse(result=result, success=True)
+        
+        # Parse input JSON (or reuse the stored document)
+        data = load_document(request, owner)
         
         if request.operation == "format":
-            # Format JSON with indentation
-            result = json.dumps(data, indent=2, ensure_ascii=False)
-            return JSONTransformResponse(result=result, success=True)
+            return JSONTransformResponse(result=json_codec.dumps(data, indent=2), success=True)
         
         elif request.operation == "minify":
-            # Minify JSON
-            result = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
-            return JSONTransformResponse(result=result, success=True)
+            return JSONTransformResponse(result=json_codec.dumps(data), success=True)
+        
         
         elif request.operation == "query":
             # Simple JSONPath-like queries
+            if request.expressions:
+                result = query_json_many(data, request.expressions)
+                return JSONTransformResponse(result=json_codec.dumps(result, indent=2), success=True)
             if not request.expression:
-                return JSONTransformResponse(result=json.dumps(data, indent=2), success=True)
+                return JSONTransformResponse(result=json_codec.dumps(data, indent=2, ensure_ascii=True), success=True)
             
             result = query_json(data, request.expression)
-            return JSONTransformResponse(result=json.dumps(result, indent=2, ensure_ascii=False), success=True)
+            return JSONTransformResponse(result=json_codec.dumps(result, indent=2), success=True)
         
         elif request.operation == "transform":
-            # Apply transformations
+            # Apply a transform pipeline, e.g. filter(.age > 30) | sort_by(.name) | limit(10)
             if not request.expression:
-                return JSONTransformResponse(result=json.dumps(data, indent=2), success=True)
+                return JSONTransformResponse(result=json_codec.dumps(data, indent=2, ensure_ascii=True), success=True)
             
-            result = transform_json_data(data, request.expression)
-            return JSONTransformResponse(result=json.dumps(result, indent=2, ensure_ascii=False), success=True)
+            result = run_pipeline(data, request.expression)
+            return JSONTransformResponse(result=json_codec.dumps(result, indent=2), success=True)
         
         else:
             return JSONTransformResponse(
@@ -56,7 +127,7 @@ async def transform_json(request: JSONTransformRequest):
                 error=f"Unknown operation: {request.operation}"
             )
             
-    except json.JSONDecodeError as e:
+    except json_codec.JSONDecodeError as e:
         return JSONTransformResponse(
             result="",
             success=False,
@@ -69,304 +140,338 @@ async def transform_json(request: JSONTransformRequest):
             error=f"Error: {str(e)}"
         )
 
-def query_json(data: Any, expression: str) -> Any:
-    """Enhanced JSON query with calculations and aggregations"""
-    expression = expression.strip()
-    
-    # Support both sum() and $sum() syntax
-    func_name = None
-    inner_expr = None
-    
-    # Check for $ prefix functions
-    if expression.startswith('$sum(') and expression.endswith(')'):
-        func_name = 'sum'
-        inner_expr = expression[5:-1].strip()
-    elif expression.startswith('$avg(') and expression.endswith(')'):
-        func_name = 'avg'
-        inner_expr = expression[5:-1].strip()
-    elif expression.startswith('$min(') and expression.endswith(')'):
-        func_name = 'min'
-        inner_expr = expression[5:-1].strip()
-    elif expression.startswith('$max(') and expression.endswith(')'):
-        func_name = 'max'
-        inner_expr = expression[5:-1].strip()
-    elif expression.startswith('$count(') and expression.endswith(')'):
-        func_name = 'count'
-        inner_expr = expression[7:-1].strip()
-    # Check for regular functions
-    elif expression.startswith('sum(') and expression.endswith(')'):
-        func_name = 'sum'
-        inner_expr = expression[4:-1].strip()
-    elif expression.startswith('avg(') and expression.endswith(')'):
-        func_name = 'avg'
-        inner_expr = expression[4:-1].strip()
-    elif expression.startswith('min(') and expression.endswith(')'):
-        func_name = 'min'
-        inner_expr = expression[4:-1].strip()
-    elif expression.startswith('max(') and expression.endswith(')'):
-        func_name = 'max'
-        inner_expr = expression[4:-1].strip()
-    elif expression.startswith('count(') and expression.endswith(')'):
-        func_name = 'count'
-        inner_expr = expression[6:-1].strip()
-    
-    # Process aggregation functions
-    if func_name and inner_expr:
-        # Check if it contains mathematical operations
-        if any(op in inner_expr for op in ['*', '/', '+', '-', '(', ')']):
-            values = evaluate_complex_expression(data, inner_expr)
-        else:
-            values = extract_array_values(data, inner_expr)
-        
-        if func_name == 'sum':
-            return sum(values) if values else 0
-        elif func_name == 'avg':
-            return sum(values) / len(values) if values else 0
-        elif func_name == 'min':
-            return min(values) if values else None
-        elif func_name == 'max':
-            return max(values) if values else None
-        elif func_name == 'count':
-            return len(values)
-    
-    # Support basic dot notation queries like "user.name" or "items[0].title"
-    parts = re.split(r'\.|\[|\]', expression)
-    parts = [p for p in parts if p]  # Remove empty strings
-    
-    result = data
-    for part in parts:
-        if isinstance(result, dict):
-            result = result.get(part, None)
-        elif isinstance(result, list):
-            try:
-                index = int(part)
-                result = result[index] if 0 <= index < len(result) else None
-            except (ValueError, IndexError):
-                result = None
-        else:
-            result = None
-        
-        if result is None:
-            break
-    
-    return result
-
-def evaluate_complex_expression(data: Any, expression: str) -> list:
-    """Evaluate complex expressions like Account.Order.Product.(Price*Quantity)"""
-    # Find the mathematical expression in the last set of parentheses
-    # Use a more robust pattern that handles nested parentheses
-    # Find the last opening parenthesis and match to the end
-    last_paren = expression.rfind('.(')
-    if last_paren == -1:
-        return extract_array_values(data, expression)
-    
-    # Extract everything after '.(' and remove the trailing ')'
-    math_expr = expression[last_paren + 2:]
-    if math_expr.endswith(')'):
-        math_expr = math_expr[:-1]
-    
-    path_before = expression[:last_paren]  # e.g., "Store.Sales"
-    
-    print(f"DEBUG: Expression: {expression}")
-    print(f"DEBUG: Math expr: {math_expr}")
-    print(f"DEBUG: Path before: {path_before}")
-    
-    # Navigate through the nested structure
-    current = data
-    if path_before:
-        parts = path_before.split('.')
-        print(f"DEBUG: Parts to navigate: {parts}")
-        
-        for i, part in enumerate(parts):
-            print(f"DEBUG: Navigating to '{part}', current type: {type(current)}")
-            
-            if isinstance(current, dict):
-                current = current.get(part)
-                print(f"DEBUG: After getting '{part}', current type: {type(current)}, value: {current if not isinstance(current, list) else f'list with {len(current)} items'}")
-                if current is None:
-                    print(f"DEBUG: '{part}' not found in dict")
-                    return []
-            elif isinstance(current, list):
-                # If we hit an array before reaching the end, we need to recurse
-                print(f"DEBUG: Hit array at '{part}', recursing...")
-                remaining_parts = parts[i:]
-                remaining_path = '.'.join(remaining_parts) + '.(' + math_expr + ')'
-                
-                all_results = []
-                for item in current:
-                    sub_results = evaluate_complex_expression(item, remaining_path)
-                    all_results.extend(sub_results)
-                return all_results
-            else:
-                print(f"DEBUG: Unexpected type at '{part}': {type(current)}")
-                return []
-    
-    print(f"DEBUG: Final current type: {type(current)}, is list: {isinstance(current, list)}")
-    
-    # Process array items or nested arrays
-    results = []
-    
-    def process_items(items):
-        """Recursively process items, handling nested arrays"""
-        local_results = []
-        print(f"DEBUG: process_items called with {len(items) if isinstance(items, list) else 'non-list'} items")
-        
-        if isinstance(items, list):
-            for idx, item in enumerate(items):
-                print(f"DEBUG: Processing item {idx}: {type(item)}")
-                
-                if isinstance(item, dict):
-                    print(f"DEBUG: Item keys: {list(item.keys())}")
-                    
-                    # Try to evaluate the expression with this item's values
-                    eval_expr = math_expr
-                    
-                    # Get all field names from the expression (words that start with uppercase or lowercase letter)
-                    field_names = re.findall(r'\b[A-Za-z]\w*\b', math_expr)
-                    field_names = list(set(field_names))  # Remove duplicates
-                    print(f"DEBUG: Required field names: {field_names}")
-                    
-                    # Check if all required fields exist in this item
-                    has_all_fields = all(field in item for field in field_names)
-                    print(f"DEBUG: Has all fields: {has_all_fields}")
-                    
-                    if has_all_fields:
-                        # Sort keys by length (longest first) to avoid partial replacements
-                        sorted_keys = sorted(item.keys(), key=len, reverse=True)
-                        
-                        for key in sorted_keys:
-                            val = item[key]
-                            if isinstance(val, (int, float)):
-                                # Replace field name with its value
-                                # Use word boundaries to avoid partial matches
-                                pattern = r'\b' + re.escape(key) + r'\b'
-                                eval_expr = re.sub(pattern, str(val), eval_expr)
-                        
-                        # Evaluate the expression
-                        try:
-                            result = safe_eval(eval_expr)
-                            if result is not None:
-                                local_results.append(result)
-                        except Exception as e:
-                            # Skip this item if evaluation fails
-                            import traceback
-                            print(f"Error evaluating {eval_expr}: {e}")
-                            traceback.print_exc()
-                            pass
-                    else:
-                        # Some fields not found, check nested arrays
-                        for value in item.values():
-                            if isinstance(value, list):
-                                local_results.extend(process_items(value))
-                elif isinstance(item, list):
-                    local_results.extend(process_items(item))
-        return local_results
-    
-    results = process_items(current)
-    return results
-
-def safe_eval(expr: str) -> float:
-    """Safely evaluate mathematical expressions"""
-    # Clean up the expression
-    expr = expr.strip()
-    
-    # Only allow numbers, operators, parentheses, and spaces
-    allowed_chars = set('0123456789+-*/(). ')
-    if not all(c in allowed_chars for c in expr):
-        raise ValueError(f"Invalid characters in expression: {expr}")
-    
+@router.post("/stream/query", response_model=JSONTransformResponse)
+def stream_query_json(file: UploadFile = File(...), expression: str = Form(...)):
+    """Query an uploaded JSON file incrementally without loading it into memory"""
     try:
-        # Use eval with restricted globals/locals for safety
-        result = eval(expr, {"__builtins__": {}}, {})
-        return float(result)
+        result = stream_query(file.file, expression)
+        return JSONTransformResponse(result=json_codec.dumps(result, indent=2), success=True)
+    except ijson.JSONError as e:
+        return JSONTransformResponse(
+            result="",
+            success=False,
+            error=f"Invalid JSON: {str(e)}"
+        )
     except Exception as e:
-        return None
-
-def extract_array_values(data: Any, path: str) -> list:
-    """Extract numeric values from nested arrays using path like 'School.Classes.Students.Score'"""
-    parts = path.split('.')
-    
-    def extract_recursive(current: Any, remaining_parts: list) -> list:
-        """Recursively extract values from nested structures"""
-        if not remaining_parts:
-            return []
-        
-        if len(remaining_parts) == 1:
-            # Last part - extract the field value
-            field = remaining_parts[0]
-            if isinstance(current, dict) and field in current:
-                val = current[field]
-                if isinstance(val, (int, float)):
-                    return [val]
-            elif isinstance(current, list):
-                values = []
-                for item in current:
-                    if isinstance(item, dict) and field in item:
-                        val = item[field]
-                        if isinstance(val, (int, float)):
-                            values.append(val)
-                return values
-            return []
-        
-        # More parts to navigate
-        part = remaining_parts[0]
-        rest = remaining_parts[1:]
-        
-        if isinstance(current, dict):
-            next_val = current.get(part)
-            if next_val is not None:
-                return extract_recursive(next_val, rest)
-        elif isinstance(current, list):
-            # Current is an array, recurse into each item
-            all_values = []
-            for item in current:
-                if isinstance(item, dict) and part in item:
-                    all_values.extend(extract_recursive(item[part], rest))
-                else:
-                    # Try to continue with the same path on the item
-                    all_values.extend(extract_recursive(item, remaining_parts))
-            return all_values
-        
-        return []
-    
-    return extract_recursive(data, parts)
-
-def transform_json_data(data: Any, expression: str) -> Any:
-    """Apply simple transformations to JSON data"""
-    # Support basic transformations
-    if expression.startswith("keys"):
-        if isinstance(data, dict):
-            return list(data.keys())
-    elif expression.startswith("values"):
-        if isinstance(data, dict):
-            return list(data.values())
-    elif expression.startswith("length") or expression.startswith("count"):
-        if isinstance(data, (list, dict, str)):
-            return len(data)
-    elif expression.startswith("sort"):
-        if isinstance(data, list):
-            return sorted(data)
-    elif expression.startswith("reverse"):
-        if isinstance(data, list):
-            return list(reversed(data))
-    elif expression.startswith("unique"):
-        if isinstance(data, list):
-            return list(set(data))
-    
-    return data
+        return JSONTransformResponse(
+            result="",
+            success=False,
+            error=f"Error: {str(e)}"
+        )
+
+def check_syntax(fileobj: BinaryIO):
+    """Check JSON syntax without building the document
+
+    The scan is stricter than the parser (it rejects NaN/Infinity), so on a
+    scan error the parser decides, which also gives the line and column.
+    """
+    try:
+        scan_json(fileobj)
+    except ijson.JSONError:
+        fileobj.seek(0)
+        json_codec.loads(fileobj.read())
+
+def schema_result(data: Any, validation_schema: str) -> JSONTransformResponse:
+    """Validate a parsed document against a JSON Schema given as text"""
+    try:
+        schema = json_codec.loads(validation_schema)
+    except json_codec.JSONDecodeError as e:
+        raise ValueError(f"Invalid schema JSON at line {e.lineno}, column {e.colno}: {e.msg}")
+    errors = validate_against_schema(data, schema)
+    if not errors:
+        return JSONTransformResponse(result="Valid JSON (matches schema)", success=True)
+    first = errors[0]
+    return JSONTransformResponse(
+        result=json_codec.dumps(errors, indent=2),
+        success=False,
+        error=f"{len(errors)} schema error(s), first at '{first['path']}': {first['message']}"
+    )
+
+# Tabular export
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+def export_response(chunks, format: str) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="export.{format}"'}
+    )
+
+@router.post("/export")
+async def export_json(request: JSONExportRequest, owner: str = Depends(document_owner)):
+    """Export an array of objects (optionally selected by a query) as CSV or Parquet"""
+    try:
+        data = load_document(request, owner)
+        rows = query_json(data, request.expression) if request.expression else data
+        if not isinstance(rows, list):
+            rows = [rows]
+        chunks = await run_in_threadpool(
+            export_records,
+            lambda: iter(rows),
+            request.format,
+            request.columns,
+            request.key_union,
+            request.column_order
+        )
+    except json_codec.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return export_response(chunks, request.format)
+
+def export_saved_file(file_path: str, expression: str, **options):
+    """Export the rows of a saved upload, deleting it once the response is sent"""
+    def open_records():
+        with open(file_path, "rb") as f:
+            yield from iter_array_items(f, expression)
+
+    try:
+        yield from export_records(open_records, **options)
+    finally:
+        cleanup_files([file_path])
+
+@router.post("/stream/export")
+async def stream_export_json(
+    file: UploadFile = File(...),
+    expression: str = Form(""),
+    format: str = Form("csv"),
+    columns: Optional[str] = Form(None),
+    key_union: str = Form("all"),
+    column_order: str = Form("first_seen")
+):
+    """Export the array at a path in an uploaded JSON file as CSV or Parquet, a batch of rows at a time"""
+    column_list = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    file_path = await save_upload_file(file, TEMP_DIR)
+    chunks = export_saved_file(
+        file_path,
+        expression,
+        format=format,
+        columns=column_list,
+        key_union=key_union,
+        column_order=column_order
+    )
+    try:
+        # Produce the first chunk here so that bad options and early syntax errors still get a 400
+        first = await run_in_threadpool(next, chunks, b"")
+    except (ValueError, ijson.JSONError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return export_response(itertools.chain([first], chunks), format)
+
+# NDJSON / JSON Lines
+def map_saved_file(file_path: str, expression: str):
+    """Stream per-line results for a saved upload, deleting it once the response is sent"""
+    try:
+        yield from ndjson_map(file_path, expression)
+    finally:
+        cleanup_files([file_path])
+
+@router.post("/ndjson/map")
+async def ndjson_map_lines(file: UploadFile = File(...), expression: str = Form(...)):
+    """Apply a query or transform pipeline to every line of an NDJSON file, streaming NDJSON results"""
+    file_path = await save_upload_file(file, TEMP_DIR)
+    lines = map_saved_file(file_path, expression)
+    try:
+        # Produce the first chunk here so that syntax errors still get a 400
+        first = await run_in_threadpool(next, lines, b"")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(itertools.chain([first], lines), media_type="application/x-ndjson")
+
+@router.post("/ndjson/aggregate", response_model=JSONTransformResponse)
+async def ndjson_aggregate_lines(file: UploadFile = File(...), expression: str = Form(...)):
+    """Aggregate over every line of an NDJSON file, e.g. avg(duration_ms) or group_by(level)"""
+    file_path = await save_upload_file(file, TEMP_DIR)
+    try:
+        result = await run_in_threadpool(ndjson_aggregate, file_path, expression)
+        return JSONTransformResponse(result=json_codec.dumps(result, indent=2), success=True)
+    except Exception as e:
+        return JSONTransformResponse(
+            result="",
+            success=False,
+            error=f"Error: {str(e)}"
+        )
+    finally:
+        cleanup_files([file_path])
+
+def reformat_saved_file(file_path: str, indent: Optional[int], sort_keys: bool):
+    """Stream a saved upload reformatted, deleting it once the response is sent"""
+    try:
+        with open(file_path, "rb") as f:
+            yield from iter_reformatted(f, indent=indent, sort_keys=sort_keys)
+    finally:
+        cleanup_files([file_path])
+
+@router.post("/stream/format")
+async def stream_format_json(
+    file: UploadFile = File(...),
+    indent: Optional[int] = Form(2),
+    minify: bool = Form(False),
+    sort_keys: bool = Form(False)
+):
+    """Pretty-print or minify an uploaded JSON file, streaming the output as it is produced"""
+    if indent is not None and not 0 <= indent <= 16:
+        raise HTTPException(status_code=400, detail="indent must be between 0 and 16")
+    # The upload is closed when the endpoint returns, so spool it to disk first
+    file_path = await save_upload_file(file, TEMP_DIR)
+    chunks = reformat_saved_file(file_path, None if minify else indent, sort_keys)
+    try:
+        # Produce the first chunk here so that early syntax errors still get a 400
+        first = await run_in_threadpool(next, chunks, b"")
+    except ijson.JSONError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {str(e)}")
+    return StreamingResponse(itertools.chain([first], chunks), media_type="application/json")
 
 @router.post("/validate", response_model=JSONTransformResponse)
-async def validate_json(request: JSONTransformRequest):
-    """Validate JSON syntax"""
+async def validate_json(request: JSONTransformRequest, owner: str = Depends(document_owner)):
+    """Validate JSON syntax, and optionally the document against a JSON Schema"""
     try:
-        data = json.loads(request.input_json)
+        if request.validation_schema:
+            return schema_result(load_document(request, owner), request.validation_schema)
+        if request.document_id:
+            # Stored documents were parsed on upload
+            load_document(request, owner)
+        elif request.input_json is None:
+            raise ValueError("Either input_json or document_id is required")
+        else:
+            check_syntax(io.BytesIO(request.input_json.encode()))
         return JSONTransformResponse(
             result="Valid JSON",
             success=True
         )
-    except json.JSONDecodeError as e:
+    except json_codec.JSONDecodeError as e:
         return JSONTransformResponse(
             result="",
             success=False,
             error=f"Invalid JSON at line {e.lineno}, column {e.colno}: {e.msg}"
         )
+    except ValueError as e:
+        return JSONTransformResponse(
+            result="",
+            success=False,
+            error=str(e)
+        )
+
+@router.post("/stream/validate", response_model=JSONTransformResponse)
+def stream_validate_json(file: UploadFile = File(...), validation_schema: Optional[str] = Form(None)):
+    """Validate an uploaded JSON file; syntax-only checks never load it into memory"""
+    try:
+        check_syntax(file.file)
+        if validation_schema:
+            file.file.seek(0)
+            return schema_result(json_codec.loads(file.file.read()), validation_schema)
+        return JSONTransformResponse(result="Valid JSON", success=True)
+    except json_codec.JSONDecodeError as e:
+        return JSONTransformResponse(
+            result="",
+            success=False,
+            error=f"Invalid JSON at line {e.lineno}, column {e.colno}: {e.msg}"
+        )
+    except ValueError as e:
+        return JSONTransformResponse(
+            result="",
+            success=False,
+            error=str(e)
+        )
+
+@router.post("/diff", response_model=JSONTransformResponse)
+async def diff_documents(request: JSONDiffRequest, owner: str = Depends(document_owner)):
+    """Compute the RFC 6902 JSON Patch that turns the source document into the target"""
+    try:
+        source = load_document(request, owner)
+        target = json_codec.loads(request.target_json)
+        return JSONTransformResponse(result=json_codec.dumps(diff_json(source, target), indent=2), success=True)
+    except json_codec.JSONDecodeError as e:
+        return JSONTransformResponse(
+            result="",
+            success=False,
+            error=f"Invalid JSON: {str(e)}"
+        )
+    except Exception as e:
+        return JSONTransformResponse(
+            result="",
+            success=False,
+            error=f"Error: {str(e)}"
+        )
+
+@router.post("/patch", response_model=JSONTransformResponse)
+async def patch_json(request: JSONApplyPatchRequest):
+    """Apply an RFC 6902 JSON Patch to a JSON document"""
+    try:
+        data = apply_patch(json_codec.loads(request.input_json), request.operations)
+        return JSONTransformResponse(result=json_codec.dumps(data, indent=2), success=True)
+    except json_codec.JSONDecodeError as e:
+        return JSONTransformResponse(
+            result="",
+            success=False,
+            error=f"Invalid JSON: {str(e)}"
+        )
+    except Exception as e:
+        return JSONTransformResponse(
+            result="",
+            success=False,
+            error=f"Error: {str(e)}"
+        )
+
+# Stored documents
+def parse_document(content: bytes) -> tuple:
+    """Parse an uploaded document and measure its in-memory size"""
+    data = json_codec.loads(content)
+    return data, parsed_size(data)
+
+@router.post("/documents", response_model=DocumentResponse)
+async def upload_document(file: UploadFile = File(...), owner: str = Depends(document_owner)):
+    """Parse an uploaded JSON document once and keep it for later calls"""
+    try:
+        content = await file.read()
+        data, size = await run_in_threadpool(parse_document, content)
+        return document_response(document_store.add(owner, data, size))
+    except json_codec.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON at line {e.lineno}, column {e.colno}: {e.msg}")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/documents/{document_id}", response_model=JSONTransformResponse)
+async def get_document(document_id: str, owner: str = Depends(document_owner)):
+    """Return a stored document as formatted JSON"""
+    try:
+        document = document_store.get(document_id, owner)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Document not found or expired")
+    result = await run_in_threadpool(json_codec.dumps, document.data, 2)
+    return JSONTransformResponse(result=result, success=True)
+
+def patch_stored_document(document, operations: List[dict]):
+    """Patch a stored document copy-on-write and swap in the result
+
+    Concurrent readers keep the root they already hold. If the patch fails
+    or outgrows the budget, the stored data is left as it was.
+    """
+    with document.lock:
+        data = apply_patch_copy(document.data, operations)
+        return document_store.update(document.id, document.owner, data, parsed_size(data))
+
+@router.post("/documents/{document_id}/patch", response_model=DocumentResponse)
+async def patch_document(document_id: str, request: JSONPatchRequest, owner: str = Depends(document_owner)):
+    """Apply an RFC 6902 JSON Patch to a stored document"""
+    try:
+        document = document_store.get(document_id, owner)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Document not found or expired")
+    try:
+        return document_response(await run_in_threadpool(patch_stored_document, document, request.operations))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Document not found or expired")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.delete("/documents/{document_id}")
+async def delete_document(document_id: str, owner: str = Depends(document_owner)):
+    """Drop a stored document"""
+    if not document_store.remove(document_id, owner):
+        raise HTTPException(status_code=404, detail="Document not found or expired")
+    return {"deleted": True}
+
+@router.get("/metrics")
+async def json_editor_metrics():
+    """Stored document counts and byte usage, for monitoring"""
+    return {"document_store": document_store.stats()}
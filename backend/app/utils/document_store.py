@@ -0,0 +1,173 @@
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Optional
+
+DOCUMENT_TTL_SECONDS = 30 * 60  # idle documents expire after 30 minutes
+MAX_TOTAL_DOCUMENT_BYTES = 512 * 1024 * 1024
+MAX_OWNER_DOCUMENT_BYTES = 64 * 1024 * 1024
+
+def parsed_size(data: Any) -> int:
+    """Approximate memory held by a parsed JSON value: sys.getsizeof over every node
+
+    Objects shared between nodes (small ints, repeated keys) are counted each
+    time, so this errs on the high side.
+    """
+    getsizeof = sys.getsizeof
+    size = 0
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        size += getsizeof(value)
+        if type(value) is dict:
+            size += sum(map(getsizeof, value))
+            stack.extend(value.values())
+        elif type(value) is list:
+            stack.extend(value)
+    return size
+
+class StoredDocument:
+    """A parsed JSON document kept in memory between requests
+
+    data is never modified in place: a patch builds a new root that shares
+    unchanged subtrees and swaps it in, so readers need no lock. lock only
+    serialises patches, so each one starts from the latest data.
+    """
+    __slots__ = ('id', 'owner', 'data', 'size', 'expires_at', 'lock')
+
+    def __init__(self, document_id: str, owner: str, data: Any, size: int, expires_at: float):
+        self.id = document_id
+        self.owner = owner
+        self.data = data
+        self.size = size
+        self.expires_at = expires_at
+        self.lock = threading.Lock()
+
+class DocumentStore:
+    """In-memory store of parsed documents with per-owner and global byte budgets
+
+    Documents are kept in least-recently-used order. Every access slides the
+    TTL, so the front of the order is also the first to expire. Sizes are
+    in-memory sizes of the parsed documents (see parsed_size), several times
+    their JSON text size.
+    """
+
+    def __init__(
+        self,
+        max_total_bytes: int = MAX_TOTAL_DOCUMENT_BYTES,
+        max_owner_bytes: int = MAX_OWNER_DOCUMENT_BYTES,
+        ttl_seconds: float = DOCUMENT_TTL_SECONDS
+    ):
+        self.max_total_bytes = max_total_bytes
+        self.max_owner_bytes = max_owner_bytes
+        self.ttl_seconds = ttl_seconds
+        self._documents = OrderedDict()
+        self._owner_bytes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, owner: str, data: Any, size: int) -> StoredDocument:
+        """Store a parsed document, evicting older ones to stay within budget"""
+        self._check_size(size)
+        document = StoredDocument(uuid.uuid4().hex, owner, data, size, 0)
+        with self._lock:
+            self._purge_expired()
+            self._documents[document.id] = document
+            self._charge(document, size)
+            self._touch(document)
+            self._enforce_budgets(owner, document.id)
+        return document
+
+    def get(self, document_id: str, owner: str) -> StoredDocument:
+        """Return a live document owned by owner and refresh its TTL"""
+        with self._lock:
+            self._purge_expired()
+            document = self._documents.get(document_id)
+            if document is None or document.owner != owner:
+                raise KeyError(document_id)
+            self._touch(document)
+            return document
+
+    def update(self, document_id: str, owner: str, data: Any, size: int) -> StoredDocument:
+        """Replace a document's data (e.g. after a patch) and re-account its size
+
+        Raises ValueError, leaving the document as it was, if the new size is
+        over budget.
+        """
+        self._check_size(size)
+        with self._lock:
+            document = self._documents.get(document_id)
+            if document is None or document.owner != owner:
+                raise KeyError(document_id)
+            document.data = data
+            self._charge(document, size - document.size)
+            document.size = size
+            self._touch(document)
+            self._enforce_budgets(owner, document.id)
+            return document
+
+    def remove(self, document_id: str, owner: str) -> bool:
+        """Delete a document; returns False if it did not exist"""
+        with self._lock:
+            document = self._documents.get(document_id)
+            if document is None or document.owner != owner:
+                return False
+            self._drop(document)
+            return True
+
+    def stats(self) -> dict:
+        """Current usage, for monitoring"""
+        with self._lock:
+            self._purge_expired()
+            return {
+                "documents": len(self._documents),
+                "total_bytes": self._total_bytes,
+                "owners": len(self._owner_bytes),
+                "max_total_bytes": self.max_total_bytes,
+                "max_owner_bytes": self.max_owner_bytes,
+            }
+
+    def _check_size(self, size: int):
+        limit = min(self.max_owner_bytes, self.max_total_bytes)
+        if size > limit:
+            raise ValueError(f"Document is too large to keep ({size} bytes, limit {limit} bytes)")
+
+    def _touch(self, document: StoredDocument):
+        document.expires_at = time.monotonic() + self.ttl_seconds
+        self._documents.move_to_end(document.id)
+
+    def _charge(self, document: StoredDocument, size: int):
+        self._owner_bytes[document.owner] = self._owner_bytes.get(document.owner, 0) + size
+        self._total_bytes += size
+
+    def _drop(self, document: StoredDocument):
+        del self._documents[document.id]
+        self._charge(document, -document.size)
+        if self._owner_bytes[document.owner] <= 0:
+            del self._owner_bytes[document.owner]
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        while self._documents:
+            oldest = next(iter(self._documents.values()))
+            if oldest.expires_at > now:
+                break
+            self._drop(oldest)
+
+    def _enforce_budgets(self, owner: str, keep_id: Optional[str]):
+        """Evict least recently used documents, the owner's own first"""
+        if self._owner_bytes.get(owner, 0) > self.max_owner_bytes:
+            for document in list(self._documents.values()):
+                if self._owner_bytes.get(owner, 0) <= self.max_owner_bytes:
+                    break
+                if document.owner == owner and document.id != keep_id:
+                    self._drop(document)
+        for document in list(self._documents.values()):
+            if self._total_bytes <= self.max_total_bytes:
+                break
+            if document.id != keep_id:
+                self._drop(document)
+
+document_store = DocumentStore()
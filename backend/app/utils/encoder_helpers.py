@@ -2,19 +2,66 @@ import base64
 import hashlib
 import hmac
 import jwt
-import json
 import urllib.parse
 import html
+import lzma
+import os
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.cache_helpers import LRUCache
+from app.utils import json_codec
+
+HASH_ALGORITHMS = {
+    'md5': hashlib.md5,
+    'sha1': hashlib.sha1,
+    'sha256': hashlib.sha256,
+    'sha512': hashlib.sha512,
+}
+
+# Keyed contexts (prepared HMAC objects, parsed JWT keys), keyed by a hash of the secret
+KEY_CONTEXT_CACHE_SIZE = 256
+_key_contexts = LRUCache(maxsize=KEY_CONTEXT_CACHE_SIZE)
+
+def _secret_fingerprint(secret: str) -> bytes:
+    """Hash a secret so raw secrets are never used as cache keys"""
+    return hashlib.sha256(secret.encode()).digest()
+
+def get_hmac_context(secret: str, algorithm: str):
+    """Return a fresh HMAC object cloned from a cached keyed context"""
+    cache_key = ('hmac', algorithm, _secret_fingerprint(secret))
+    context = _key_contexts.get(cache_key)
+    if context is None:
+        context = hmac.new(secret.encode(), digestmod=HASH_ALGORITHMS[algorithm])
+        _key_contexts.put(cache_key, context)
+    return context.copy()
+
+def get_jwt_key(secret: str, algorithm: str, verify: bool = False):
+    """Return a cached, already-parsed JWT signing or verification key
+    
+    PEM keys for RS*/ES*/PS* algorithms are parsed once; when a private key is
+    supplied for verification its public half is used.
+    """
+    cache_key = ('jwt', algorithm, verify, _secret_fingerprint(secret))
+    key = _key_contexts.get(cache_key)
+    if key is None:
+        key = jwt.get_algorithm_by_name(algorithm).prepare_key(secret)
+        if verify and hasattr(key, 'public_key'):
+            key = key.public_key()
+        _key_contexts.put(cache_key, key)
+    return key
 
 # Encoding/Decoding functions
 def jwt_encode(text: str, secret: str, algorithm: str = 'HS256') -> str:
     """Encode text as JWT"""
     payload = {'data': text}
-    return jwt.encode(payload, secret, algorithm=algorithm)
+    return jwt.encode(payload, get_jwt_key(secret, algorithm), algorithm=algorithm)
 
 def jwt_decode(token: str, secret: str, algorithm: str = 'HS256') -> str:
     """Decode JWT token"""
-    decoded = jwt.decode(token, secret, algorithms=[algorithm])
+    decoded = jwt.decode(token, get_jwt_key(secret, algorithm, verify=True), algorithms=[algorithm])
     return decoded.get('data', '')
 
 def base32_encode(text: str) -> str:
@@ -80,13 +127,11 @@ def unicode_unescape(text: str) -> str:
 # JSON Formatting functions
 def format_json(text: str, indent: int = 2) -> str:
     """Format JSON with indentation"""
-    data = json.loads(text)
-    return json.dumps(data, indent=indent, ensure_ascii=False)
+    return json_codec.reformat(text, indent=indent)
 
 def minify_json(text: str) -> str:
     """Minify JSON by removing whitespace"""
-    data = json.loads(text)
-    return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    return json_codec.reformat(text)
 
 # Aliases for backward compatibility
 encode_jwt = jwt_encode
@@ -120,30 +165,36 @@ def hash_sha512(text: str) -> str:
 # HMAC functions
 def hmac_md5(text: str, secret: str) -> str:
     """Generate HMAC-MD5"""
-    return hmac.new(secret.encode(), text.encode(), hashlib.md5).hexdigest()
+    mac = get_hmac_context(secret, 'md5')
+    mac.update(text.encode())
+    return mac.hexdigest()
 
 def hmac_sha1(text: str, secret: str) -> str:
     """Generate HMAC-SHA1"""
-    return hmac.new(secret.encode(), text.encode(), hashlib.sha1).hexdigest()
+    mac = get_hmac_context(secret, 'sha1')
+    mac.update(text.encode())
+    return mac.hexdigest()
 
 def hmac_sha256(text: str, secret: str) -> str:
     """Generate HMAC-SHA256"""
-    return hmac.new(secret.encode(), text.encode(), hashlib.sha256).hexdigest()
+    mac = get_hmac_context(secret, 'sha256')
+    mac.update(text.encode())
+    return mac.hexdigest()
 
 def hmac_sha512(text: str, secret: str) -> str:
     """Generate HMAC-SHA512"""
-    return hmac.new(secret.encode(), text.encode(), hashlib.sha512).hexdigest()
+    mac = get_hmac_context(secret, 'sha512')
+    mac.update(text.encode())
+    return mac.hexdigest()
 
 # JSON functions
 def json_format(text: str, indent: int = 2) -> str:
     """Format JSON with indentation"""
-    data = json.loads(text)
-    return json.dumps(data, indent=indent, ensure_ascii=False)
+    return json_codec.reformat(text, indent=indent)
 
 def json_minify(text: str) -> str:
     """Minify JSON"""
-    data = json.loads(text)
-    return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    return json_codec.reformat(text)
 
 # Text manipulation functions
 def text_upper(text: str) -> str:
@@ -168,81 +219,501 @@ def text_sort_lines(text: str, reverse: bool = False) -> str:
     lines.sort(reverse=reverse)
     return '\n'.join(lines)
 
-def generate_uuid() -> str:
-    """Generate UUID v4"""
-    import uuid
-    return str(uuid.uuid4())
-
-def generate_lorem_ipsum(paragraphs: int = 3, use_lorem: bool = False, characters: int = None) -> str:
+def generate_uuid(version: int = 4) -> str:
+    """Generate UUID v4 or time-ordered UUID v7"""
+    return next(iter_uuids(1, version)).strip()
+
+UUID_BATCH_SIZE = 65536
+UUID_VERSIONS = (4, 7)
+# Maps a random hex digit to an RFC 4122 variant digit (8, 9, a or b)
+_UUID_VARIANT = {digit: '89ab'[int(digit, 16) & 3] for digit in '0123456789abcdef'}
+_uuid7_state = {'timestamp': 0, 'counter': 0}
+_uuid7_lock = threading.Lock()
+
+def _uuid7_timestamps(count: int) -> list:
+    """Allocate monotonic (millisecond timestamp, 12-bit counter) pairs for UUID v7"""
+    now = time.time_ns() // 1_000_000
+    state = _uuid7_state
+    if now > state['timestamp']:
+        state['timestamp'], state['counter'] = now, 0
+    stamps = []
+    timestamp, counter = state['timestamp'], state['counter']
+    for _ in range(count):
+        if counter > 0xFFF:
+            # Counter exhausted within this millisecond: borrow the next one
+            timestamp, counter = timestamp + 1, 0
+        stamps.append((timestamp, counter))
+        counter += 1
+    state['timestamp'], state['counter'] = timestamp, counter
+    return stamps
+
+def iter_uuids(count: int, version: int = 4, batch_size: int = UUID_BATCH_SIZE):
+    """Yield newline-terminated UUIDs in batches built from one os.urandom block each"""
+    if version not in UUID_VERSIONS:
+        raise ValueError(f"Unsupported UUID version: {version}")
+    remaining = count
+    while remaining > 0:
+        batch = min(batch_size, remaining)
+        random_hex = os.urandom(16 * batch).hex()
+        lines = []
+        if version == 4:
+            for i in range(0, 32 * batch, 32):
+                h = random_hex[i:i + 32]
+                lines.append(f"{h[0:8]}-{h[8:12]}-4{h[13:16]}-{_UUID_VARIANT[h[16]]}{h[17:20]}-{h[20:32]}\n")
+        else:
+            with _uuid7_lock:
+                stamps = _uuid7_timestamps(batch)
+            for i, (timestamp, counter) in zip(range(0, 32 * batch, 32), stamps):
+                h = random_hex[i:i + 32]
+                ts = f"{timestamp:012x}"
+                lines.append(f"{ts[0:8]}-{ts[8:12]}-7{counter:03x}-{_UUID_VARIANT[h[16]]}{h[17:20]}-{h[20:32]}\n")
+        remaining -= batch
+        yield ''.join(lines)
+
+# Placeholder text tables
+LOREM_PARAGRAPHS = [
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud exercitation ullamco laboris nisi ut aliquip ex ea commodo consequat. Duis aute irure dolor in reprehenderit in voluptate velit esse cillum dolore eu fugiat nulla pariatur. Excepteur sint occaecat cupidatat non proident, sunt in culpa qui officia deserunt mollit anim id est laborum.",
+    "Sed ut perspiciatis unde omnis iste natus error sit voluptatem accusantium doloremque laudantium, totam rem aperiam, eaque ipsa quae ab illo inventore veritatis et quasi architecto beatae vitae dicta sunt explicabo. Nemo enim ipsam voluptatem quia voluptas sit aspernatur aut odit aut fugit, sed quia consequuntur magni dolores eos qui ratione voluptatem sequi nesciunt.",
+    "Neque porro quisquam est, qui dolorem ipsum quia dolor sit amet, consectetur, adipisci velit, sed quia non numquam eius modi tempora incidunt ut labore et dolore magnam aliquam quaerat voluptatem. Ut enim ad minima veniam, quis nostrum exercitationem ullam corporis suscipit laboriosam, nisi ut aliquid ex ea commodi consequatur.",
+    "Quis autem vel eum iure reprehenderit qui in ea voluptate velit esse quam nihil molestiae consequatur, vel illum qui dolorem eum fugiat quo voluptas nulla pariatur. At vero eos et accusamus et iusto odio dignissimos ducimus qui blanditiis praesentium voluptatum deleniti atque corrupti quos dolores et quas molestias excepturi sint occaecati cupiditate non provident.",
+    "Temporibus autem quibusdam et aut officiis debitis aut rerum necessitatibus saepe eveniet ut et voluptates repudiandae sint et molestiae non recusandae. Itaque earum rerum hic tenetur a sapiente delectus, ut aut reiciendis voluptatibus maiores alias consequatur aut perferendis doloribus asperiores repellat."
+]
+
+PLACEHOLDER_WORDS = [
+    "the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "and", "runs", "through",
+    "forest", "mountain", "river", "valley", "ocean", "desert", "city", "village", "town",
+    "beautiful", "amazing", "wonderful", "fantastic", "incredible", "stunning", "gorgeous", "lovely",
+    "large", "small", "tiny", "huge", "massive", "gigantic", "little", "big", "great",
+    "happy", "sad", "excited", "calm", "peaceful", "joyful", "content", "pleased", "delighted",
+    "red", "blue", "green", "yellow", "purple", "orange", "pink", "black", "white", "gray",
+    "cat", "dog", "bird", "fish", "horse", "elephant", "lion", "tiger", "bear", "wolf",
+    "tree", "flower", "grass", "plant", "bush", "leaf", "branch", "root", "seed", "fruit",
+    "sun", "moon", "star", "cloud", "rain", "snow", "wind", "storm", "thunder", "lightning",
+    "book", "pen", "paper", "desk", "chair", "table", "door", "window", "wall", "floor",
+    "music", "song", "dance", "art", "paint", "draw", "write", "read", "sing", "play",
+    "walk", "run", "jump", "swim", "fly", "climb", "crawl", "slide", "roll", "spin",
+    "eat", "drink", "sleep", "wake", "rest", "work", "study", "learn", "teach", "help",
+    "love", "like", "enjoy", "prefer", "want", "need", "have", "get", "give", "take",
+    "see", "look", "watch", "hear", "listen", "feel", "touch", "smell", "taste", "sense",
+    "think", "know", "believe", "understand", "remember", "forget", "learn", "discover", "find", "search"
+]
+
+CAPITALIZED_WORDS = {word: word.capitalize() for word in PLACEHOLDER_WORDS}
+PLACEHOLDER_CHUNK_SIZE = 64 * 1024
+
+def iter_placeholder_text(characters: int, seed: int = None, use_lorem: bool = False, chunk_size: int = PLACEHOLDER_CHUNK_SIZE):
+    """Yield exactly `characters` characters of placeholder text in large chunks
+    
+    Sentences are drawn from the precomputed word tables with a seeded RNG, so
+    the same seed always produces the same text.
+    """
+    remaining = characters
+    if use_lorem:
+        block = '\n\n'.join(LOREM_PARAGRAPHS) + '\n\n'
+        block = block * (chunk_size // len(block) + 1)
+        while remaining > 0:
+            chunk = block[:remaining]
+            remaining -= len(chunk)
+            yield chunk
+        return
+    
+    rng = random.Random(seed)
+    # Average word plus separator is about six characters
+    words_per_chunk = chunk_size // 6 + 1
+    while remaining > 0:
+        words = rng.choices(PLACEHOLDER_WORDS, k=words_per_chunk)
+        start = 0
+        while start < len(words):
+            end = min(start + rng.randint(8, 20), len(words))
+            words[start] = CAPITALIZED_WORDS[words[start]]
+            words[end - 1] += '.'
+            start = end
+        chunk = ' '.join(words) + ' '
+        chunk = chunk[:remaining]
+        remaining -= len(chunk)
+        yield chunk
+
+def generate_lorem_ipsum(paragraphs: int = 3, use_lorem: bool = False, characters: int = None, seed: int = None) -> str:
     """Generate varied placeholder text or traditional Lorem Ipsum
     
     Args:
         paragraphs: Number of paragraphs to generate (if characters is None)
         use_lorem: Use traditional Lorem Ipsum text
         characters: If specified, generate text with approximately this many characters
+        seed: Seed for reproducible random text
     """
-    import random
-    
     # Traditional Lorem Ipsum text
     if use_lorem:
-        lorem_paragraphs = [
-            "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud exercitation ullamco laboris nisi ut aliquip ex ea commodo consequat. Duis aute irure dolor in reprehenderit in voluptate velit esse cillum dolore eu fugiat nulla pariatur. Excepteur sint occaecat cupidatat non proident, sunt in culpa qui officia deserunt mollit anim id est laborum.",
-            "Sed ut perspiciatis unde omnis iste natus error sit voluptatem accusantium doloremque laudantium, totam rem aperiam, eaque ipsa quae ab illo inventore veritatis et quasi architecto beatae vitae dicta sunt explicabo. Nemo enim ipsam voluptatem quia voluptas sit aspernatur aut odit aut fugit, sed quia consequuntur magni dolores eos qui ratione voluptatem sequi nesciunt.",
-            "Neque porro quisquam est, qui dolorem ipsum quia dolor sit amet, consectetur, adipisci velit, sed quia non numquam eius modi tempora incidunt ut labore et dolore magnam aliquam quaerat voluptatem. Ut enim ad minima veniam, quis nostrum exercitationem ullam corporis suscipit laboriosam, nisi ut aliquid ex ea commodi consequatur.",
-            "Quis autem vel eum iure reprehenderit qui in ea voluptate velit esse quam nihil molestiae consequatur, vel illum qui dolorem eum fugiat quo voluptas nulla pariatur. At vero eos et accusamus et iusto odio dignissimos ducimus qui blanditiis praesentium voluptatum deleniti atque corrupti quos dolores et quas molestias excepturi sint occaecati cupiditate non provident.",
-            "Temporibus autem quibusdam et aut officiis debitis aut rerum necessitatibus saepe eveniet ut et voluptates repudiandae sint et molestiae non recusandae. Itaque earum rerum hic tenetur a sapiente delectus, ut aut reiciendis voluptatibus maiores alias consequatur aut perferendis doloribus asperiores repellat."
-        ]
         result = []
         for i in range(paragraphs):
-            result.append(lorem_paragraphs[i % len(lorem_paragraphs)])
+            result.append(LOREM_PARAGRAPHS[i % len(LOREM_PARAGRAPHS)])
         return '\n\n'.join(result)
     
-    # Random text generator
-    words = [
-        "the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "and", "runs", "through",
-        "forest", "mountain", "river", "valley", "ocean", "desert", "city", "village", "town",
-        "beautiful", "amazing", "wonderful", "fantastic", "incredible", "stunning", "gorgeous", "lovely",
-        "large", "small", "tiny", "huge", "massive", "gigantic", "little", "big", "great",
-        "happy", "sad", "excited", "calm", "peaceful", "joyful", "content", "pleased", "delighted",
-        "red", "blue", "green", "yellow", "purple", "orange", "pink", "black", "white", "gray",
-        "cat", "dog", "bird", "fish", "horse", "elephant", "lion", "tiger", "bear", "wolf",
-        "tree", "flower", "grass", "plant", "bush", "leaf", "branch", "root", "seed", "fruit",
-        "sun", "moon", "star", "cloud", "rain", "snow", "wind", "storm", "thunder", "lightning",
-        "book", "pen", "paper", "desk", "chair", "table", "door", "window", "wall", "floor",
-        "music", "song", "dance", "art", "paint", "draw", "write", "read", "sing", "play",
-        "walk", "run", "jump", "swim", "fly", "climb", "crawl", "slide", "roll", "spin",
-        "eat", "drink", "sleep", "wake", "rest", "work", "study", "learn", "teach", "help",
-        "love", "like", "enjoy", "prefer", "want", "need", "have", "get", "give", "take",
-        "see", "look", "watch", "hear", "listen", "feel", "touch", "smell", "taste", "sense",
-        "think", "know", "believe", "understand", "remember", "forget", "learn", "discover", "find", "search"
-    ]
+    # Character-based generation
+    if characters is not None and characters > 0:
+        return ''.join(iter_placeholder_text(characters, seed)).rstrip()
+    
+    # Paragraph-based generation
+    rng = random.Random(seed)
     
     def generate_sentence():
         """Generate a random sentence"""
-        length = random.randint(8, 20)
-        sentence_words = [random.choice(words) for _ in range(length)]
-        sentence_words[0] = sentence_words[0].capitalize()
+        sentence_words = rng.choices(PLACEHOLDER_WORDS, k=rng.randint(8, 20))
+        sentence_words[0] = CAPITALIZED_WORDS[sentence_words[0]]
         return ' '.join(sentence_words) + '.'
     
     def generate_paragraph():
         """Generate a random paragraph"""
-        num_sentences = random.randint(4, 8)
+        num_sentences = rng.randint(4, 8)
         sentences = [generate_sentence() for _ in range(num_sentences)]
         return ' '.join(sentences)
     
-    # Character-based generation
-    if characters is not None and characters > 0:
-        result_text = ""
-        while len(result_text) < characters:
-            result_text += generate_sentence() + " "
-        # Trim to requested length but don't cut mid-word
-        if len(result_text) > characters:
-            result_text = result_text[:characters].rstrip()
-        return result_text
-    
-    # Paragraph-based generation
     result = []
     for _ in range(paragraphs):
         result.append(generate_paragraph())
     
     return '\n\n'.join(result)
+
+# Streaming functions (operate on iterables of byte chunks)
+STREAM_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+def iter_file_chunks(fileobj, chunk_size: int = STREAM_CHUNK_SIZE):
+    """Yield a file-like object's content in fixed-size chunks"""
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+def hash_stream(chunks, algorithm: str) -> str:
+    """Hash byte chunks incrementally"""
+    digest = HASH_ALGORITHMS[algorithm]()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def hmac_stream(chunks, secret: str, algorithm: str) -> str:
+    """Compute an HMAC over byte chunks incrementally"""
+    mac = get_hmac_context(secret, algorithm)
+    for chunk in chunks:
+        mac.update(chunk)
+    return mac.hexdigest()
+
+# Shared by every multi-digest request, so concurrent uploads cannot spawn
+# threads without limit; hashlib releases the GIL for large updates
+DIGEST_WORKERS = min(8, os.cpu_count() or 1)
+_digest_executor = ThreadPoolExecutor(max_workers=DIGEST_WORKERS, thread_name_prefix="digest")
+
+def multi_digest_stream(chunks, algorithms: list, hmac_algorithms: list = None, secret: str = None, parallel: bool = False) -> dict:
+    """Compute several digests and HMACs in a single pass over byte chunks
+    
+    With parallel=True each chunk is fed to the hashers on the shared digest
+    executor, so the digests of one chunk run concurrently.
+    """
+    hmac_algorithms = hmac_algorithms or []
+    for algorithm in list(algorithms) + list(hmac_algorithms):
+        if algorithm not in HASH_ALGORITHMS:
+            raise ValueError(f"Unsupported hash algorithm: {algorithm}")
+    if hmac_algorithms and not secret:
+        raise ValueError("Secret key is required for HMAC")
+    
+    hashers = {algorithm: HASH_ALGORITHMS[algorithm]() for algorithm in algorithms}
+    for algorithm in hmac_algorithms:
+        hashers[f"hmac-{algorithm}"] = get_hmac_context(secret, algorithm)
+    if not hashers:
+        raise ValueError("At least one algorithm is required")
+    
+    if parallel and len(hashers) > 1 and DIGEST_WORKERS > 1:
+        for chunk in chunks:
+            list(_digest_executor.map(lambda hasher: hasher.update(chunk), hashers.values()))
+    else:
+        for chunk in chunks:
+            for hasher in hashers.values():
+                hasher.update(chunk)
+    
+    return {name: hasher.hexdigest() for name, hasher in hashers.items()}
+
+def _aligned_stream(chunks, codec, block: int, strip_whitespace: bool = False):
+    """Apply a block codec to byte chunks, carrying partial blocks forward"""
+    pending = b''
+    for chunk in chunks:
+        if strip_whitespace:
+            chunk = chunk.translate(None, b' \t\r\n')
+        pending += chunk
+        usable = len(pending) - len(pending) % block
+        if usable:
+            yield codec(pending[:usable])
+            pending = pending[usable:]
+    if pending:
+        yield codec(pending)
+
+def base64_encode_stream(chunks, urlsafe: bool = False):
+    """Base64 encode byte chunks (3-byte aligned)"""
+    codec = base64.urlsafe_b64encode if urlsafe else base64.b64encode
+    return _aligned_stream(chunks, codec, 3)
+
+def base64_decode_stream(chunks, urlsafe: bool = False):
+    """Base64 decode byte chunks (4-character aligned, whitespace ignored)"""
+    codec = base64.urlsafe_b64decode if urlsafe else base64.b64decode
+    return _aligned_stream(chunks, codec, 4, strip_whitespace=True)
+
+def base32_encode_stream(chunks):
+    """Base32 encode byte chunks (5-byte aligned)"""
+    return _aligned_stream(chunks, base64.b32encode, 5)
+
+def base32_decode_stream(chunks):
+    """Base32 decode byte chunks (8-character aligned, whitespace ignored)"""
+    return _aligned_stream(chunks, base64.b32decode, 8, strip_whitespace=True)
+
+# Compressed codecs (compress, then encode as text)
+COMPRESSION_METHODS = ('zlib', 'gzip', 'lzma')
+DECOMPRESS_CHUNK_SIZE = 1024 * 1024  # most output produced by one decompress call
+MAX_DECOMPRESSED_BYTES = 64 * 1024 * 1024  # in-memory decode results
+MAX_STREAM_DECOMPRESSED_BYTES = 1024 * 1024 * 1024  # streamed file decodes
+
+# encoding: (encoder, decoder, raw block size, encoded block size)
+BINARY_TEXT_ENCODINGS = {
+    'base64': (base64.b64encode, base64.b64decode, 3, 4),
+    'url-base64': (base64.urlsafe_b64encode, base64.urlsafe_b64decode, 3, 4),
+    'base85': (base64.b85encode, base64.b85decode, 4, 5),
+}
+
+COMPRESSED_CODECS = {
+    f"{method}-{encoding}": (method, encoding)
+    for method in COMPRESSION_METHODS
+    for encoding in BINARY_TEXT_ENCODINGS
+}
+
+def _compressor(method: str, level: int = None):
+    """Create an incremental compressor for a compression method"""
+    if level is not None and not 0 <= level <= 9:
+        raise ValueError("Compression level must be between 0 and 9")
+    if method == 'zlib':
+        return zlib.compressobj(-1 if level is None else level)
+    if method == 'gzip':
+        return zlib.compressobj(9 if level is None else level, zlib.DEFLATED, 31)
+    if method == 'lzma':
+        return lzma.LZMACompressor(preset=6 if level is None else level)
+    raise ValueError(f"Unsupported compression method: {method}")
+
+def _decompressor(method: str):
+    """Create an incremental decompressor for a compression method"""
+    if method == 'zlib':
+        return zlib.decompressobj()
+    if method == 'gzip':
+        return zlib.decompressobj(31)
+    if method == 'lzma':
+        return lzma.LZMADecompressor()
+    raise ValueError(f"Unsupported compression method: {method}")
+
+def compress_bytes(data: bytes, method: str, level: int = None) -> bytes:
+    """Compress bytes with zlib, gzip or lzma"""
+    compressor = _compressor(method, level)
+    return compressor.compress(data) + compressor.flush()
+
+class DecompressionLimitError(ValueError):
+    """Raised when compressed input expands past MAX_DECOMPRESSED_BYTES"""
+
+def _iter_decompressed(chunks, method: str, max_output: int):
+    """Decompress byte chunks, yielding at most DECOMPRESS_CHUNK_SIZE bytes at a time
+
+    Output is produced with max_length and the rest of the input resumed from
+    unconsumed_tail (or needs_input for lzma), so a small, highly compressed
+    payload is stopped once it passes max_output instead of being expanded
+    in memory all at once.
+    """
+    decompressor = _decompressor(method)
+    produced = 0
+    for data in chunks:
+        while not decompressor.eof:
+            output = decompressor.decompress(data, DECOMPRESS_CHUNK_SIZE)
+            if output:
+                produced += len(output)
+                if produced > max_output:
+                    raise DecompressionLimitError(f"Decompressed data exceeds the {max_output // (1024 * 1024)} MB limit")
+                yield output
+            if method == 'lzma':
+                if decompressor.needs_input:
+                    break
+                data = b''
+            else:
+                data = decompressor.unconsumed_tail
+                if not data and len(output) < DECOMPRESS_CHUNK_SIZE:
+                    break
+    if not decompressor.eof:
+        raise ValueError("Compressed data is truncated")
+
+def decompress_bytes(data: bytes, method: str, max_output: int = None) -> bytes:
+    """Decompress zlib, gzip or lzma bytes, up to max_output bytes of output"""
+    return b''.join(_iter_decompressed([data], method, max_output or MAX_DECOMPRESSED_BYTES))
+
+def compressed_encode_bytes(data: bytes, codec: str, level: int = None) -> bytes:
+    """Compress bytes, then encode them as Base64/URL-Base64/Base85"""
+    method, encoding = COMPRESSED_CODECS[codec]
+    return BINARY_TEXT_ENCODINGS[encoding][0](compress_bytes(data, method, level))
+
+def compressed_decode_bytes(data: bytes, codec: str) -> bytes:
+    """Decode Base64/URL-Base64/Base85 text, then decompress it"""
+    method, encoding = COMPRESSED_CODECS[codec]
+    decoded = BINARY_TEXT_ENCODINGS[encoding][1](data.translate(None, b' \t\r\n'))
+    return decompress_bytes(decoded, method)
+
+def compressed_encode_stream(chunks, codec: str, level: int = None):
+    """Compress and encode byte chunks incrementally"""
+    method, encoding = COMPRESSED_CODECS[codec]
+    encoder, _, block, _ = BINARY_TEXT_ENCODINGS[encoding]
+    compressor = _compressor(method, level)
+    
+    def compressed():
+        for chunk in chunks:
+            output = compressor.compress(chunk)
+            if output:
+                yield output
+        yield compressor.flush()
+    
+    return _aligned_stream(compressed(), encoder, block)
+
+def compressed_decode_stream(chunks, codec: str):
+    """Decode and decompress byte chunks incrementally"""
+    method, encoding = COMPRESSED_CODECS[codec]
+    _, decoder, _, block = BINARY_TEXT_ENCODINGS[encoding]
+    decoded = _aligned_stream(chunks, decoder, block, strip_whitespace=True)
+    yield from _iter_decompressed(decoded, method, MAX_STREAM_DECOMPRESSED_BYTES)
+
+# Operation registry (keyed by encoder endpoint path)
+ENCODER_OPERATIONS = {
+    'base32/encode': base32_encode,
+    'base32/decode': base32_decode,
+    'base64/encode': base64_encode,
+    'base64/decode': base64_decode,
+    'url-base64/encode': url_base64_encode,
+    'url-base64/decode': url_base64_decode,
+    'mime-base64/encode': mime_base64_encode,
+    'mime-base64/decode': mime_base64_decode,
+    'url/encode': url_encode,
+    'url/decode': url_decode,
+    'html/encode': html_encode,
+    'html/decode': html_decode,
+    'unicode/escape': unicode_escape,
+    'unicode/unescape': unicode_unescape,
+    'hash/md5': hash_md5,
+    'hash/sha1': hash_sha1,
+    'hash/sha256': hash_sha256,
+    'hash/sha512': hash_sha512,
+    'json/minify': minify_json,
+    'text/upper': text_upper,
+    'text/lower': text_lower,
+    'text/title': text_title,
+    'text/reverse': text_reverse,
+    'text/sort': text_sort_lines,
+}
+
+HMAC_OPERATIONS = {
+    'hmac/md5': hmac_md5,
+    'hmac/sha1': hmac_sha1,
+    'hmac/sha256': hmac_sha256,
+    'hmac/sha512': hmac_sha512,
+}
+
+def resolve_operation(operation: str, secret: str = None, algorithm: str = 'HS256', indent: int = None, level: int = None, reverse: bool = False):
+    """Resolve an encoder operation name to a single-argument callable
+    
+    Raises ValueError for unknown operations or missing secrets so a chain
+    can be validated once before it is applied to many inputs.
+    """
+    operation = operation.strip().strip('/')
+    if operation == 'text/sort' and reverse:
+        return lambda text: text_sort_lines(text, reverse=True)
+    if operation in ENCODER_OPERATIONS:
+        return ENCODER_OPERATIONS[operation]
+    if operation == 'json/format':
+        json_indent = indent if indent is not None else 2
+        return lambda text: format_json(text, json_indent)
+    codec, _, direction = operation.partition('/')
+    if codec in COMPRESSED_CODECS and direction == 'encode':
+        return lambda text: compressed_encode_bytes(text.encode(), codec, level).decode('ascii')
+    if codec in COMPRESSED_CODECS and direction == 'decode':
+        return lambda text: compressed_decode_bytes(text.encode(), codec).decode()
+    if operation in HMAC_OPERATIONS:
+        if not secret:
+            raise ValueError("Secret key is required for HMAC")
+        func = HMAC_OPERATIONS[operation]
+        return lambda text: func(text, secret)
+    if operation == 'jwt/encode':
+        if not secret:
+            raise ValueError("Secret key is required for JWT encoding")
+        return lambda text: jwt_encode(json_codec.loads(text), secret, algorithm)
+    if operation == 'jwt/decode':
+        if not secret:
+            raise ValueError("Secret key is required for JWT decoding")
+        return lambda text: json_codec.dumps(jwt_decode(text, secret, algorithm), indent=2, ensure_ascii=True)
+    raise ValueError(f"Unknown operation: {operation}")
+
+OPERATION_NAMES = (
+    set(ENCODER_OPERATIONS) | set(HMAC_OPERATIONS) | {'json/format', 'jwt/encode', 'jwt/decode'}
+    | {f"{codec}/{direction}" for codec in COMPRESSED_CODECS for direction in ('encode', 'decode')}
+)
+
+def resolve_operation_chain(operations: list, secret: str = None, algorithm: str = 'HS256', indent: int = None, level: int = None) -> list:
+    """Resolve an ordered list of operation names to callables"""
+    if not operations:
+        raise ValueError("At least one operation is required")
+    return [resolve_operation(op, secret, algorithm, indent, level) for op in operations]
+
+def apply_operation_chain(text: str, chain: list) -> str:
+    """Apply resolved operations to text in order"""
+    for func in chain:
+        text = func(text)
+    return text
+
+# Bytes-level operations (raw request/response bodies, no UTF-8 round trip)
+def _hash_bytes(algorithm: str):
+    return lambda data: HASH_ALGORITHMS[algorithm](data).hexdigest().encode()
+
+def _text_operation(func):
+    """Adapt a str -> str operation to bytes -> bytes"""
+    return lambda data: func(data.decode()).encode()
+
+def _mime_base64_encode_bytes(data: bytes) -> bytes:
+    return base64.encodebytes(data).rstrip(b'\n')
+
+def _mime_base64_decode_bytes(data: bytes) -> bytes:
+    return base64.b64decode(data.replace(b'\n', b'').replace(b'\r', b''))
+
+BYTES_OPERATIONS = {
+    'base32/encode': base64.b32encode,
+    'base32/decode': base64.b32decode,
+    'base64/encode': base64.b64encode,
+    'base64/decode': base64.b64decode,
+    'url-base64/encode': base64.urlsafe_b64encode,
+    'url-base64/decode': base64.urlsafe_b64decode,
+    'mime-base64/encode': _mime_base64_encode_bytes,
+    'mime-base64/decode': _mime_base64_decode_bytes,
+    'url/encode': lambda data: urllib.parse.quote_from_bytes(data).encode(),
+    'url/decode': urllib.parse.unquote_to_bytes,
+    'hash/md5': _hash_bytes('md5'),
+    'hash/sha1': _hash_bytes('sha1'),
+    'hash/sha256': _hash_bytes('sha256'),
+    'hash/sha512': _hash_bytes('sha512'),
+}
+
+def resolve_bytes_operation(operation: str, secret: str = None, algorithm: str = 'HS256', indent: int = None, level: int = None, reverse: bool = False):
+    """Resolve an encoder operation name to a bytes -> bytes callable"""
+    operation = operation.strip().strip('/')
+    if operation in BYTES_OPERATIONS:
+        return BYTES_OPERATIONS[operation]
+    codec, _, direction = operation.partition('/')
+    if codec in COMPRESSED_CODECS and direction == 'encode':
+        return lambda data: compressed_encode_bytes(data, codec, level)
+    if codec in COMPRESSED_CODECS and direction == 'decode':
+        return lambda data: compressed_decode_bytes(data, codec)
+    if operation in HMAC_OPERATIONS:
+        if not secret:
+            raise ValueError("Secret key is required for HMAC")
+        digest = operation.split('/', 1)[1]
+        def hmac_bytes(data: bytes) -> bytes:
+            mac = get_hmac_context(secret, digest)
+            mac.update(data)
+            return mac.hexdigest().encode()
+        return hmac_bytes
+    return _text_operation(resolve_operation(operation, secret, algorithm, indent, level, reverse))
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+class ExecutorBusy(RuntimeError):
+    """Raised when a bounded executor already has its maximum number of pending calls"""
+
+class BoundedExecutor:
+    """Thread pool for blocking CPU work called from async code, with a bounded queue
+
+    At most max_pending calls are accepted at once (running plus queued);
+    beyond that run() fails fast with ExecutorBusy, so a burst against one
+    endpoint cannot queue without limit or starve other requests. Queue wait
+    and run times are tracked for monitoring.
+    """
+
+    def __init__(self, name: str, workers: int, max_pending: int):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    async def run(self, function: Callable, *args) -> Any:
+        """Run function(*args) on the pool and await its result"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise ExecutorBusy(f"{self.name} executor is at capacity ({self.max_pending} pending calls)")
+            self._pending += 1
+        submitted = time.monotonic()
+        future = self._executor.submit(self._call, submitted, function, args)
+        # Also fires if the call is cancelled before it starts
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _call(self, submitted: float, function: Callable, args: tuple) -> Any:
+        started = time.monotonic()
+        with self._lock:
+            waited = started - submitted
+            self._wait_seconds += waited
+            self._max_wait_seconds = max(self._max_wait_seconds, waited)
+            self._running += 1
+        try:
+            return function(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._run_seconds += time.monotonic() - started
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def stats(self) -> dict:
+        """Current queue depth and timing totals, for monitoring"""
+        with self._lock:
+            completed = self._completed
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": self._wait_seconds / completed * 1000 if completed else 0.0,
+                "max_wait_ms": self._max_wait_seconds * 1000,
+                "avg_run_ms": self._run_seconds / completed * 1000 if completed else 0.0,
+            }
@@ -5,6 +5,7 @@ import time
 import asyncio
 from typing import List
 from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime, timedelta
 
 TEMP_DIR = "temp"
@@ -21,14 +22,17 @@ def generate_unique_filename(original_filename: str) -> str:
     ext = os.path.splitext(original_filename)[1]
     return f"{uuid.uuid4()}{ext}"
 
+def _copy_to_file(source, file_path: str):
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(source, buffer)
+
 async def save_upload_file(upload_file: UploadFile, directory: str = UPLOAD_DIR) -> str:
-    """Save uploaded file to disk"""
+    """Save uploaded file to disk (the copy runs in the threadpool, off the event loop)"""
     ensure_directories()
     filename = generate_unique_filename(upload_file.filename)
     file_path = os.path.join(directory, filename)
     
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(upload_file.file, buffer)
+    await run_in_threadpool(_copy_to_file, upload_file.file, file_path)
     
     return file_path
 
@@ -0,0 +1,58 @@
+import json
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional accelerated backend
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+JSONDecodeError = json.JSONDecodeError
+
+class NonFiniteFloat(float):
+    """NaN/Infinity parsed from a document
+
+    orjson refuses float subclasses, so these values route serialisation
+    through the stdlib, which writes them back as NaN/Infinity instead of null.
+    """
+
+def loads(text: Union[str, bytes]) -> Any:
+    """Parse JSON text with the stdlib parser
+
+    Parsing stays on the stdlib: orjson is not faster at building Python
+    objects and silently turns integers beyond 64 bits into floats.
+    """
+    return json.loads(text, parse_constant=NonFiniteFloat)
+
+def _stdlib_dumps(data: Any, indent: Optional[int], ensure_ascii: bool, sort_keys: bool) -> str:
+    if indent is None:
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=ensure_ascii, sort_keys=sort_keys)
+    return json.dumps(data, indent=indent, ensure_ascii=ensure_ascii, sort_keys=sort_keys)
+
+def dumps(data: Any, indent: Optional[int] = None, ensure_ascii: bool = False, sort_keys: bool = False) -> str:
+    """Serialise data to JSON text
+
+    indent=None produces minified output (no spaces after separators), an
+    integer indent matches json.dumps(indent=...). The accelerated backend is
+    used for the layouts it supports; anything it cannot encode identically
+    (non-string keys, integers beyond 64 bits, NaN from loads, unsupported
+    types) goes through the stdlib. Floats in exponent form may be spelled
+    differently (1e16 vs 1e+16) but always round-trip to the same value.
+    """
+    if orjson is not None and indent in (None, 2):
+        option = orjson.OPT_INDENT_2 if indent == 2 else 0
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            output = orjson.dumps(data, option=option)
+        except orjson.JSONEncodeError:
+            output = None
+        # orjson never escapes non-ASCII; ASCII-only output is identical either way
+        if output is not None and (not ensure_ascii or output.isascii()):
+            return output.decode('utf-8')
+    return _stdlib_dumps(data, indent, ensure_ascii, sort_keys)
+
+def reformat(text: Union[str, bytes], indent: Optional[int] = None, sort_keys: bool = False) -> str:
+    """Parse and re-serialise a JSON document (pretty-print or minify)"""
+    return dumps(loads(text), indent=indent, sort_keys=sort_keys)
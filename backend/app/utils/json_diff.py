@@ -0,0 +1,167 @@
+from collections import Counter
+from typing import Any, Dict, Iterator, List
+
+from app.utils.json_patch import format_pointer
+
+class SubtreeIds:
+    """Exact structural identities of JSON values, memoised per node
+
+    Scalars are identified by (type, value), which keeps true apart from 1
+    and 1 apart from 1.0. Containers are interned: an object becomes the set
+    of its (key, child id) pairs and an array the tuple of its child ids, and
+    each distinct shape gets a small integer. Interning looks shapes up by
+    equality, so two subtrees share an id only when they are equal; a hash
+    collision cannot hide a change. The first lookup of a container interns
+    its whole subtree bottom-up in one pass without recursion, so later
+    lookups of any branch are O(1). Nodes must stay alive while the ids are
+    in use, which holds during a diff.
+    """
+
+    def __init__(self):
+        self._node_ids: Dict[int, int] = {}
+        self._shapes: Dict[Any, int] = {}
+
+    def __call__(self, value: Any) -> Any:
+        kind = type(value)
+        if kind is dict or kind is list:
+            node_id = self._node_ids.get(id(value))
+            return node_id if node_id is not None else self._intern_subtree(value)
+        return (kind, value)
+
+    def _intern_subtree(self, root: Any) -> int:
+        node_ids = self._node_ids
+        # Post-order walk: a container is interned after all of its children
+        stack = [(root, False)]
+        while stack:
+            value, children_done = stack.pop()
+            if id(value) in node_ids:
+                continue
+            if not children_done:
+                stack.append((value, True))
+                for child in (value.values() if type(value) is dict else value):
+                    kind = type(child)
+                    if (kind is dict or kind is list) and id(child) not in node_ids:
+                        stack.append((child, False))
+                continue
+            shape = self._shape(value)
+            node_ids[id(value)] = self._shapes.setdefault(shape, len(self._shapes))
+        return node_ids[id(root)]
+
+    def _shape(self, value: Any) -> tuple:
+        node_ids = self._node_ids
+        parts = []
+        if type(value) is dict:
+            for name, child in value.items():
+                kind = type(child)
+                parts.append((name, node_ids[id(child)]) if kind is dict or kind is list else (name, kind, child))
+            return (dict, frozenset(parts))
+        for child in value:
+            kind = type(child)
+            parts.append(node_ids[id(child)] if kind is dict or kind is list else (kind, child))
+        return (list, tuple(parts))
+
+def _diff_value(source: Any, target: Any, path: list, operations: list, ids: SubtreeIds) -> Iterator[tuple]:
+    """Emit the operations for one pair of values
+
+    Nested pairs are yielded as (source, target, path) for diff_json to
+    process in place, which keeps operations in order without recursion.
+    """
+    if ids(source) == ids(target):
+        return
+    if type(source) is dict and type(target) is dict:
+        for name in source:
+            if name not in target:
+                operations.append({"op": "remove", "path": format_pointer(path + [name])})
+        for name, value in target.items():
+            if name in source:
+                yield source[name], value, path + [name]
+            else:
+                operations.append({"op": "add", "path": format_pointer(path + [name]), "value": value})
+    elif type(source) is list and type(target) is list:
+        yield from _diff_array(source, target, path, operations, ids)
+    else:
+        operations.append({"op": "replace", "path": format_pointer(path), "value": target})
+
+def _diff_array(source: list, target: list, path: list, operations: list, ids: SubtreeIds) -> Iterator[tuple]:
+    """Turn source into target with moves, removes, adds and nested edits
+
+    The operations are simulated on a working copy so every index refers to
+    the array as it is when that operation is applied.
+    """
+    source_ids = [ids(value) for value in source]
+    target_ids = [ids(value) for value in target]
+
+    # Unchanged leading and trailing elements need no work
+    start = 0
+    while start < len(source) and start < len(target) and source_ids[start] == target_ids[start]:
+        start += 1
+    end_source, end_target = len(source), len(target)
+    while end_source > start and end_target > start and source_ids[end_source - 1] == target_ids[end_target - 1]:
+        end_source -= 1
+        end_target -= 1
+
+    values = source[start:end_source]
+    current = source_ids[start:end_source]
+    wanted = target_ids[start:end_target]
+    available = Counter(current)
+    needed = Counter(wanted)
+
+    i = 0
+    while i < len(wanted):
+        want = wanted[i]
+        have = current[i] if i < len(current) else None
+        if have == want:
+            available[want] -= 1
+            needed[want] -= 1
+            i += 1
+            continue
+        if have is not None and needed[have] <= 0:
+            if available[want] > 0:
+                # The element here is not wanted anywhere; drop it and retry this slot
+                operations.append({"op": "remove", "path": format_pointer(path + [start + i])})
+                available[have] -= 1
+                del current[i], values[i]
+                continue
+            # Neither is reusable: edit this element into the wanted one
+            yield values[i], target[start + i], path + [start + i]
+            available[have] -= 1
+            current[i], values[i] = want, target[start + i]
+        elif available[want] > 0:
+            # The wanted element exists further along: move it here
+            j = current.index(want, i + 1)
+            operations.append({
+                "op": "move",
+                "from": format_pointer(path + [start + j]),
+                "path": format_pointer(path + [start + i]),
+            })
+            current.insert(i, current.pop(j))
+            values.insert(i, values.pop(j))
+            available[want] -= 1
+        else:
+            operations.append({"op": "add", "path": format_pointer(path + [start + i]), "value": target[start + i]})
+            current.insert(i, want)
+            values.insert(i, target[start + i])
+        needed[want] -= 1
+        i += 1
+
+    # Whatever is left over was removed
+    for _ in range(len(current) - len(wanted)):
+        operations.append({"op": "remove", "path": format_pointer(path + [start + len(wanted)])})
+
+def diff_json(source: Any, target: Any) -> List[dict]:
+    """Compute an RFC 6902 JSON Patch that turns source into target
+
+    Equal subtrees are skipped, and array elements that only changed
+    position become move operations. Nesting depth is limited only by
+    memory: nested pairs are worked through with an explicit stack.
+    """
+    operations = []
+    ids = SubtreeIds()
+    stack = [_diff_value(source, target, [], operations, ids)]
+    while stack:
+        pair = next(stack[-1], None)
+        if pair is None:
+            stack.pop()
+        else:
+            stack.append(_diff_value(*pair, operations, ids))
+    return operations
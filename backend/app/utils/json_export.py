@@ -0,0 +1,188 @@
+import csv
+import io
+import itertools
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from app.utils import json_codec
+from app.utils.json_stream import iter_batches
+
+EXPORT_BATCH_SIZE = 5000  # rows converted and written at a time
+EXPORT_FORMATS = ('csv', 'parquet')
+KEY_UNIONS = ('all', 'batch')  # union of keys over every row, or over the first batch only
+COLUMN_ORDERS = ('first_seen', 'sorted')
+
+def flatten_record(record: Any) -> dict:
+    """Flatten nested objects into dotted column names; arrays stay whole in one cell
+
+    Rows that are not objects become a single "value" column.
+    """
+    if type(record) is not dict:
+        return {'value': record}
+    row = {}
+    _flatten_into(record, '', row)
+    return row
+
+def _flatten_into(record: dict, prefix: str, row: dict):
+    for key, value in record.items():
+        name = prefix + key
+        if type(value) is dict and value:
+            _flatten_into(value, name + '.', row)
+        else:
+            row[name] = value
+
+_KINDS = {bool: 'bool', int: 'int', float: 'float', str: 'string'}
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+class ColumnSet:
+    """Column names in first-seen order, with the kinds of value seen in each"""
+
+    def __init__(self):
+        self.kinds = {}
+
+    def add(self, rows: List[dict]):
+        kinds = self.kinds
+        for row in rows:
+            for name, value in row.items():
+                seen = kinds.get(name)
+                if seen is None:
+                    seen = kinds[name] = set()
+                if value is not None:
+                    kind = _KINDS.get(type(value), 'json')
+                    if kind == 'int' and not _INT64_MIN <= value <= _INT64_MAX:
+                        kind = 'json'  # kept exact as text
+                    seen.add(kind)
+
+    def names(self, order: str = 'first_seen') -> List[str]:
+        return sorted(self.kinds) if order == 'sorted' else list(self.kinds)
+
+    def arrow_type(self, name: str):
+        """Narrowest Arrow type holding every value seen (mixed columns become strings)"""
+        kinds = self.kinds.get(name) or {'string'}
+        if kinds == {'int'}:
+            return pa.int64()
+        if kinds <= {'int', 'float'}:
+            return pa.float64()
+        if kinds == {'bool'}:
+            return pa.bool_()
+        return pa.string()
+
+def csv_cell(value: Any) -> Any:
+    """CSV text for a flattened value: JSON spelling for literals, JSON text for arrays"""
+    if value is None:
+        return ''
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if type(value) is list or type(value) is dict:
+        return json_codec.dumps(value)
+    return value
+
+def _arrow_cell(value: Any, kind) -> Any:
+    if value is None or not pa.types.is_string(kind):
+        return value
+    if type(value) is str:
+        return value
+    return json_codec.dumps(value)
+
+def _iter_csv(batches: Iterator[List[dict]], names: List[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if names:
+        writer.writerow(names)
+    for batch in batches:
+        writer.writerows([[csv_cell(row.get(name)) for name in names] for row in batch])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+class _ChunkSink:
+    """Write target that hands written bytes back out as stream chunks"""
+
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def _iter_parquet(batches: Iterator[List[dict]], names: List[str], columns: ColumnSet) -> Iterator[bytes]:
+    """Write one Parquet row group per batch, yielding the file as it grows"""
+    schema = pa.schema([(name, columns.arrow_type(name)) for name in names])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for batch in batches:
+            arrays = [
+                pa.array([_arrow_cell(row.get(field.name), field.type) for row in batch], type=field.type)
+                for field in schema
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+def export_records(
+    open_records: Callable[[], Iterable[Any]],
+    format: str = 'csv',
+    columns: Optional[List[str]] = None,
+    key_union: str = 'all',
+    column_order: str = 'first_seen',
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[bytes]:
+    """Export records as CSV or Parquet, streamed a batch of rows at a time
+
+    open_records returns a fresh iterator over the records, since finding the
+    union of keys over every row (key_union='all') takes a first pass that
+    only keeps the column names. key_union='batch' takes the columns from the
+    first batch and ignores keys that only appear later. Parquet needs every
+    column's type up front, so it always scans all rows first. Explicit
+    columns pick and order the output columns.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{format}', expected one of: {', '.join(EXPORT_FORMATS)}")
+    if key_union not in KEY_UNIONS:
+        raise ValueError(f"Unknown key_union '{key_union}', expected one of: {', '.join(KEY_UNIONS)}")
+    if column_order not in COLUMN_ORDERS:
+        raise ValueError(f"Unknown column_order '{column_order}', expected one of: {', '.join(COLUMN_ORDERS)}")
+    if format == 'parquet' and pa is None:
+        raise ValueError("Parquet export needs pyarrow to be installed")
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+
+    column_set = ColumnSet()
+    batches = iter_batches(map(flatten_record, open_records()), batch_size)
+    if key_union == 'all' or format == 'parquet':
+        for batch in batches:
+            column_set.add(batch)
+        batches = iter_batches(map(flatten_record, open_records()), batch_size)
+    elif not columns:
+        first = next(batches, [])
+        column_set.add(first)
+        batches = itertools.chain([first], batches)
+    names = list(columns) if columns else column_set.names(column_order)
+
+    if format == 'parquet':
+        return _iter_parquet(batches, names, column_set)
+    return _iter_csv(batches, names)
@@ -0,0 +1,210 @@
+import copy
+from typing import Any, List
+
+class JSONPatchError(ValueError):
+    """Raised when a JSON Patch operation cannot be applied"""
+
+# JSON Pointers (RFC 6901)
+def parse_pointer(pointer: str) -> List[str]:
+    """Split a JSON Pointer into unescaped reference tokens"""
+    if pointer == '':
+        return []
+    if not pointer.startswith('/'):
+        raise JSONPatchError(f"Invalid JSON pointer '{pointer}': must be empty or start with '/'")
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+def format_pointer(tokens) -> str:
+    """Build a JSON Pointer from path tokens (strings or list indexes)"""
+    return ''.join('/' + str(token).replace('~', '~0').replace('/', '~1') for token in tokens)
+
+def _list_index(container: list, token: str, pointer: str, allow_end: bool = False) -> int:
+    if allow_end and token == '-':
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith('0')):
+        raise JSONPatchError(f"Invalid array index '{token}' in '{pointer}'")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JSONPatchError(f"Array index {index} out of range in '{pointer}'")
+    return index
+
+def resolve_pointer(document: Any, pointer: str) -> Any:
+    """Return the value a JSON Pointer refers to"""
+    node = document
+    for token in parse_pointer(pointer):
+        if isinstance(node, dict):
+            if token not in node:
+                raise JSONPatchError(f"Path '{pointer}' does not exist")
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_list_index(node, token, pointer)]
+        else:
+            raise JSONPatchError(f"Path '{pointer}' does not exist")
+    return node
+
+def _resolve_parent(document: Any, pointer: str) -> tuple:
+    """Return (container, last token) for a non-root pointer"""
+    tokens = parse_pointer(pointer)
+    parent = resolve_pointer(document, format_pointer(tokens[:-1]))
+    if not isinstance(parent, (dict, list)):
+        raise JSONPatchError(f"Parent of '{pointer}' is not an object or array")
+    return parent, tokens[-1]
+
+def json_equal(left: Any, right: Any) -> bool:
+    """JSON value equality (unlike ==, true is not equal to 1)"""
+    if isinstance(left, bool) or isinstance(right, bool):
+        return type(left) is type(right) and left == right
+    if isinstance(left, dict) and isinstance(right, dict):
+        return left.keys() == right.keys() and all(json_equal(left[key], right[key]) for key in left)
+    if isinstance(left, list) and isinstance(right, list):
+        return len(left) == len(right) and all(json_equal(a, b) for a, b in zip(left, right))
+    if isinstance(left, (dict, list)) or isinstance(right, (dict, list)):
+        return False
+    return left == right
+
+# Primitive edits, each recording how to undo itself
+def _add(document: Any, pointer: str, value: Any, undo: list) -> Any:
+    if pointer == '':
+        undo.append(('root', document))
+        return value
+    parent, token = _resolve_parent(document, pointer)
+    if isinstance(parent, list):
+        index = _list_index(parent, token, pointer, allow_end=True)
+        parent.insert(index, value)
+        undo.append(('pop', parent, index))
+    else:
+        undo.append(('set', parent, token, parent[token]) if token in parent else ('delete', parent, token))
+        parent[token] = value
+    return document
+
+def _remove(document: Any, pointer: str, undo: list) -> tuple:
+    """Remove the value at pointer, returning (document, removed value)"""
+    if pointer == '':
+        raise JSONPatchError("Cannot remove the document root")
+    parent, token = _resolve_parent(document, pointer)
+    if isinstance(parent, list):
+        index = _list_index(parent, token, pointer)
+        value = parent.pop(index)
+        undo.append(('insert', parent, index, value))
+    else:
+        if token not in parent:
+            raise JSONPatchError(f"Path '{pointer}' does not exist")
+        value = parent.pop(token)
+        undo.append(('set', parent, token, value))
+    return document, value
+
+def _undo(document: Any, action: tuple) -> Any:
+    kind = action[0]
+    if kind == 'root':
+        return action[1]
+    container = action[1]
+    if kind == 'pop':
+        container.pop(action[2])
+    elif kind == 'insert':
+        container.insert(action[2], action[3])
+    elif kind == 'set':
+        container[action[2]] = action[3]
+    elif kind == 'delete':
+        del container[action[2]]
+    return document
+
+def _operation_field(operation: dict, name: str) -> Any:
+    if name not in operation:
+        raise JSONPatchError(f"'{operation.get('op')}' operation is missing '{name}'")
+    return operation[name]
+
+def _apply_operation(document: Any, operation: dict, undo: list) -> Any:
+    if not isinstance(operation, dict):
+        raise JSONPatchError("Each patch operation must be an object")
+    op = _operation_field(operation, 'op')
+    path = _operation_field(operation, 'path')
+    if not isinstance(path, str):
+        raise JSONPatchError("'path' must be a string")
+
+    if op == 'add':
+        return _add(document, path, _operation_field(operation, 'value'), undo)
+    if op == 'remove':
+        return _remove(document, path, undo)[0]
+    if op == 'replace':
+        resolve_pointer(document, path)
+        if path != '':
+            document, _ = _remove(document, path, undo)
+        return _add(document, path, _operation_field(operation, 'value'), undo)
+    if op == 'move':
+        source = _operation_field(operation, 'from')
+        if source == path:
+            resolve_pointer(document, source)
+            return document
+        if path.startswith(source + '/'):
+            raise JSONPatchError(f"Cannot move '{source}' into its own child '{path}'")
+        document, value = _remove(document, source, undo)
+        return _add(document, path, value, undo)
+    if op == 'copy':
+        value = resolve_pointer(document, _operation_field(operation, 'from'))
+        return _add(document, path, copy.deepcopy(value), undo)
+    if op == 'test':
+        if not json_equal(resolve_pointer(document, path), _operation_field(operation, 'value')):
+            raise JSONPatchError(f"Test failed at '{path}'")
+        return document
+    raise JSONPatchError(f"Unknown patch operation '{op}'")
+
+def apply_patch(document: Any, operations: List[dict]) -> Any:
+    """Apply an RFC 6902 JSON Patch in place and return the (possibly new) root
+
+    Operations are applied directly to the document; if one fails, the edits
+    already made are undone so the document is left unchanged.
+    """
+    undo = []
+    try:
+        for operation in operations:
+            document = _apply_operation(document, operation, undo)
+    except Exception:
+        for action in reversed(undo):
+            document = _undo(document, action)
+        raise
+    return document
+
+def _writable(value: Any, copies: dict) -> Any:
+    """Return a shallow copy of a container, made once per patch"""
+    if id(value) in copies:
+        return value
+    value = value.copy()
+    copies[id(value)] = value  # also keeps the id from being reused
+    return value
+
+def _copy_parents(document: Any, pointer: str, copies: dict) -> Any:
+    """Copy the containers from the root down to a pointer's parent, returning the new root"""
+    tokens = parse_pointer(pointer)
+    if not tokens or not isinstance(document, (dict, list)):
+        return document
+    document = node = _writable(document, copies)
+    for token in tokens[:-1]:
+        if isinstance(node, dict):
+            key = token
+            if key not in node:
+                break
+        else:
+            if not token.isdigit() or int(token) >= len(node):
+                break
+            key = int(token)
+        child = node[key]
+        if not isinstance(child, (dict, list)):
+            break
+        node[key] = node = _writable(child, copies)
+    return document
+
+def apply_patch_copy(document: Any, operations: List[dict]) -> Any:
+    """Apply an RFC 6902 JSON Patch without modifying document, returning the new root
+
+    Only the containers on the edited paths are copied; every other subtree
+    is shared with document. Readers still holding the old root never see a
+    partial edit, and a failed patch simply leaves it as it was.
+    """
+    copies = {}
+    for operation in operations:
+        if isinstance(operation, dict) and operation.get('op') != 'test':
+            # Only move edits the container at 'from'
+            for name in ('path', 'from') if operation.get('op') == 'move' else ('path',):
+                if isinstance(operation.get(name), str):
+                    document = _copy_parents(document, operation[name], copies)
+        document = _apply_operation(document, operation, [])
+    return document
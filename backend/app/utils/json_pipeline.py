@@ -0,0 +1,170 @@
+import heapq
+import re
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Iterator
+
+from app.utils import json_codec
+from app.utils.json_query import (
+    QUERY_CACHE_SIZE, QuerySyntaxError, compile_expression, compile_query, evaluate_expression,
+    execute_query, hash_key, truthy
+)
+
+_STAGE = re.compile(r'\s*([A-Za-z_]\w*)\s*(?:\((.*)\))?\s*$', re.DOTALL)
+
+# Stages that take an expression evaluated against each item
+EXPRESSION_STAGES = {'map', 'filter', 'sort_by', 'unique_by'}
+# Stages that take a non-negative integer
+COUNT_STAGES = {'limit', 'skip'}
+# Original single-operation transforms; they leave unsupported input unchanged
+SIMPLE_STAGES = {'keys', 'values', 'length', 'count', 'sort', 'reverse', 'unique'}
+
+def split_stages(expression: str) -> list:
+    """Split a pipeline on top-level '|' (not inside brackets, strings or '||')"""
+    stages = []
+    depth = 0
+    quote = None
+    start = 0
+    i = 0
+    while i < len(expression):
+        char = expression[i]
+        if quote:
+            if char == '\\':
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in '\'"':
+            quote = char
+        elif char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            if expression.startswith('||', i):
+                i += 2
+                continue
+            stages.append(expression[start:i])
+            start = i + 1
+        i += 1
+    stages.append(expression[start:])
+    return stages
+
+_STAGE_NAME = re.compile(r'\s*([A-Za-z_]\w*)\s*\(')
+
+def _parse_stage(text: str) -> tuple:
+    match = _STAGE.match(text)
+    name = match.group(1) if match else None
+    if match is None:
+        opening = _STAGE_NAME.match(text)
+        if opening and opening.group(1) in EXPRESSION_STAGES | COUNT_STAGES | SIMPLE_STAGES:
+            raise QuerySyntaxError(f"Missing ')' in stage '{text.strip()}'")
+    if name in EXPRESSION_STAGES:
+        if not match.group(2) or not match.group(2).strip():
+            raise QuerySyntaxError(f"{name}() needs an expression")
+        return (name, compile_expression(match.group(2)))
+    if name in COUNT_STAGES:
+        argument = (match.group(2) or '').strip()
+        if not argument.isdigit():
+            raise QuerySyntaxError(f"{name}() needs a non-negative integer")
+        return (name, int(argument))
+    if name in SIMPLE_STAGES and not (match.group(2) or '').strip():
+        return (name, None)
+    # Anything else is a path or aggregation query over the current value
+    return ('query', compile_query(text))
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def compile_pipeline(expression: str) -> tuple:
+    """Parse a pipeline such as map(.x) | filter(.y > 3) | limit(10) into stages (cached)"""
+    stages = []
+    for text in split_stages(expression):
+        if not text.strip():
+            raise QuerySyntaxError(f"Empty stage in pipeline '{expression}'")
+        stages.append(_parse_stage(text))
+    # sort/sort_by followed by limit only needs the smallest n items
+    fused = []
+    for stage in stages:
+        if stage[0] == 'limit' and fused and fused[-1][0] in ('sort', 'sort_by'):
+            previous = fused.pop()
+            fused.append(('top', previous[1], stage[1]))
+        else:
+            fused.append(stage)
+    return tuple(fused)
+
+_TYPE_ORDER = {type(None): 0, bool: 1, int: 2, float: 2, str: 3}
+
+def sort_key(value: Any) -> tuple:
+    """Total order over JSON values: null < booleans < numbers < strings < arrays/objects"""
+    rank = _TYPE_ORDER.get(type(value))
+    if rank is None:
+        return (4, json_codec.dumps(value, sort_keys=True))
+    return (rank, value)
+
+def _items(value: Any, stage: str) -> Iterator[Any]:
+    """The stream a stage consumes: an array's elements (or an earlier stage's output)"""
+    if isinstance(value, Iterator):
+        return value
+    if isinstance(value, list):
+        return iter(value)
+    raise ValueError(f"{stage}() needs an array, got {type(value).__name__}")
+
+def _unique(items: Iterator[Any], expression, root: Any) -> Iterator[Any]:
+    seen = set()
+    for item in items:
+        key = hash_key(item if expression is None else evaluate_expression(expression, item, root))
+        if key not in seen:
+            seen.add(key)
+            yield item
+
+def _apply_stage(value: Any, stage: tuple, root: Any) -> Any:
+    name, argument = stage[0], stage[1]
+    if name == 'map':
+        return (evaluate_expression(argument, item, root) for item in _items(value, name))
+    if name == 'filter':
+        return (item for item in _items(value, name) if truthy(evaluate_expression(argument, item, root)))
+    if name == 'unique_by':
+        return _unique(_items(value, name), argument, root)
+    if name == 'sort_by':
+        return iter(sorted(_items(value, name), key=lambda item: sort_key(evaluate_expression(argument, item, root))))
+    if name == 'top':
+        key = sort_key if argument is None else lambda item: sort_key(evaluate_expression(argument, item, root))
+        return iter(heapq.nsmallest(stage[2], _items(value, 'limit'), key=key))
+    if name == 'limit':
+        return islice(_items(value, name), argument)
+    if name == 'skip':
+        return islice(_items(value, name), argument, None)
+    if name == 'query':
+        return execute_query(argument, list(value) if isinstance(value, Iterator) else value)
+
+    # Simple transforms keep their original leniency: other input passes through
+    if isinstance(value, Iterator) and name != 'count' and name != 'length':
+        value = list(value)
+    if name == 'keys' and isinstance(value, dict):
+        return list(value.keys())
+    if name == 'values' and isinstance(value, dict):
+        return list(value.values())
+    if name in ('length', 'count'):
+        if isinstance(value, Iterator):
+            return sum(1 for _ in value)
+        if isinstance(value, (list, dict, str)):
+            return len(value)
+    if name == 'sort' and isinstance(value, list):
+        return sorted(value, key=sort_key)
+    if name == 'reverse' and isinstance(value, list):
+        return value[::-1]
+    if name == 'unique' and isinstance(value, list):
+        return list(_unique(iter(value), None, root))
+    return value
+
+def run_pipeline(data: Any, expression: str) -> Any:
+    """Run a transform pipeline lazily: stages are chained generators
+
+    Items flow through map/filter/unique_by/limit one at a time, so limit
+    stops the upstream work early and no intermediate lists are built. Only
+    sorting, reversing and query stages need the whole stream.
+    """
+    value = data
+    for stage in compile_pipeline(expression.strip()):
+        value = _apply_stage(value, stage, data)
+    if isinstance(value, Iterator):
+        return list(value)
+    return value
@@ -0,0 +1,964 @@
+import math
+import operator
+import re
+from array import array
+from fractions import Fraction
+from functools import lru_cache
+from itertools import compress, repeat
+from typing import Any, Callable, Iterator, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from app.utils import json_codec
+
+QUERY_CACHE_SIZE = 512
+
+class QuerySyntaxError(ValueError):
+    """Raised when a query expression cannot be parsed"""
+
+# AST nodes
+class Path:
+    """A sequence of steps; singular paths (fields and indexes only) yield one value"""
+    __slots__ = ('steps', 'singular')
+
+    def __init__(self, steps):
+        self.steps = tuple(steps)
+        self.singular = all(step[0] in ('field', 'index') for step in self.steps)
+
+class Projection:
+    """Arithmetic evaluated against each object reached by a path, e.g. Orders.(Price*Quantity)"""
+    __slots__ = ('path', 'expression', 'fields', 'column_fields', 'column_function')
+
+    def __init__(self, path: Path, expression: tuple):
+        self.path = path
+        self.expression = expression
+        self.fields = frozenset(_referenced_fields(expression))
+        self.column_fields, self.column_function = _compile_columnar(expression)
+
+class Aggregate:
+    """An aggregation function applied to the values of a path or projection"""
+    __slots__ = ('function', 'target', 'arguments')
+
+    def __init__(self, function: str, target, arguments: tuple = ()):
+        self.function = function
+        self.target = target
+        self.arguments = arguments
+
+class GroupBy:
+    """Objects under a path grouped by one of their fields, with an aggregate per group"""
+    __slots__ = ('items', 'key', 'aggregate')
+
+    def __init__(self, items: Path, key: str, aggregate: Optional[Aggregate] = None):
+        self.items = items
+        self.key = key
+        self.aggregate = aggregate
+
+# Aggregation functions. count() counts every non-null value its path
+# matches (objects, strings, numbers...); before the compiled engine it
+# counted numbers only, so count(items) over objects used to return 0.
+AGGREGATIONS = ('sum', 'avg', 'min', 'max', 'count', 'median', 'percentile', 'stddev', 'distinct_count')
+
+_COLUMN_AGGREGATIONS = {'median', 'percentile', 'stddev'}
+
+# Parser
+_IDENTIFIER = re.compile(r'[A-Za-z_]\w*')
+_NUMBER = re.compile(r'\d+(?:\.\d+)?(?:[eE][+-]?\d+)?')
+_INTEGER = re.compile(r'-?\d+')
+_FUNCTION = re.compile(r'\$?([A-Za-z_]\w*)\s*\(')
+_PATH_NAME_STOP = '.[]()'
+_CALL_PATH_NAME_STOP = '.[](),'
+_KEYWORDS = {'true': True, 'false': False, 'null': None}
+_COMPARISONS = ('==', '!=', '<=', '>=', '<', '>')
+
+class _Parser:
+    """Recursive-descent parser for query, filter and arithmetic expressions"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self.call_depth = 0
+
+    def error(self, message: str):
+        raise QuerySyntaxError(f"{message} at position {self.pos} in '{self.text}'")
+
+    def skip_whitespace(self):
+        while self.pos < len(self.text) and self.text[self.pos].isspace():
+            self.pos += 1
+
+    def peek(self, token: str) -> bool:
+        self.skip_whitespace()
+        return self.text.startswith(token, self.pos)
+
+    def accept(self, token: str) -> bool:
+        if self.peek(token):
+            self.pos += len(token)
+            return True
+        return False
+
+    def expect(self, token: str):
+        if not self.accept(token):
+            self.error(f"Expected '{token}'")
+
+    def at_end(self) -> bool:
+        self.skip_whitespace()
+        return self.pos >= len(self.text)
+
+    def match(self, pattern):
+        self.skip_whitespace()
+        found = pattern.match(self.text, self.pos)
+        if found:
+            self.pos = found.end()
+        return found
+
+    # Top-level queries
+    def parse_query(self):
+        query = self.parse_call()
+        if not self.at_end():
+            self.error("Unexpected input")
+        return query
+
+    def parse_call(self):
+        """Parse an aggregation, group_by(...) or a plain path"""
+        function = self.match(_FUNCTION)
+        if not function:
+            return self.parse_target()
+        name = function.group(1)
+        self.call_depth += 1
+        if name == 'group_by':
+            query = self.parse_group_by()
+        elif name in AGGREGATIONS:
+            target = self.parse_target()
+            arguments = []
+            while self.accept(','):
+                number = self.match(_NUMBER)
+                if not number:
+                    self.error("Expected a number")
+                arguments.append(float(number.group()))
+            if name == 'percentile':
+                if not arguments:
+                    self.error("percentile() needs at least one percentile")
+                if any(not 0 <= argument <= 100 for argument in arguments):
+                    self.error("Percentiles must be between 0 and 100")
+            elif arguments:
+                self.error(f"{name}() takes a single argument")
+            query = Aggregate(name, target, tuple(arguments))
+        else:
+            self.error(f"Unknown function '{name}'")
+        self.expect(')')
+        self.call_depth -= 1
+        return query
+
+    def parse_group_by(self) -> GroupBy:
+        """Parse group_by(Items.Key[, aggregation relative to each item])"""
+        key_path = self.parse_target()
+        if not isinstance(key_path, Path) or not key_path.steps or key_path.steps[-1][0] != 'field':
+            self.error("group_by() needs a path ending in a field name")
+        aggregate = None
+        if self.accept(','):
+            aggregate = self.parse_call()
+            if not isinstance(aggregate, Aggregate):
+                self.error("group_by() expects an aggregation such as sum(Price)")
+        return GroupBy(Path(key_path.steps[:-1]), key_path.steps[-1][1], aggregate)
+
+    def parse_target(self):
+        """Parse a path, optionally ending in an arithmetic projection"""
+        self.accept('$')
+        steps = []
+        self.skip_whitespace()
+        stop = _CALL_PATH_NAME_STOP if self.call_depth else _PATH_NAME_STOP
+        if self.pos < len(self.text) and self.text[self.pos] not in stop:
+            steps.append(self.parse_path_name())
+        while True:
+            if self.accept('..'):
+                steps.append(('descendant',))
+                if self.peek('['):
+                    continue
+                steps.append(self.parse_path_name())
+            elif self.accept('.'):
+                if self.accept('('):
+                    expression = self.parse_expression()
+                    self.expect(')')
+                    return Projection(Path(steps), expression)
+                steps.append(self.parse_path_name())
+            elif self.accept('['):
+                steps.append(self.parse_bracket())
+            else:
+                return Path(steps)
+
+    def parse_path_name(self) -> tuple:
+        """Parse a field name in a top-level path (any characters except . [ ] ( ), and , inside calls)"""
+        self.skip_whitespace()
+        start = self.pos
+        stop = _CALL_PATH_NAME_STOP if self.call_depth else _PATH_NAME_STOP
+        while self.pos < len(self.text) and self.text[self.pos] not in stop:
+            self.pos += 1
+        name = self.text[start:self.pos].strip()
+        if not name:
+            self.error("Expected a field name")
+        return ('wildcard',) if name == '*' else ('field', name)
+
+    def parse_bracket(self) -> tuple:
+        """Parse the inside of [...]: wildcard, filter, quoted name, index or slice"""
+        if self.accept('*'):
+            step = ('wildcard',)
+        elif self.accept('?'):
+            parenthesised = self.accept('(')
+            step = ('filter', self.parse_expression())
+            if parenthesised:
+                self.expect(')')
+        elif self.peek("'") or self.peek('"'):
+            step = ('field', self.parse_string())
+        else:
+            bounds = [None]
+            is_slice = False
+            while True:
+                number = self.match(_INTEGER)
+                if number:
+                    bounds[-1] = int(number.group())
+                if not self.accept(':'):
+                    break
+                is_slice = True
+                bounds.append(None)
+            if not is_slice:
+                if bounds[0] is None:
+                    self.error("Expected an index, slice, '*' or filter")
+                step = ('index', bounds[0])
+            else:
+                if len(bounds) > 3:
+                    self.error("Too many slice bounds")
+                bounds += [None] * (3 - len(bounds))
+                if bounds[2] == 0:
+                    self.error("Slice step cannot be zero")
+                step = ('slice', bounds[0], bounds[1], bounds[2])
+        self.expect(']')
+        return step
+
+    def parse_string(self) -> str:
+        self.skip_whitespace()
+        quote = self.text[self.pos]
+        self.pos += 1
+        chars = []
+        while self.pos < len(self.text) and self.text[self.pos] != quote:
+            char = self.text[self.pos]
+            if char == '\\' and self.pos + 1 < len(self.text):
+                self.pos += 1
+                char = self.text[self.pos]
+            chars.append(char)
+            self.pos += 1
+        if self.pos >= len(self.text):
+            self.error("Unterminated string")
+        self.pos += 1
+        return ''.join(chars)
+
+    # Expressions (filters and projections)
+    def parse_expression(self) -> tuple:
+        return self.parse_or()
+
+    def parse_or(self) -> tuple:
+        left = self.parse_and()
+        while self.accept('||') or self.accept_word('or'):
+            left = ('or', left, self.parse_and())
+        return left
+
+    def parse_and(self) -> tuple:
+        left = self.parse_not()
+        while self.accept('&&') or self.accept_word('and'):
+            left = ('and', left, self.parse_not())
+        return left
+
+    def parse_not(self) -> tuple:
+        if self.peek('!') and not self.peek('!='):
+            self.pos += 1
+            return ('not', self.parse_not())
+        if self.accept_word('not'):
+            return ('not', self.parse_not())
+        return self.parse_comparison()
+
+    def parse_comparison(self) -> tuple:
+        left = self.parse_additive()
+        for op in _COMPARISONS:
+            if self.accept(op):
+                return ('binary', op, left, self.parse_additive())
+        return left
+
+    def parse_additive(self) -> tuple:
+        left = self.parse_multiplicative()
+        while True:
+            if self.accept('+'):
+                left = ('binary', '+', left, self.parse_multiplicative())
+            elif self.accept('-'):
+                left = ('binary', '-', left, self.parse_multiplicative())
+            else:
+                return left
+
+    def parse_multiplicative(self) -> tuple:
+        left = self.parse_unary()
+        while True:
+            if self.accept('*'):
+                left = ('binary', '*', left, self.parse_unary())
+            elif self.accept('/'):
+                left = ('binary', '/', left, self.parse_unary())
+            elif self.accept('%'):
+                left = ('binary', '%', left, self.parse_unary())
+            else:
+                return left
+
+    def parse_unary(self) -> tuple:
+        if self.accept('-'):
+            return ('negate', self.parse_unary())
+        return self.parse_primary()
+
+    def parse_primary(self) -> tuple:
+        if self.accept('('):
+            expression = self.parse_expression()
+            self.expect(')')
+            return expression
+        number = self.match(_NUMBER)
+        if number:
+            text = number.group()
+            return ('literal', float(text) if any(c in text for c in '.eE') else int(text))
+        if self.peek("'") or self.peek('"'):
+            return ('literal', self.parse_string())
+        if self.accept('@'):
+            return ('path', 'current', self.parse_relative_steps([]))
+        if self.accept('$'):
+            return ('path', 'root', self.parse_relative_steps([]))
+        if self.peek('.') and not self.peek('..'):
+            return ('path', 'current', self.parse_relative_steps([]))
+        identifier = self.match(_IDENTIFIER)
+        if identifier:
+            name = identifier.group()
+            if name in _KEYWORDS:
+                return ('literal', _KEYWORDS[name])
+            return ('path', 'current', self.parse_relative_steps([('field', name)]))
+        self.error("Expected a value")
+
+    def parse_relative_steps(self, steps: list) -> Path:
+        """Parse .name and [...] steps of a path inside an expression"""
+        while True:
+            if self.peek('.') and not self.peek('.('):
+                self.pos += 1
+                identifier = self.match(_IDENTIFIER)
+                if not identifier:
+                    self.error("Expected a field name")
+                steps.append(('field', identifier.group()))
+            elif self.accept('['):
+                steps.append(self.parse_bracket())
+            else:
+                return Path(steps)
+
+    def accept_word(self, word: str) -> bool:
+        self.skip_whitespace()
+        end = self.pos + len(word)
+        if self.text.startswith(word, self.pos) and (end >= len(self.text) or not (self.text[end].isalnum() or self.text[end] == '_')):
+            self.pos = end
+            return True
+        return False
+
+def _referenced_fields(expression: tuple) -> Iterator[str]:
+    """Yield the top-level field names an expression reads from the current object"""
+    stack = [expression]
+    while stack:
+        node = stack.pop()
+        kind = node[0]
+        if kind == 'path':
+            if node[1] == 'current' and node[2].steps and node[2].steps[0][0] == 'field':
+                yield node[2].steps[0][1]
+        elif kind == 'binary':
+            stack.extend(node[2:])
+        elif kind in ('and', 'or'):
+            stack.extend(node[1:])
+        elif kind in ('not', 'negate'):
+            stack.append(node[1])
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def compile_query(expression: str):
+    """Parse a query expression into an AST (cached by expression string)"""
+    return _Parser(expression.strip()).parse_query()
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def compile_expression(expression: str) -> tuple:
+    """Parse a filter/arithmetic expression into an AST (cached by expression string)"""
+    parser = _Parser(expression.strip())
+    result = parser.parse_expression()
+    if not parser.at_end():
+        parser.error("Unexpected input")
+    return result
+
+# Executor
+def iter_flattened(items: list) -> Iterator[Any]:
+    """Yield the leaves of nested lists in order without recursion"""
+    stack = [iter(items)]
+    while stack:
+        for item in stack[-1]:
+            if isinstance(item, list):
+                stack.append(iter(item))
+                break
+            yield item
+        else:
+            stack.pop()
+
+def _as_index(name: str) -> Optional[int]:
+    try:
+        return int(name)
+    except ValueError:
+        return None
+
+def _collect_flattened_field(items: list, name: str, matched: list) -> None:
+    """Append item[name] for every object in a (nested) array, skipping nulls"""
+    append = matched.append
+    stack = [iter(items)]
+    while stack:
+        for item in stack[-1]:
+            if type(item) is dict:
+                value = item.get(name)
+                if value is not None:
+                    append(value)
+            elif type(item) is list:
+                stack.append(iter(item))
+                break
+        else:
+            stack.pop()
+
+def evaluate_path(data: Any, path: Path, flatten: bool = False, root: Any = None, cache: Optional[dict] = None) -> list:
+    """Evaluate a path step by step over a frontier of matched nodes
+
+    With flatten=True, field steps that reach an array are mapped over its
+    (nested) elements, which is how aggregation paths like Orders.Price work.
+    A cache dict shared between queries over the same document stores the
+    frontier after every step prefix, so shared sub-paths are walked once.
+    """
+    root = data if root is None else root
+    steps = path.steps
+    nodes = [data]
+    start = 0
+    if cache is not None:
+        for end in range(len(steps), 0, -1):
+            cached = cache.get((flatten, steps[:end]))
+            if cached is not None:
+                nodes, start = cached, end
+                break
+    for position in range(start, len(steps)):
+        step = steps[position]
+        kind = step[0]
+        matched = []
+        if kind == 'field':
+            name = step[1]
+            for node in nodes:
+                if isinstance(node, dict):
+                    if name in node and (not flatten or node[name] is not None):
+                        matched.append(node[name])
+                elif isinstance(node, list):
+                    if flatten:
+                        _collect_flattened_field(node, name, matched)
+                    else:
+                        index = _as_index(name)
+                        if index is not None and 0 <= index < len(node):
+                            matched.append(node[index])
+        elif kind == 'index':
+            index = step[1]
+            for node in nodes:
+                if isinstance(node, list) and -len(node) <= index < len(node):
+                    matched.append(node[index])
+        elif kind == 'slice':
+            for node in nodes:
+                if isinstance(node, list):
+                    matched.extend(node[step[1]:step[2]:step[3]])
+        elif kind == 'wildcard':
+            for node in nodes:
+                if isinstance(node, dict):
+                    matched.extend(node.values())
+                elif isinstance(node, list):
+                    matched.extend(node)
+        elif kind == 'filter':
+            predicate = step[1]
+            for node in nodes:
+                children = node.values() if isinstance(node, dict) else node if isinstance(node, list) else ()
+                for child in children:
+                    if truthy(evaluate_expression(predicate, child, root)):
+                        matched.append(child)
+        elif kind == 'descendant':
+            for node in nodes:
+                stack = [node]
+                while stack:
+                    current = stack.pop()
+                    # Arrays are mapped over by the next flattened step, so
+                    # adding them here as well would count their elements twice
+                    if not (flatten and isinstance(current, list)):
+                        matched.append(current)
+                    if isinstance(current, dict):
+                        stack.extend(reversed(list(current.values())))
+                    elif isinstance(current, list):
+                        stack.extend(reversed(current))
+        nodes = matched
+        if cache is not None:
+            cache[(flatten, steps[:position + 1])] = nodes
+        if not nodes:
+            break
+    return nodes
+
+_ARITHMETIC_OPERATORS = {'+', '-', '*', '/', '%'}
+
+_BINARY_OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '%': operator.mod,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+def truthy(value: Any) -> bool:
+    return value is not None and value is not False and value != 0 and value != '' and value != [] and value != {}
+
+def evaluate_expression(expression: tuple, current: Any, root: Any = None) -> Any:
+    """Evaluate a filter/arithmetic expression against the current value"""
+    kind = expression[0]
+    if kind == 'literal':
+        return expression[1]
+    if kind == 'path':
+        path = expression[2]
+        anchor = current if expression[1] == 'current' else root
+        matches = evaluate_path(anchor, path, root=root)
+        if path.singular:
+            return matches[0] if matches else None
+        return matches
+    if kind == 'binary':
+        left = evaluate_expression(expression[2], current, root)
+        right = evaluate_expression(expression[3], current, root)
+        try:
+            return _BINARY_OPERATORS[expression[1]](left, right)
+        except (TypeError, ZeroDivisionError):
+            return None if expression[1] in _ARITHMETIC_OPERATORS else False
+        except OverflowError:
+            return _overflowing_arithmetic(_BINARY_OPERATORS[expression[1]], left, right)
+    if kind == 'and':
+        return truthy(evaluate_expression(expression[1], current, root)) and truthy(evaluate_expression(expression[2], current, root))
+    if kind == 'or':
+        return truthy(evaluate_expression(expression[1], current, root)) or truthy(evaluate_expression(expression[2], current, root))
+    if kind == 'not':
+        return not truthy(evaluate_expression(expression[1], current, root))
+    if kind == 'negate':
+        value = evaluate_expression(expression[1], current, root)
+        return -value if _is_number(value) else None
+    raise QuerySyntaxError(f"Unknown expression node: {kind}")
+
+_NUMBER_TYPES = frozenset((int, float))
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _to_float(value) -> float:
+    """Convert a number to float, giving +/-inf for integers beyond float range"""
+    try:
+        return float(value)
+    except OverflowError:
+        return math.inf if value > 0 else -math.inf
+
+def _overflowing_arithmetic(function, left, right) -> Optional[float]:
+    """Redo arithmetic on an integer too large for a float
+
+    The exact result is computed with fractions and then rounded, so it is
+    +/-inf only when the result itself is out of float range.
+    """
+    try:
+        try:
+            result = function(Fraction(left), Fraction(right))
+        except (OverflowError, ValueError):
+            # The other operand is already inf or nan
+            return function(_to_float(left), _to_float(right))
+    except ZeroDivisionError:
+        return None
+    return _to_float(result)
+
+# Columnar arithmetic
+def _arithmetic_function(expression: tuple, fields: list, operators: dict) -> Optional[Callable]:
+    """Build a function of (failed, columns) for a pure arithmetic expression
+
+    The expression becomes nested closures, with literals bound as float
+    constants (so 1e999 is just inf). Returns None for expressions that need
+    per-item evaluation (comparisons, boolean logic, nested paths).
+    """
+    kind = expression[0]
+    if kind == 'literal':
+        if not _is_number(expression[1]):
+            return None
+        value = _to_float(expression[1])
+        return lambda failed, columns: value
+    if kind == 'path':
+        steps = expression[2].steps
+        if expression[1] != 'current' or len(steps) != 1 or steps[0][0] != 'field':
+            return None
+        if steps[0][1] not in fields:
+            fields.append(steps[0][1])
+        index = fields.index(steps[0][1])
+        return lambda failed, columns: columns[index]
+    if kind == 'negate':
+        operand = _arithmetic_function(expression[1], fields, operators)
+        if operand is None:
+            return None
+        return lambda failed, columns: -operand(failed, columns)
+    if kind == 'binary' and expression[1] in _ARITHMETIC_OPERATORS:
+        left = _arithmetic_function(expression[2], fields, operators)
+        right = _arithmetic_function(expression[3], fields, operators)
+        if left is None or right is None:
+            return None
+        function = operators[expression[1]]
+        if expression[1] in ('/', '%'):
+            return lambda failed, columns: function(failed, left(failed, columns), right(failed, columns))
+        return lambda failed, columns: function(left(failed, columns), right(failed, columns))
+    return None
+
+def _column_divide(failed, left, right):
+    failed |= right == 0
+    return np.divide(left, right)
+
+def _column_modulo(failed, left, right):
+    failed |= right == 0
+    return np.mod(left, right)
+
+def _scalar_divide(failed, left: float, right: float) -> float:
+    return left / right
+
+def _scalar_modulo(failed, left: float, right: float) -> float:
+    return left % right
+
+def _compile_columnar(expression: tuple):
+    """Compile arithmetic once into a function over whole columns
+
+    With NumPy the function runs vectorised on ndarrays; otherwise it is
+    mapped over the rows of array('d') columns. Rows that divide by zero are
+    flagged in the failed mask (or raise ZeroDivisionError per row) and are
+    dropped like the per-item evaluator drops failures; overflow gives +/-inf,
+    as float arithmetic does, and those rows are kept.
+    """
+    operators = {'+': operator.add, '-': operator.sub, '*': operator.mul}
+    if np is not None:
+        operators.update({'/': _column_divide, '%': _column_modulo})
+    else:
+        operators.update({'/': _scalar_divide, '%': _scalar_modulo})
+    fields = []
+    function = _arithmetic_function(expression, fields, operators)
+    if function is None:
+        return None, None
+    return tuple(fields), lambda failed, *columns: function(failed, columns)
+
+def _iter_projection_items(data: Any, projection: Projection, cache: Optional[dict] = None) -> Iterator[dict]:
+    """Yield objects under the projection path that have every referenced field
+
+    Objects missing a field have their nested arrays searched instead.
+    """
+    fields = projection.fields
+    stack = list(reversed(evaluate_path(data, projection.path, flatten=True, cache=cache)))
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(reversed(item))
+        elif isinstance(item, dict):
+            if all(field in item for field in fields):
+                yield item
+            else:
+                stack.extend(reversed([value for value in item.values() if isinstance(value, list)]))
+
+def gather_columns(data: Any, projection: Projection, cache: Optional[dict] = None) -> tuple:
+    """Collect the referenced fields of matching objects into array('d') columns
+
+    Walks the same objects as _iter_projection_items in one tight loop; rows
+    where any field is not a number are skipped. Returns (columns, row count).
+    Raises OverflowError for an integer field beyond float range.
+    """
+    fields = projection.column_fields
+    if not fields:
+        return [], sum(1 for _ in _iter_projection_items(data, projection, cache))
+    columns = [array('d') for _ in fields]
+    appenders = [column.append for column in columns]
+    getter = operator.itemgetter(*fields)
+    single = len(fields) == 1
+    append_first = appenders[0]
+    # Stack of iterators keeps document order without recursion
+    stack = [iter(evaluate_path(data, projection.path, flatten=True, cache=cache))]
+    while stack:
+        for item in stack[-1]:
+            if type(item) is dict:
+                try:
+                    row = getter(item)
+                except KeyError:
+                    nested = [value for value in item.values() if type(value) is list]
+                    if nested:
+                        stack.append(iter(nested))
+                        break
+                    continue
+                try:
+                    if single:
+                        append_first(row)
+                    else:
+                        for append, value in zip(appenders, row):
+                            append(value)
+                except TypeError:
+                    # Non-numeric field: undo this row's partial appends
+                    length = min(len(column) for column in columns)
+                    for column in columns:
+                        if len(column) > length:
+                            column.pop()
+            elif type(item) is list:
+                stack.append(iter(item))
+                break
+        else:
+            stack.pop()
+    return columns, len(columns[0])
+
+def projection_values(data: Any, projection: Projection, cache: Optional[dict] = None):
+    """Evaluate arithmetic against every object under the projection path
+
+    Returns a compact float column: an ndarray with NumPy, else array('d').
+    Results that overflow a float are kept as +/-inf.
+    """
+    columns = None
+    if projection.column_function is not None:
+        try:
+            columns, count = gather_columns(data, projection, cache)
+        except OverflowError:
+            pass  # an integer too large for the columns: evaluate item by item
+    if columns is None:
+        results = array('d')
+        for item in _iter_projection_items(data, projection, cache):
+            value = evaluate_expression(projection.expression, item, data)
+            if isinstance(value, (int, float)):
+                results.append(_to_float(value))
+        return results
+    
+    if np is not None:
+        failed = np.zeros(count, dtype=bool)
+        with np.errstate(all='ignore'):
+            values = projection.column_function(failed, *[np.frombuffer(column, dtype=np.float64) for column in columns])
+        values = np.broadcast_to(np.asarray(values, dtype=np.float64), (count,))
+        return values[~failed] if failed.any() else values
+    results = array('d')
+    for row in zip(*columns) if columns else repeat((), count):
+        try:
+            results.append(projection.column_function(None, *row))
+        except ZeroDivisionError:
+            pass
+    return results
+
+def evaluate_projection(data: Any, projection: Projection, cache: Optional[dict] = None) -> List[float]:
+    """Evaluate arithmetic against every object under the projection path"""
+    return projection_values(data, projection, cache).tolist()
+
+# Aggregation
+def hash_key(value: Any) -> Any:
+    """Hashable identity of a JSON value for distinct_count and unique (bools stay apart from 1/0)"""
+    if isinstance(value, bool):
+        return (bool, value)
+    if isinstance(value, (dict, list)):
+        return json_codec.dumps(value, sort_keys=True)
+    return value
+
+def _percentile(ordered, fraction: float) -> float:
+    """Linear interpolation between closest ranks (NumPy's default method)"""
+    rank = fraction * (len(ordered) - 1)
+    low = int(rank)
+    if low + 1 >= len(ordered):
+        return float(ordered[low])
+    return float(ordered[low] + (ordered[low + 1] - ordered[low]) * (rank - low))
+
+class Aggregator:
+    """Single-pass aggregation over batches of values
+
+    sum/avg/min/max/count keep running totals, median/percentile/stddev
+    collect into a typed array (array('q') while every value is an integer,
+    array('d') otherwise) and distinct_count keeps a set of seen values.
+    count takes every value it is given; the others use only the numbers.
+    """
+
+    def __init__(self, function: str, arguments: tuple = ()):
+        self.function = function
+        self.arguments = arguments
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+        self.column = array('q') if function in _COLUMN_AGGREGATIONS else None
+        self.distinct = set() if function == 'distinct_count' else None
+
+    def update(self, values, numeric: bool = False) -> None:
+        """Fold in raw JSON values (numbers are picked out) or, with numeric=True, a float column"""
+        function = self.function
+        if function == 'count':
+            self.count += len(values) if numeric else len(values) - values.count(None)
+            return
+        if function == 'distinct_count':
+            self.distinct.update(map(hash_key, values))
+            return
+        if numeric:
+            if np is not None and isinstance(values, np.ndarray):
+                column = array('d')
+                column.frombytes(values.astype(np.float64).tobytes())
+                values = column
+        else:
+            # Exact type checks exclude bools and run entirely in C
+            values = list(compress(values, map(_NUMBER_TYPES.__contains__, map(type, values))))
+        if not len(values):
+            return
+        self.count += len(values)
+        if self.column is not None:
+            self._extend(values)
+            return
+        self.total += sum(values)
+        low, high = min(values), max(values)
+        if self.minimum is None or low < self.minimum:
+            self.minimum = low
+        if self.maximum is None or high > self.maximum:
+            self.maximum = high
+
+    def _extend(self, values) -> None:
+        if self.column.typecode == 'q':
+            try:
+                self.column.extend(array('q', values))
+                return
+            except (TypeError, OverflowError):
+                self.column = array('d', self.column)
+        self.column.extend(values if isinstance(values, array) and values.typecode == 'd' else array('d', values))
+
+    def merge(self, other: 'Aggregator') -> None:
+        """Combine a partial aggregate computed over another part of the input"""
+        self.count += other.count
+        self.total += other.total
+        if other.minimum is not None and (self.minimum is None or other.minimum < self.minimum):
+            self.minimum = other.minimum
+        if other.maximum is not None and (self.maximum is None or other.maximum > self.maximum):
+            self.maximum = other.maximum
+        if self.column is not None and other.column:
+            self._extend(other.column)
+        if self.distinct is not None:
+            self.distinct.update(other.distinct)
+
+    def result(self) -> Any:
+        function = self.function
+        if function == 'count':
+            return self.count
+        if function == 'distinct_count':
+            return len(self.distinct)
+        if function == 'sum':
+            return self.total
+        if function == 'avg':
+            return self.total / self.count if self.count else 0
+        if function == 'min':
+            return self.minimum
+        if function == 'max':
+            return self.maximum
+
+        column = self.column
+        if function == 'stddev':
+            if not column:
+                return None
+            if np is not None:
+                return float(np.std(np.frombuffer(column, dtype=np.int64 if column.typecode == 'q' else np.float64)))
+            mean = math.fsum(column) / len(column)
+            return math.sqrt(math.fsum((value - mean) ** 2 for value in column) / len(column))
+
+        fractions = [0.5] if function == 'median' else [argument / 100 for argument in self.arguments]
+        if not column:
+            results = [None] * len(fractions)
+        elif np is not None:
+            values = np.frombuffer(column, dtype=np.int64 if column.typecode == 'q' else np.float64)
+            results = [float(value) for value in np.quantile(values, fractions)]
+        else:
+            ordered = sorted(column)
+            results = [_percentile(ordered, fraction) for fraction in fractions]
+        if len(results) == 1:
+            return results[0]
+        return {f"{argument:g}": value for argument, value in zip(self.arguments, results)}
+
+def aggregate_input(aggregate: Aggregate, data: Any, cache: Optional[dict] = None) -> tuple:
+    """Return (values, numeric) that an aggregation consumes from data"""
+    if isinstance(aggregate.target, Projection):
+        return projection_values(data, aggregate.target, cache), True
+    values = evaluate_path(data, aggregate.target, flatten=True, cache=cache)
+    if list in map(type, values):
+        values = list(iter_flattened(values))
+    return values, False
+
+def group_key(value: Any) -> str:
+    """Turn a group_by field value into a JSON object key"""
+    return value if isinstance(value, str) else json_codec.dumps(value, sort_keys=True)
+
+def group_items(items, key: str) -> dict:
+    """Bucket objects by the value of one field (objects without it go under "null")"""
+    buckets = {}
+    for item in items:
+        if type(item) is dict:
+            value = item.get(key)
+            if type(value) is dict or type(value) is list:
+                value = group_key(value)
+            # The type keeps true apart from 1 while bucketing on the raw value
+            raw = (type(value), value)
+            bucket = buckets.get(raw)
+            if bucket is None:
+                buckets[raw] = [item]
+            else:
+                bucket.append(item)
+    groups = {}
+    for (_, value), bucket in buckets.items():
+        name = group_key(value)
+        if name in groups:
+            groups[name].extend(bucket)
+        else:
+            groups[name] = bucket
+    return groups
+
+def new_group_aggregator(query: GroupBy) -> Aggregator:
+    """Aggregator for one group (a plain count of its objects without an aggregation)"""
+    if query.aggregate is None:
+        return Aggregator('count')
+    return Aggregator(query.aggregate.function, query.aggregate.arguments)
+
+def update_group_aggregator(aggregator: Aggregator, query: GroupBy, items: list) -> None:
+    """Fold a batch of a group's objects into its aggregator"""
+    if query.aggregate is None:
+        aggregator.update(items)
+    else:
+        aggregator.update(*aggregate_input(query.aggregate, items))
+
+def execute_query(query, data: Any, cache: Optional[dict] = None) -> Any:
+    """Run a compiled query against parsed JSON data"""
+    if isinstance(query, Aggregate):
+        aggregator = Aggregator(query.function, query.arguments)
+        aggregator.update(*aggregate_input(query, data, cache))
+        return aggregator.result()
+    if isinstance(query, GroupBy):
+        items = iter_flattened(evaluate_path(data, query.items, flatten=True, cache=cache))
+        results = {}
+        for name, bucket in group_items(items, query.key).items():
+            aggregator = new_group_aggregator(query)
+            update_group_aggregator(aggregator, query, bucket)
+            results[name] = aggregator.result()
+        return results
+    if isinstance(query, Projection):
+        return evaluate_projection(data, query, cache)
+    matches = evaluate_path(data, query, cache=cache)
+    if query.singular:
+        return matches[0] if matches else None
+    return matches
+
+def query_json(data: Any, expression: str) -> Any:
+    """Compile (or fetch from cache) and run a query expression"""
+    return execute_query(compile_query(expression), data)
+
+def query_json_many(data: Any, expressions: List[str]) -> dict:
+    """Run several queries over one parsed document, mapping each expression to its result
+
+    All expressions are compiled before any runs, so a syntax error fails the
+    whole batch, and path prefixes shared between them are evaluated once.
+    """
+    queries = {expression: compile_query(expression) for expression in expressions}
+    cache = {}
+    return {expression: execute_query(query, data, cache) for expression, query in queries.items()}
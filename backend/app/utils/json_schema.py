@@ -0,0 +1,62 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, List
+
+from jsonschema import exceptions as schema_exceptions
+from jsonschema.validators import validator_for
+
+from app.utils import json_codec
+from app.utils.json_patch import format_pointer
+
+SCHEMA_CACHE_SIZE = 128
+MAX_SCHEMA_ERRORS = 1000
+
+_validators = OrderedDict()
+_validators_lock = threading.Lock()
+
+def schema_hash(schema: Any) -> str:
+    """Stable hash of a schema: the same schema with reordered keys hashes the same"""
+    return hashlib.sha256(json_codec.dumps(schema, sort_keys=True).encode()).hexdigest()
+
+def compile_schema(schema: Any):
+    """Return a validator for a JSON Schema, compiled once and cached by schema hash
+
+    The draft is taken from $schema (latest draft if absent). Invalid schemas
+    raise ValueError.
+    """
+    key = schema_hash(schema)
+    with _validators_lock:
+        validator = _validators.get(key)
+        if validator is not None:
+            _validators.move_to_end(key)
+            return validator
+
+    cls = validator_for(schema)
+    try:
+        cls.check_schema(schema)
+    except schema_exceptions.SchemaError as e:
+        raise ValueError(f"Invalid schema at '{format_pointer(e.absolute_path)}': {e.message}")
+    validator = cls(schema, format_checker=cls.FORMAT_CHECKER)
+
+    with _validators_lock:
+        _validators[key] = validator
+        while len(_validators) > SCHEMA_CACHE_SIZE:
+            _validators.popitem(last=False)
+    return validator
+
+def validate_against_schema(data: Any, schema: Any) -> List[dict]:
+    """Validate a parsed document and return every error with its JSON pointer
+
+    At most MAX_SCHEMA_ERRORS are returned.
+    """
+    errors = []
+    for error in compile_schema(schema).iter_errors(data):
+        errors.append({
+            "path": format_pointer(error.absolute_path),
+            "message": error.message,
+            "schema_path": format_pointer(error.absolute_schema_path),
+        })
+        if len(errors) >= MAX_SCHEMA_ERRORS:
+            break
+    return errors
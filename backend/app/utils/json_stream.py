@@ -0,0 +1,260 @@
+import re
+from collections import deque
+from json.encoder import encode_basestring
+from itertools import islice
+from typing import Any, BinaryIO, Iterator, Optional
+
+import ijson
+
+from app.utils import json_codec
+from app.utils.json_query import (
+    Aggregate, Aggregator, GroupBy, Path, Projection, aggregate_input, compile_query,
+    group_items, new_group_aggregator, update_group_aggregator
+)
+
+AGGREGATE_BATCH_SIZE = 10000
+REFORMAT_CHUNK_SIZE = 64 * 1024  # characters of output per yielded chunk
+
+CONTAINER_STARTS = frozenset(('start_map', 'start_array'))
+CONTAINER_ENDS = frozenset(('end_map', 'end_array'))
+NON_VALUE_EVENTS = frozenset(('map_key', 'end_map', 'end_array'))
+
+def _prefix_pattern(path: Path, flatten: bool):
+    """Translate a path into a regex over ijson event prefixes
+
+    ijson reports prefixes like "Orders.item.Price", where "item" stands for
+    an array element. In flatten (aggregation) mode any number of array levels
+    may appear between fields, mirroring evaluate_path(flatten=True).
+    """
+    items = r'(?:\.item)*' if flatten else ''
+    parts = []
+    for step in path.steps:
+        kind = step[0]
+        if kind == 'field':
+            parts.append(items + r'\.' + re.escape(step[1]))
+        elif kind == 'wildcard':
+            parts.append(items + r'\.[^.]+')
+        elif kind == 'descendant':
+            parts.append(r'(?:\.[^.]+)*')
+        else:
+            raise ValueError(f"'{kind}' steps are not supported in streaming queries")
+    return re.compile(''.join(parts) + items + '$')
+
+def iter_matching_values(events: Iterator[tuple], path: Path, flatten: bool = False) -> Iterator[Any]:
+    """Yield values whose location matches a path from a stream of ijson events
+
+    Only matching values are materialised, one ObjectBuilder per value being
+    built. In flatten mode arrays at a matching location are not yielded
+    themselves; their elements are.
+    """
+    pattern = _prefix_pattern(path, flatten)
+    matches = {}
+    builders = []  # [builder, depth] for values currently being built
+    for prefix, event, value in events:
+        is_match = False
+        if event not in NON_VALUE_EVENTS:
+            is_match = matches.get(prefix)
+            if is_match is None:
+                is_match = matches[prefix] = pattern.match('.' + prefix if prefix else '') is not None
+            if is_match:
+                if flatten and (event == 'start_array' or event == 'null'):
+                    is_match = False
+                elif event in CONTAINER_STARTS:
+                    builders.append([ijson.ObjectBuilder(), 0])
+
+        if builders:
+            for entry in builders:
+                entry[0].event(event, value)
+                if event in CONTAINER_STARTS:
+                    entry[1] += 1
+                elif event in CONTAINER_ENDS:
+                    entry[1] -= 1
+            if builders[-1][1] == 0:
+                yield builders.pop()[0].value
+                continue
+        if is_match and event not in CONTAINER_STARTS:
+            yield value
+
+def _literal_prefix(path: Path):
+    """Return the ijson prefix for a path made only of plain field names, else None"""
+    names = []
+    for step in path.steps:
+        if step[0] != 'field' or '.' in step[1] or step[1] == 'item':
+            return None
+        names.append(step[1])
+    return '.'.join(names)
+
+def iter_batches(values: Iterator[Any], size: int) -> Iterator[list]:
+    """Group an iterator into lists of at most size items"""
+    iterator = iter(values)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def iter_array_items(fileobj: BinaryIO, expression: str) -> Iterator[Any]:
+    """Yield the elements of the array a path points to (the root array for an empty path)"""
+    path = compile_query(expression) if expression.strip() else Path([])
+    if not isinstance(path, Path):
+        raise ValueError("Expected a path to an array, such as Orders or data.items")
+    prefix = _literal_prefix(path)
+    if prefix is not None:
+        return ijson.items(fileobj, prefix + '.item' if prefix else 'item', use_float=True)
+    return iter_matching_values(ijson.parse(fileobj, use_float=True), Path(path.steps + (('wildcard',),)))
+
+def scan_json(fileobj: BinaryIO):
+    """Check JSON syntax by running the tokenizer to the end without building values
+
+    Raises ijson.JSONError at the first syntax error.
+    """
+    deque(ijson.basic_parse(fileobj, use_float=True), maxlen=0)
+
+def stream_query(fileobj: BinaryIO, expression: str) -> Any:
+    """Evaluate a path or aggregation query over a JSON file without loading it
+
+    The file is parsed incrementally; only values at matching locations are
+    built, and aggregations and groups are folded a batch at a time.
+    """
+    query = compile_query(expression)
+    if isinstance(query, Projection):
+        raise ValueError("Projections must be wrapped in an aggregation in streaming queries")
+    events = ijson.parse(fileobj, use_float=True)
+
+    if isinstance(query, Aggregate):
+        # Matched values are aggregated per batch, relative to the matched location
+        target = query.target
+        if isinstance(target, Projection):
+            path = target.path
+            relative = Aggregate(query.function, Projection(Path([]), target.expression), query.arguments)
+        else:
+            path = target
+            relative = Aggregate(query.function, Path([]), query.arguments)
+        aggregator = Aggregator(query.function, query.arguments)
+        for batch in iter_batches(iter_matching_values(events, path, flatten=True), AGGREGATE_BATCH_SIZE):
+            aggregator.update(*aggregate_input(relative, batch))
+        return aggregator.result()
+
+    if isinstance(query, GroupBy):
+        aggregators = {}
+        for batch in iter_batches(iter_matching_values(events, query.items, flatten=True), AGGREGATE_BATCH_SIZE):
+            for name, items in group_items(batch, query.key).items():
+                aggregator = aggregators.get(name)
+                if aggregator is None:
+                    aggregator = aggregators[name] = new_group_aggregator(query)
+                update_group_aggregator(aggregator, query, items)
+        return {name: aggregator.result() for name, aggregator in aggregators.items()}
+
+    prefix = _literal_prefix(query)
+    if prefix is not None:
+        # Plain field paths can be matched entirely inside ijson's C backend
+        values = ijson.items(fileobj, prefix, use_float=True)
+    else:
+        values = iter_matching_values(events, query)
+    if query.singular:
+        # Stop reading as soon as the first match is found
+        return next(values, None)
+    return list(values)
+
+def _number(value: Any) -> Any:
+    """ijson reports non-integers as Decimal; read them as floats like the parser does"""
+    return value if type(value) is int else float(value)
+
+def _encode_number(value: Any) -> str:
+    if type(value) is int:
+        return repr(value)
+    number = float(value)
+    if number in (float('inf'), float('-inf')):
+        return 'Infinity' if number > 0 else '-Infinity'
+    return repr(number)
+
+_SCALAR_ENCODERS = {
+    'string': encode_basestring,
+    'number': _encode_number,
+    'boolean': lambda value: 'true' if value else 'false',
+    'null': lambda value: 'null',
+}
+
+def iter_reformatted(
+    fileobj: BinaryIO,
+    indent: Optional[int] = None,
+    sort_keys: bool = False,
+    chunk_size: int = REFORMAT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Pretty-print (indent) or minify (indent=None) a JSON file as a stream of chunks
+
+    Output is written token by token from the parser's events, so memory is
+    bounded by chunk_size rather than the document. With sort_keys, objects
+    have to be held whole to be sorted (arrays still stream), so memory is
+    bounded by the largest object instead.
+    """
+    key_separator = ':' if indent is None else ': '
+    pads = []
+    pieces = []
+    size = 0
+    stack = []  # [is_array, is_empty] for every open container
+    builder = None
+    builder_depth = 0
+
+    # Numbers come as int/Decimal: use_float would reject integers beyond 64 bits
+    for _, event, value in ijson.parse(fileobj):
+        if builder is not None:
+            builder.event(event, _number(value) if event == 'number' else value)
+            if event in CONTAINER_STARTS:
+                builder_depth += 1
+            elif event in CONTAINER_ENDS:
+                builder_depth -= 1
+                if builder_depth == 0:
+                    text = json_codec.dumps(builder.value, indent=indent, sort_keys=True)
+                    if indent and stack:
+                        text = text.replace('\n', '\n' + ' ' * (indent * len(stack)))
+                    pieces.append(text)
+                    size += len(text)
+                    builder = None
+            continue
+
+        if event in CONTAINER_ENDS:
+            _, empty = stack.pop()
+            if indent is not None and not empty:
+                pieces.append(pads[len(stack)])
+            pieces.append(']' if event == 'end_array' else '}')
+            size += 1
+        else:
+            if stack and (event == 'map_key' or stack[-1][0]):
+                # Separator before an object member or array element
+                top = stack[-1]
+                if not top[1]:
+                    pieces.append(',')
+                top[1] = False
+                if indent is not None:
+                    depth = len(stack)
+                    while len(pads) <= depth:
+                        pads.append('\n' + ' ' * (indent * len(pads)))
+                    pieces.append(pads[depth])
+            if event == 'map_key':
+                pieces.append(encode_basestring(value))
+                pieces.append(key_separator)
+                size += len(value) + 4
+            elif event == 'start_array':
+                pieces.append('[')
+                stack.append([True, True])
+            elif event == 'start_map':
+                if sort_keys:
+                    builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+                    builder_depth = 1
+                else:
+                    pieces.append('{')
+                    stack.append([False, True])
+            else:
+                text = _SCALAR_ENCODERS[event](value)
+                pieces.append(text)
+                size += len(text)
+
+        if size >= chunk_size:
+            yield ''.join(pieces).encode()
+            pieces = []
+            size = 0
+
+    if pieces:
+        yield ''.join(pieces).encode()
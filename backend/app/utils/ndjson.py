@@ -0,0 +1,170 @@
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterator, List, Tuple
+
+from app.utils import json_codec
+from app.utils.json_pipeline import compile_pipeline, run_pipeline
+from app.utils.json_query import (
+    Aggregate, Aggregator, GroupBy, aggregate_input, compile_query, evaluate_path, group_items,
+    iter_flattened, new_group_aggregator, update_group_aggregator
+)
+from app.utils.json_stream import AGGREGATE_BATCH_SIZE
+
+NDJSON_CHUNK_BYTES = 8 * 1024 * 1024  # each worker task reads this much of the file
+NDJSON_PARALLEL_MIN_BYTES = 2 * NDJSON_CHUNK_BYTES  # smaller files are processed inline
+NDJSON_WORKERS = os.cpu_count() or 1
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _pool_context():
+    # Forking the threaded server could copy a lock some other thread holds
+    # and deadlock the child; forkserver forks from a clean helper process
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+def get_pool() -> ProcessPoolExecutor:
+    """Process pool shared by NDJSON requests, started on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=NDJSON_WORKERS, mp_context=_pool_context())
+        return _pool
+
+def shutdown_pool():
+    """Stop the worker processes (on application shutdown)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+def plan_ranges(file_path: str, chunk_bytes: int = NDJSON_CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """Split a file into byte ranges of about chunk_bytes that start and end on line boundaries"""
+    size = os.path.getsize(file_path)
+    ranges = []
+    start = 0
+    with open(file_path, "rb") as f:
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+def _iter_records(file_path: str, start: int, end: int) -> Iterator[Any]:
+    """Parse the non-blank lines of a byte range"""
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    offset = start
+    for line in data.split(b"\n"):
+        if line.strip():
+            try:
+                yield json_codec.loads(line)
+            except json_codec.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON in the line at byte {offset}: {e.msg}")
+        offset += len(line) + 1
+
+# Worker tasks: top-level functions so the process pool can pickle them
+def map_range(file_path: str, start: int, end: int, expression: str) -> bytes:
+    """Run a query or pipeline on every line of a range, returning NDJSON output
+
+    Every non-blank input line gives exactly one output line (null when
+    nothing matched), so output line N belongs to input record N.
+    """
+    output = []
+    for record in _iter_records(file_path, start, end):
+        output.append(json_codec.dumps(run_pipeline(record, expression)))
+    if not output:
+        return b""
+    return ("\n".join(output) + "\n").encode()
+
+def aggregate_range(file_path: str, start: int, end: int, expression: str) -> Any:
+    """Partial aggregate of a range: an Aggregator, or one per group for group_by"""
+    query = compile_ndjson_aggregate(expression)
+    records = _iter_records(file_path, start, end)
+    if isinstance(query, GroupBy):
+        aggregators = {}
+        for batch in _batches(records):
+            # The lines are the array group_by's path is evaluated against
+            objects = iter_flattened(evaluate_path(batch, query.items, flatten=True))
+            for name, items in group_items(objects, query.key).items():
+                aggregator = aggregators.get(name)
+                if aggregator is None:
+                    aggregator = aggregators[name] = new_group_aggregator(query)
+                update_group_aggregator(aggregator, query, items)
+        return aggregators
+    aggregator = Aggregator(query.function, query.arguments)
+    for batch in _batches(records):
+        aggregator.update(*aggregate_input(query, batch))
+    return aggregator
+
+def _batches(records: Iterator[Any]) -> Iterator[list]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= AGGREGATE_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def compile_ndjson_aggregate(expression: str):
+    """Compile an aggregation whose input is the file's lines, e.g. sum(price) or group_by(level)"""
+    query = compile_query(expression)
+    if not isinstance(query, (Aggregate, GroupBy)):
+        raise ValueError("Expected an aggregation such as sum(price), count() or group_by(level)")
+    return query
+
+def _run_ranges(file_path: str, task, expression: str) -> Iterator[Any]:
+    """Run a task over every range of the file, yielding results in file order
+
+    Large files are spread over the process pool with a bounded number of
+    ranges in flight, so results are consumed while later ranges still run.
+    """
+    ranges = plan_ranges(file_path, NDJSON_CHUNK_BYTES)
+    if os.path.getsize(file_path) < NDJSON_PARALLEL_MIN_BYTES or NDJSON_WORKERS == 1:
+        for start, end in ranges:
+            yield task(file_path, start, end, expression)
+        return
+    pool = get_pool()
+    pending = deque()
+    try:
+        for start, end in ranges:
+            pending.append(pool.submit(task, file_path, start, end, expression))
+            if len(pending) >= 2 * NDJSON_WORKERS:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+def ndjson_map(file_path: str, expression: str) -> Iterator[bytes]:
+    """Stream the NDJSON results of a query or pipeline applied to each line"""
+    compile_pipeline(expression.strip())  # report syntax errors before any work starts
+    for output in _run_ranges(file_path, map_range, expression):
+        if output:
+            yield output
+
+def ndjson_aggregate(file_path: str, expression: str) -> Any:
+    """Aggregate over every line of a file by combining per-range partial aggregates"""
+    query = compile_ndjson_aggregate(expression)
+    if isinstance(query, GroupBy):
+        groups = {}
+        for partial in _run_ranges(file_path, aggregate_range, expression):
+            for name, aggregator in partial.items():
+                if name in groups:
+                    groups[name].merge(aggregator)
+                else:
+                    groups[name] = aggregator
+        return {name: aggregator.result() for name, aggregator in groups.items()}
+    total = Aggregator(query.function, query.arguments)
+    for partial in _run_ranges(file_path, aggregate_range, expression):
+        total.merge(partial)
+    return total.result()
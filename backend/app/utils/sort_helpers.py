@@ -0,0 +1,112 @@
+import heapq
+import os
+import re
+import tempfile
+from itertools import islice
+from typing import Callable, Iterator, List, Optional
+
+SORT_CHUNK_SIZE = 32 * 1024 * 1024  # characters held in memory per sorted run
+OUTPUT_CHUNK_SIZE = 64 * 1024
+
+NUMBER_PATTERN = re.compile(r'\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)')
+
+def numeric_key(line: str) -> float:
+    """Sort key using the leading number of a line (non-numeric lines sort as 0)"""
+    match = NUMBER_PATTERN.match(line)
+    return float(match.group(1)) if match else 0.0
+
+def get_sort_key(numeric: bool = False, ignore_case: bool = False) -> Optional[Callable]:
+    """Build the sort key for the requested mode"""
+    if numeric:
+        return numeric_key
+    if ignore_case:
+        return str.casefold
+    return None
+
+def _unique(lines: Iterator[str], key: Optional[Callable]) -> Iterator[str]:
+    """Drop adjacent lines whose sort keys are equal"""
+    previous = object()
+    for line in lines:
+        current = key(line) if key else line
+        if current != previous:
+            previous = current
+            yield line
+
+def _write_run(lines: List[str], temp_dir: str) -> str:
+    """Write one sorted run to a temporary file"""
+    fd, path = tempfile.mkstemp(dir=temp_dir, suffix=".run")
+    with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+        for line in lines:
+            f.write(line)
+            f.write("\n")
+    return path
+
+def _read_run(path: str) -> Iterator[str]:
+    """Read lines back from a sorted run"""
+    with open(path, "r", encoding="utf-8", newline="\n") as f:
+        for line in f:
+            yield line[:-1]
+
+def external_sort_lines(
+    lines: Iterator[str],
+    reverse: bool = False,
+    numeric: bool = False,
+    ignore_case: bool = False,
+    unique: bool = False,
+    limit: Optional[int] = None,
+    temp_dir: str = None,
+    chunk_size: int = SORT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Sort lines with an external merge sort and yield UTF-8 output chunks
+
+    Lines are collected into runs of about chunk_size characters, each run is
+    sorted in memory and spilled to a temp file, and the runs are merged with
+    heapq.merge. Memory stays bounded by the chunk size regardless of input size.
+    """
+    key = get_sort_key(numeric, ignore_case)
+    run_paths = []
+    run = []
+    run_size = 0
+    try:
+        for line in lines:
+            line = line.rstrip("\r\n")
+            run.append(line)
+            run_size += len(line) + 1
+            if run_size >= chunk_size:
+                run.sort(key=key, reverse=reverse)
+                run_paths.append(_write_run(_unique(run, key) if unique else run, temp_dir))
+                run = []
+                run_size = 0
+        run.sort(key=key, reverse=reverse)
+
+        if run_paths:
+            if run:
+                run_paths.append(_write_run(_unique(run, key) if unique else run, temp_dir))
+                run = []
+            merged = heapq.merge(*[_read_run(path) for path in run_paths], key=key, reverse=reverse)
+        else:
+            merged = iter(run)
+
+        if unique:
+            merged = _unique(merged, key)
+        if limit is not None:
+            merged = islice(merged, limit)
+
+        buffer = []
+        buffer_size = 0
+        for line in merged:
+            buffer.append(line)
+            buffer_size += len(line) + 1
+            if buffer_size >= OUTPUT_CHUNK_SIZE:
+                buffer.append("")
+                yield "\n".join(buffer).encode("utf-8")
+                buffer = []
+                buffer_size = 0
+        if buffer:
+            yield "\n".join(buffer).encode("utf-8")
+    finally:
+        for path in run_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,63 @@
+"""
+Benchmark the JSON codec against the stdlib json module
+Run from the backend directory: python benchmark_json.py [rows]
+"""
+import json
+import random
+import sys
+import time
+
+from app.utils import json_codec
+
+def make_document(rows: int) -> str:
+    rng = random.Random(42)
+    data = {
+        "generated": "2024-01-01T00:00:00Z",
+        "items": [
+            {
+                "id": i,
+                "name": f"item-{i}",
+                "price": round(rng.uniform(1, 1000), 2),
+                "active": rng.random() > 0.5,
+                "tags": ["alpha", "beta", "gamma"][: rng.randint(0, 3)],
+                "owner": {"name": "José", "email": f"user{i}@example.com"},
+            }
+            for i in range(rows)
+        ],
+    }
+    return json.dumps(data)
+
+def timed(func, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run_benchmark(rows: int = 100_000):
+    text = make_document(rows)
+    data = json.loads(text)
+    print(f"Document: {rows:,} rows, {len(text) / 1024 / 1024:.1f} MB, codec backend: {json_codec.BACKEND}")
+
+    cases = [
+        ("format (indent=2)",
+         lambda: json.dumps(json.loads(text), indent=2, ensure_ascii=False),
+         lambda: json_codec.reformat(text, indent=2)),
+        ("minify",
+         lambda: json.dumps(json.loads(text), separators=(',', ':'), ensure_ascii=False),
+         lambda: json_codec.reformat(text)),
+        ("serialise (indent=2)",
+         lambda: json.dumps(data, indent=2, ensure_ascii=False),
+         lambda: json_codec.dumps(data, indent=2)),
+    ]
+    print(f"{'operation':<22}{'stdlib':>10}{'codec':>10}{'speedup':>10}")
+    for name, stdlib_func, codec_func in cases:
+        if stdlib_func() != codec_func():
+            print(f"{name}: outputs differ!")
+        stdlib_time = timed(stdlib_func)
+        codec_time = timed(codec_func)
+        print(f"{name:<22}{stdlib_time * 1000:>8.1f}ms{codec_time * 1000:>8.1f}ms{stdlib_time / codec_time:>9.1f}x")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,7 @@
+import os
+
+# Settings are read at import time; the auth tests use an in-memory database
+# and the cheapest bcrypt cost
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from passlib.hash import bcrypt
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import auth
+from app.config import settings
+from app.database import Base, get_db
+from app.models import User
+from app.routers import auth as auth_router
+
+@pytest.fixture
+def client():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_test_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(auth_router.router)
+    app.dependency_overrides[get_db] = get_test_db
+    for cache in (auth._token_claims, auth._revoked_tokens, auth._users):
+        cache.clear()
+    with TestClient(app) as client:
+        client.session_factory = Session
+        yield client
+    engine.dispose()
+
+def register(client, email="a@example.com", password="secret-password"):
+    return client.post("/auth/register", json={"email": email, "password": password})
+
+def login(client, email="a@example.com", password="secret-password"):
+    return client.post("/auth/login", json={"email": email, "password": password})
+
+def test_register_login_and_logout(client):
+    response = register(client)
+    assert response.status_code == 201
+    assert response.json()["email"] == "a@example.com"
+    assert register(client).status_code == 400
+
+    response = login(client)
+    assert response.status_code == 200
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.get("/auth/me", headers=headers).json()["email"] == "a@example.com"
+
+    assert client.post("/auth/logout", headers=headers).status_code == 204
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+def test_wrong_password_and_unknown_email_both_run_bcrypt(client):
+    register(client)
+    completed = auth.password_hasher.stats()["completed"]
+    assert login(client, password="wrong").status_code == 401
+    assert login(client, email="nobody@example.com").status_code == 401
+    assert auth.password_hasher.stats()["completed"] == completed + 2
+
+def test_unknown_email_takes_as_long_as_a_real_account():
+    stored = auth.pwd_context.hash("secret-password")
+
+    def average(hashed):
+        started = time.perf_counter()
+        for _ in range(20):
+            asyncio.run(auth.verify_and_update_password("wrong", hashed))
+        return (time.perf_counter() - started) / 20
+
+    average(None)  # the dummy hash is made on first use
+    ratio = average(None) / average(stored)
+    assert 0.5 < ratio < 2
+
+def test_dummy_hash_uses_the_configured_cost():
+    dummy = auth.dummy_password_hash()
+    assert bcrypt.from_string(dummy).rounds == settings.BCRYPT_ROUNDS
+    assert not auth.pwd_context.needs_update(dummy)
+
+def test_login_and_register_return_503_when_hashing_is_saturated(client, monkeypatch):
+    register(client)
+    monkeypatch.setattr(auth.password_hasher, "max_pending", 0)
+    for response in (login(client), register(client, email="b@example.com")):
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+    assert login(client, email="nobody@example.com").status_code == 503
+
+def test_login_rehashes_an_outdated_cost(client):
+    register(client)
+    db = client.session_factory()
+    user = db.query(User).one()
+    user.hashed_password = bcrypt.using(rounds=settings.BCRYPT_ROUNDS + 1).hash("secret-password")
+    db.commit()
+    db.close()
+
+    assert login(client).status_code == 200
+    db = client.session_factory()
+    assert bcrypt.from_string(db.query(User).one().hashed_password).rounds == settings.BCRYPT_ROUNDS
+    db.close()
+
+def test_metrics(client):
+    stats = client.get("/auth/metrics").json()["password_hasher"]
+    assert stats["max_pending"] == settings.PASSWORD_HASH_MAX_PENDING
+    assert {"running", "queued", "completed", "rejected", "avg_wait_ms"} <= stats.keys()
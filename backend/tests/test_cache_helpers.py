@@ -0,0 +1,73 @@
+import pytest
+
+from app.utils import cache_helpers
+from app.utils.cache_helpers import LRUCache, TTLCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_helpers.time, "monotonic", clock)
+    return clock
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.put("a", 1)
+    clock.now += 4.9
+    assert cache.get("a") == 1
+    assert "a" in cache
+    clock.now += 0.1
+    assert cache.get("a") is None
+    assert "a" not in cache
+    assert len(cache) == 0
+
+def test_per_entry_ttl(clock):
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.put("short", 1, ttl=1)
+    cache.put("long", 2, ttl=60)
+    clock.now += 10
+    assert cache.get("short", "gone") == "gone"
+    assert cache.get("long") == 2
+
+def test_bounded_cache_evicts_least_recently_used(clock):
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+def test_pop_and_falsy_values(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.put("zero", 0)
+    assert "zero" in cache
+    assert cache.pop("zero") == 0
+    assert cache.pop("zero", "missing") == "missing"
+
+def test_unbounded_cache_keeps_entries_until_they_expire(clock):
+    cache = TTLCache(maxsize=None, ttl=60)
+    for i in range(5000):
+        cache.put(i, True)
+    assert all(i in cache for i in range(5000))
+    clock.now += 61
+    cache.put("new", True)
+    for i in range(4000):
+        cache.put(("later", i), True)
+    # The expired entries were swept out once the cache had doubled again
+    assert len(cache) == 4001
+    assert cache.get(0) is None and cache.get("new") is True
+
+def test_lru_cache_eviction():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert "b" not in cache and "a" in cache and "c" in cache
@@ -0,0 +1,115 @@
+import copy
+import threading
+
+import pytest
+
+from app.routers import json_editor
+from app.utils.document_store import DocumentStore, parsed_size
+from app.utils.json_patch import JSONPatchError, apply_patch_copy
+
+@pytest.fixture
+def store(monkeypatch):
+    store = DocumentStore(max_total_bytes=10000, max_owner_bytes=2000)
+    monkeypatch.setattr(json_editor, "document_store", store)
+    return store
+
+def test_patch_copy_leaves_the_original_untouched():
+    original = {"a": [1, 2, {"b": None}], "c": "x", "untouched": {"d": [1]}}
+    document = copy.deepcopy(original)
+    patched = apply_patch_copy(document, [
+        {"op": "add", "path": "/a/1", "value": 9},
+        {"op": "remove", "path": "/c"},
+        {"op": "move", "from": "/a/3", "path": "/e"},
+        {"op": "replace", "path": "/a/0", "value": {"f": 1}},
+        {"op": "add", "path": "/a/0/g", "value": 2},
+        {"op": "test", "path": "/e/b", "value": None},
+    ])
+    assert patched == {"a": [{"f": 1, "g": 2}, 9, 2], "e": {"b": None}, "untouched": {"d": [1]}}
+    assert document == original
+    # Subtrees off the edited paths are shared, not copied
+    assert patched["untouched"] is document["untouched"]
+    assert patched["e"] is document["a"][2]
+
+def test_patch_copy_replaces_the_root():
+    document = {"a": 1}
+    assert apply_patch_copy(document, [{"op": "replace", "path": "", "value": [1]}]) == [1]
+    assert document == {"a": 1}
+
+def test_failed_patch_copy_changes_nothing():
+    document = {"a": [1, 2], "b": 1}
+    original = copy.deepcopy(document)
+    with pytest.raises(JSONPatchError):
+        apply_patch_copy(document, [
+            {"op": "remove", "path": "/a/0"},
+            {"op": "test", "path": "/b", "value": 2},
+        ])
+    assert document == original
+
+def test_parsed_size_grows_with_content():
+    small = parsed_size({"a": [1, 2]})
+    assert small > len('{"a":[1,2]}')
+    assert parsed_size({"a": [1, 2], "b": "x" * 1000}) > small + 1000
+    deep = []
+    for _ in range(10000):
+        deep = [deep]
+    assert parsed_size(deep) > 10000
+
+def test_oversize_patch_keeps_the_document(store):
+    data = {"items": [1, 2, 3]}
+    document = store.add("me", data, parsed_size(data))
+    with pytest.raises(ValueError, match="too large"):
+        json_editor.patch_stored_document(document, [{"op": "add", "path": "/items/-", "value": "x" * 5000}])
+    assert store.get(document.id, "me").data == {"items": [1, 2, 3]}
+    assert store.stats()["total_bytes"] == parsed_size(data)
+
+def test_patch_updates_size(store):
+    document = store.add("me", {"items": []}, 12)
+    json_editor.patch_stored_document(document, [{"op": "add", "path": "/items/-", "value": 123}])
+    data = store.get(document.id, "me").data
+    assert data == {"items": [123]}
+    assert store.stats()["total_bytes"] == parsed_size(data) > 12
+
+def test_readers_never_see_a_partial_patch(store):
+    store.max_owner_bytes = store.max_total_bytes = 10 ** 8
+    document = store.add("me", {"items": [0] * 1000, "total": 0}, 1)
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        while not stop.is_set():
+            data = store.get(document.id, "me").data
+            if len(data["items"]) != 1000 or sum(data["items"]) != data["total"]:
+                errors.append(data)
+
+    readers = [threading.Thread(target=read) for _ in range(2)]
+    for reader in readers:
+        reader.start()
+    try:
+        for i in range(300):
+            json_editor.patch_stored_document(document, [
+                {"op": "replace", "path": f"/items/{i % 1000}", "value": 1},
+                {"op": "replace", "path": "/total", "value": min(i + 1, 1000)},
+            ])
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+    assert errors == []
+
+def test_concurrent_patches_are_serialised(store):
+    store.max_owner_bytes = store.max_total_bytes = 10 ** 8
+    document = store.add("me", {"items": []}, 1)
+
+    def append(worker):
+        for i in range(200):
+            json_editor.patch_stored_document(document, [{"op": "add", "path": "/items/-", "value": [worker, i]}])
+
+    threads = [threading.Thread(target=append, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    items = store.get(document.id, "me").data["items"]
+    assert len(items) == 800
+    for worker in range(4):
+        assert [i for w, i in items if w == worker] == list(range(200))
@@ -0,0 +1,123 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import encoder
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # uploads are spooled under ./temp
+    app = FastAPI()
+    app.include_router(encoder.router)
+    with TestClient(app) as client:
+        yield client
+
+def test_ws_replies_per_seq(client):
+    with client.websocket_connect("/encoder/ws") as ws:
+        ws.send_json({"seq": 1, "op": "base64/encode", "text": "hi"})
+        assert ws.receive_json() == {"seq": 1, "result": "aGk="}
+        ws.send_json({"seq": 2, "op": "nope", "text": "hi"})
+        assert ws.receive_json() == {"seq": 2, "error": "Unknown operation: nope"}
+
+@pytest.mark.parametrize("params, error", [
+    ("text", "params must be an object"),
+    ([1], "params must be an object"),
+    ({"indent": "2"}, "params.indent must be an integer"),
+    ({"level": True}, "params.level must be an integer"),
+    ({"secret": 5}, "params.secret must be a string"),
+])
+def test_ws_rejects_malformed_params_with_fixed_messages(client, params, error):
+    with client.websocket_connect("/encoder/ws") as ws:
+        ws.send_json({"seq": 1, "op": "base64/encode", "text": "hi", "params": params})
+        assert ws.receive_json() == {"seq": 1, "error": error}
+
+def test_ws_hides_unexpected_errors(client, monkeypatch):
+    def broken(message):
+        raise AttributeError("'str' object has no attribute 'get'")
+
+    monkeypatch.setattr(encoder, "run_live_operation", broken)
+    with client.websocket_connect("/encoder/ws") as ws:
+        ws.send_json({"seq": 1, "op": "base64/encode", "text": "hi"})
+        assert ws.receive_json() == {"seq": 1, "error": "Operation failed"}
+
+@pytest.mark.parametrize("reverse, expected", [("true", "c\nb\na"), ("0", "a\nb\nc")])
+def test_raw_sort_reads_reverse_from_query(client, reverse, expected):
+    response = client.post(
+        f"/encoder/text/sort?reverse={reverse}",
+        content=b"b\nc\na",
+        headers={"Content-Type": "text/plain", "Accept": "text/plain"},
+    )
+    assert response.status_code == 200
+    assert response.text == expected
+
+def test_raw_and_json_sort_agree(client):
+    raw = client.post(
+        "/encoder/text/sort?reverse=true",
+        content=b"b\nc\na",
+        headers={"Content-Type": "text/plain"},
+    )
+    body = client.post("/encoder/text/sort", json={"text": "b\nc\na", "reverse": True})
+    assert raw.json() == body.json() == {"result": "c\nb\na"}
+
+def test_raw_rejects_bad_flag(client):
+    response = client.post(
+        "/encoder/text/sort?reverse=maybe",
+        content=b"a",
+        headers={"Content-Type": "text/plain"},
+    )
+    assert response.status_code == 400
+
+def test_ws_sort_honours_reverse(client):
+    with client.websocket_connect("/encoder/ws") as ws:
+        ws.send_json({"seq": 1, "op": "text/sort", "text": "a\nb", "params": {"reverse": True}})
+        assert ws.receive_json() == {"seq": 1, "result": "b\na"}
+
+def test_batch_applies_chain_and_reports_item_errors(client):
+    response = client.post("/encoder/batch", json={
+        "inputs": ["hi", "é"],
+        "operations": ["unicode/escape", "base64/encode"],
+    })
+    assert response.status_code == 200
+    assert response.json() == {
+        "results": [
+            {"index": 0, "result": "aGk=", "error": None},
+            {"index": 1, "result": "XHhlOQ==", "error": None},
+        ],
+        "succeeded": 2,
+        "failed": 0,
+    }
+    response = client.post("/encoder/batch", json={"inputs": ["aGk=", "a"], "operations": ["base64/decode"]})
+    body = response.json()
+    assert body["succeeded"] == 1 and body["failed"] == 1
+    assert body["results"][0]["result"] == "hi"
+    assert body["results"][1]["error"]
+
+def test_batch_rejects_unknown_operation(client):
+    response = client.post("/encoder/batch", json={"inputs": ["hi"], "operations": ["nope"]})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown operation: nope"
+
+def test_json_endpoint_unwraps_result_for_raw_accept(client):
+    response = client.post("/encoder/base64/encode", json={"text": "hi"}, headers={"Accept": "text/plain"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.text == "aGk="
+
+def test_raw_body_round_trips_binary(client):
+    payload = bytes(range(256))
+    encoded = client.post(
+        "/encoder/base64/encode",
+        content=payload,
+        headers={"Content-Type": "application/octet-stream", "Accept": "text/plain"},
+    )
+    decoded = client.post(
+        "/encoder/base64/decode",
+        content=encoded.content,
+        headers={"Content-Type": "text/plain", "Accept": "application/octet-stream"},
+    )
+    assert decoded.status_code == 200
+    assert decoded.content == payload
+
+def test_non_utf8_result_needs_octet_stream(client):
+    response = client.post("/encoder/base64/decode", content=b"/w==", headers={"Content-Type": "text/plain"})
+    assert response.status_code == 406
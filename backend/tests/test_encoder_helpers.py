@@ -0,0 +1,71 @@
+import base64
+import gzip
+import hashlib
+import lzma
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils import encoder_helpers
+from app.utils.encoder_helpers import (
+    COMPRESSED_CODECS, DIGEST_WORKERS, DecompressionLimitError, compressed_decode_bytes,
+    compressed_decode_stream, compressed_encode_bytes, decompress_bytes, multi_digest_stream
+)
+
+COMPRESS = {
+    "zlib": zlib.compress,
+    "gzip": gzip.compress,
+    "lzma": lzma.compress,
+}
+
+@pytest.fixture
+def small_limits(monkeypatch):
+    monkeypatch.setattr(encoder_helpers, "DECOMPRESS_CHUNK_SIZE", 4096)
+    monkeypatch.setattr(encoder_helpers, "MAX_DECOMPRESSED_BYTES", 64 * 1024)
+    monkeypatch.setattr(encoder_helpers, "MAX_STREAM_DECOMPRESSED_BYTES", 64 * 1024)
+
+@pytest.mark.parametrize("method", sorted(COMPRESS))
+def test_round_trip_across_output_chunks(method, small_limits):
+    data = os.urandom(10000) + b"a" * 40000
+    assert decompress_bytes(COMPRESS[method](data), method) == data
+
+@pytest.mark.parametrize("method", sorted(COMPRESS))
+def test_bomb_is_rejected(method, small_limits):
+    bomb = COMPRESS[method](b"\0" * (16 * 1024 * 1024))
+    with pytest.raises(DecompressionLimitError):
+        decompress_bytes(bomb, method)
+
+@pytest.mark.parametrize("method", sorted(COMPRESS))
+def test_truncated_input(method, small_limits):
+    with pytest.raises(ValueError, match="truncated"):
+        decompress_bytes(COMPRESS[method](b"x" * 1000)[:-8], method)
+
+@pytest.mark.parametrize("codec", sorted(COMPRESSED_CODECS))
+def test_stream_matches_bytes(codec, small_limits):
+    data = b"".join(b"line %d\n" % i for i in range(5000))
+    encoded = compressed_encode_bytes(data, codec)
+    assert compressed_decode_bytes(encoded, codec) == data
+    chunks = [encoded[i:i + 777] for i in range(0, len(encoded), 777)]
+    assert b"".join(compressed_decode_stream(iter(chunks), codec)) == data
+
+def test_stream_bomb_stops_early(small_limits):
+    encoded = base64.b64encode(gzip.compress(b"\0" * (16 * 1024 * 1024)))
+    produced = 0
+    with pytest.raises(DecompressionLimitError):
+        for output in compressed_decode_stream(iter([encoded]), "gzip-base64"):
+            produced += len(output)
+    assert produced <= 64 * 1024
+
+def test_multi_digest_shares_one_bounded_executor():
+    data = [os.urandom(256 * 1024) for _ in range(8)]
+    expected = {name: hashlib.new(name, b"".join(data)).hexdigest() for name in ("md5", "sha1", "sha256", "sha512")}
+    with ThreadPoolExecutor(max_workers=16) as requests:
+        results = list(requests.map(
+            lambda _: multi_digest_stream(iter(data), list(expected), parallel=True), range(16)
+        ))
+    assert all(result == expected for result in results)
+    digest_threads = [thread for thread in threading.enumerate() if thread.name.startswith("digest")]
+    assert len(digest_threads) <= DIGEST_WORKERS
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.utils.executor_helpers import BoundedExecutor, ExecutorBusy
+
+async def wait_until(condition):
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+def test_rejects_calls_beyond_max_pending():
+    executor = BoundedExecutor("test", workers=1, max_pending=2)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(executor.run(release.wait))
+        second = asyncio.ensure_future(executor.run(lambda: "queued"))
+        await wait_until(lambda: executor.stats()["running"] == 1)
+        with pytest.raises(ExecutorBusy):
+            await executor.run(lambda: "rejected")
+        stats = executor.stats()
+        assert (stats["running"], stats["queued"], stats["rejected"]) == (1, 1, 1)
+        release.set()
+        assert await first is True
+        assert await second == "queued"
+        # Finished calls free their slots
+        assert await executor.run(lambda: "after") == "after"
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+    stats = executor.stats()
+    assert (stats["running"], stats["queued"], stats["completed"], stats["rejected"]) == (0, 0, 3, 1)
+
+def test_errors_propagate_and_free_the_slot():
+    executor = BoundedExecutor("test", workers=1, max_pending=1)
+
+    def fail():
+        raise ValueError("boom")
+
+    async def scenario():
+        with pytest.raises(ValueError, match="boom"):
+            await executor.run(fail)
+        assert await executor.run(sum, [1, 2]) == 3
+
+    asyncio.run(scenario())
+    assert executor.stats()["rejected"] == 0
+
+def test_cancelled_queued_call_frees_its_slot():
+    executor = BoundedExecutor("test", workers=1, max_pending=2)
+    release = threading.Event()
+    ran = []
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        await wait_until(lambda: executor.stats()["running"] == 1)
+        queued = asyncio.ensure_future(executor.run(ran.append, "queued"))
+        await asyncio.sleep(0)
+        queued.cancel()
+        await wait_until(lambda: executor.stats()["queued"] == 0)
+        # Its slot is free again while the first call still runs
+        replacement = asyncio.ensure_future(executor.run(lambda: "replacement"))
+        await asyncio.sleep(0)
+        assert executor.stats()["rejected"] == 0
+        release.set()
+        await running
+        assert await replacement == "replacement"
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+    assert ran == []
@@ -0,0 +1,23 @@
+import asyncio
+import io
+import threading
+
+from fastapi import UploadFile
+
+from app.utils import file_helpers
+
+def test_save_upload_file_copies_off_the_event_loop(tmp_path, monkeypatch):
+    copy_threads = []
+    original = file_helpers.shutil.copyfileobj
+
+    def copyfileobj(source, target):
+        copy_threads.append(threading.current_thread())
+        original(source, target)
+
+    monkeypatch.setattr(file_helpers.shutil, "copyfileobj", copyfileobj)
+    monkeypatch.chdir(tmp_path)
+    upload = UploadFile(io.BytesIO(b"x" * 100000), filename="data.json")
+    path = asyncio.run(file_helpers.save_upload_file(upload, str(tmp_path)))
+    assert open(path, "rb").read() == b"x" * 100000
+    assert path.endswith(".json")
+    assert copy_threads and copy_threads[0] is not threading.main_thread()
@@ -0,0 +1,143 @@
+import copy
+import random
+import time
+
+import pytest
+
+from app.utils.json_diff import SubtreeIds, diff_json
+from app.utils.json_patch import JSONPatchError, apply_patch, json_equal, resolve_pointer
+
+def random_value(rng, depth=0):
+    roll = rng.random()
+    if depth < 3 and roll < 0.3:
+        return {rng.choice("abcde~/"): random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+    if depth < 3 and roll < 0.6:
+        return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 6))]
+    return rng.choice([0, 1, 2, 1.0, True, False, None, "x", "y"])
+
+def mutate(rng, value):
+    value = copy.deepcopy(value)
+    if isinstance(value, list):
+        rng.shuffle(value)
+        if value and rng.random() < 0.5:
+            value.pop()
+        if rng.random() < 0.5:
+            value.insert(rng.randint(0, len(value)), random_value(rng, 2))
+        return [mutate(rng, item) if rng.random() < 0.3 else item for item in value]
+    if isinstance(value, dict):
+        result = {key: mutate(rng, item) if rng.random() < 0.5 else item for key, item in value.items() if rng.random() < 0.8}
+        if rng.random() < 0.3:
+            result["z"] = random_value(rng, 2)
+        return result
+    return random_value(rng, 3) if rng.random() < 0.3 else value
+
+def count_containers(value):
+    if isinstance(value, dict):
+        return 1 + sum(count_containers(child) for child in value.values())
+    if isinstance(value, list):
+        return 1 + sum(count_containers(child) for child in value)
+    return 0
+
+def test_round_trip_random_documents():
+    rng = random.Random(7)
+    for _ in range(2000):
+        source = random_value(rng)
+        target = mutate(rng, source) if rng.random() < 0.8 else random_value(rng)
+        patched = apply_patch(copy.deepcopy(source), diff_json(source, target))
+        assert json_equal(patched, target), (source, target)
+
+def test_equal_documents_give_empty_patch():
+    document = {"a": [1, {"b": [True, None]}], "c": "x"}
+    assert diff_json(document, copy.deepcopy(document)) == []
+
+def test_reordered_array_becomes_move():
+    assert diff_json([1, 2, 3, 4], [4, 1, 2, 3]) == [{"op": "move", "from": "/3", "path": "/0"}]
+
+def test_true_is_not_one():
+    assert diff_json([True], [1]) == [{"op": "replace", "path": "/0", "value": 1}]
+
+def test_keys_are_escaped():
+    assert diff_json({"a/b~": 1}, {"a/b~": 2}) == [{"op": "replace", "path": "/a~1b~0", "value": 2}]
+
+def test_each_container_is_interned_once(monkeypatch):
+    rng = random.Random(1)
+    source = [{"id": i, "tags": [rng.randint(0, 9) for _ in range(3)], "meta": {"deep": {"x": i}}} for i in range(500)]
+    target = copy.deepcopy(source)
+    target[250]["meta"]["deep"]["x"] = -1
+    calls = []
+    original = SubtreeIds._shape
+    monkeypatch.setattr(SubtreeIds, "_shape", lambda self, value: calls.append(1) or original(self, value))
+    operations = diff_json(source, target)
+    assert operations == [{"op": "replace", "path": "/250/meta/deep/x", "value": -1}]
+    assert len(calls) == count_containers(source) + count_containers(target)
+
+@pytest.mark.parametrize("source, target", [
+    (-1, -2),
+    ({"a": -1}, {"a": -2}),
+    ({"a": 0}, {"a": 2 ** 61 - 1}),
+    ([-1, 5], [-2, 5]),
+    ({"a": [{"b": -1}]}, {"a": [{"b": -2}]}),
+    ([[-1], [-2]], [[-2], [-1]]),
+    ([0, 2 ** 61 - 1], [2 ** 61 - 1, 2 ** 61 - 1]),
+])
+def test_values_with_colliding_python_hashes_are_diffed(source, target):
+    # hash(-1) == hash(-2) and hash(0) == hash(2**61 - 1) in CPython
+    operations = diff_json(source, target)
+    assert operations
+    assert json_equal(apply_patch(copy.deepcopy(source), operations), target)
+
+def test_deeply_nested_documents():
+    def nest(depth, leaf):
+        value = leaf
+        for i in range(depth):
+            value = {"k": value} if i % 2 else [value]
+        return value
+
+    operations = diff_json(nest(5000, 1), nest(5000, 2))
+    assert len(operations) == 1 and operations[0]["value"] == 2
+    assert operations[0]["path"].count("/") == 5000
+    assert diff_json(nest(5000, 1), nest(5000, 1)) == []
+
+def test_large_document_with_few_changes_is_fast():
+    def build(depth):
+        if depth == 0:
+            return {"id": 1, "name": "name", "value": 1.5, "ok": True}
+        if depth % 2:
+            return {f"k{i}": build(depth - 1) for i in range(4)}
+        return [build(depth - 1) for _ in range(5)]
+
+    source = build(7)
+    target = copy.deepcopy(source)
+    target["k1"][2]["k3"][4]["k0"][1]["k2"]["id"] = 2
+    started = time.perf_counter()
+    operations = diff_json(source, target)
+    elapsed = time.perf_counter() - started
+    assert operations == [{"op": "replace", "path": "/k1/2/k3/4/k0/1/k2/id", "value": 2}]
+    assert elapsed < 2.0
+
+def test_apply_patch_operations():
+    document = {"a": [1, 2], "b": {"c": 1}}
+    result = apply_patch(document, [
+        {"op": "add", "path": "/a/-", "value": 3},
+        {"op": "move", "from": "/b/c", "path": "/d"},
+        {"op": "copy", "from": "/a", "path": "/e"},
+        {"op": "test", "path": "/d", "value": 1},
+        {"op": "replace", "path": "/a/0", "value": 0},
+        {"op": "remove", "path": "/b"},
+    ])
+    assert result == {"a": [0, 2, 3], "d": 1, "e": [1, 2, 3]}
+
+def test_failed_patch_rolls_back():
+    document = {"a": [1, 2], "b": 1}
+    original = copy.deepcopy(document)
+    with pytest.raises(JSONPatchError):
+        apply_patch(document, [
+            {"op": "remove", "path": "/a/0"},
+            {"op": "add", "path": "/c", "value": 1},
+            {"op": "test", "path": "/b", "value": 2},
+        ])
+    assert document == original
+
+def test_resolve_pointer_rejects_bad_index():
+    with pytest.raises(JSONPatchError):
+        resolve_pointer({"a": [1]}, "/a/01")
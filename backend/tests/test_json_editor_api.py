@@ -0,0 +1,245 @@
+import csv
+import io
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import json_editor
+from app.utils.document_store import DocumentStore
+
+PEOPLE = [
+    {"name": "Cy", "age": 41, "team": {"id": 2}},
+    {"name": "Al", "age": 25, "team": {"id": 1}},
+    {"name": "Bo", "age": 35},
+]
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # uploads are spooled under ./temp
+    monkeypatch.setattr(json_editor, "document_store", DocumentStore())
+    app = FastAPI()
+    app.include_router(json_editor.router)
+    with TestClient(app) as client:
+        yield client
+
+def upload(content):
+    return {"file": ("data.json", content, "application/json")}
+
+def read_csv(response):
+    return list(csv.reader(io.StringIO(response.text)))
+
+# /transform
+
+@pytest.mark.parametrize("operation, expected", [
+    ("format", '{\n  "a": [\n    1\n  ]\n}'),
+    ("minify", '{"a":[1]}'),
+])
+def test_transform_reformats_text(client, operation, expected):
+    response = client.post("/json-editor/transform", json={"input_json": '{ "a" : [1] }', "operation": operation})
+    assert response.json() == {"result": expected, "success": True, "error": None}
+
+def test_transform_runs_pipeline(client):
+    response = client.post("/json-editor/transform", json={
+        "input_json": json.dumps(PEOPLE),
+        "operation": "transform",
+        "expression": "filter(.age > 30) | sort_by(.name) | map(.name)",
+    })
+    body = response.json()
+    assert body["success"], body["error"]
+    assert json.loads(body["result"]) == ["Bo", "Cy"]
+
+def test_transform_runs_queries(client):
+    response = client.post("/json-editor/transform", json={
+        "input_json": json.dumps({"people": PEOPLE}),
+        "operation": "query",
+        "expressions": ["people[0].name", "people[1].team.id"],
+    })
+    body = response.json()
+    assert body["success"], body["error"]
+    assert json.loads(body["result"]) == {"people[0].name": "Cy", "people[1].team.id": 1}
+
+@pytest.mark.parametrize("request_body, error", [
+    ({"input_json": "{", "operation": "query", "expression": "a"}, "Invalid JSON"),
+    ({"input_json": "{}", "operation": "nope"}, "Unknown operation: nope"),
+    ({"input_json": "[]", "operation": "transform", "expression": "filter("}, "Error"),
+])
+def test_transform_reports_errors_in_body(client, request_body, error):
+    body = client.post("/json-editor/transform", json=request_body).json()
+    assert body["success"] is False
+    assert body["error"].startswith(error)
+
+# Stored documents
+
+def test_document_lifecycle(client):
+    response = client.post("/json-editor/documents", files=upload(json.dumps({"items": PEOPLE})))
+    assert response.status_code == 200
+    stored = response.json()
+    document_id = stored["document_id"]
+    assert stored["size"] > 0
+
+    body = client.post("/json-editor/transform", json={
+        "document_id": document_id,
+        "operation": "query",
+        "expression": "items[1].name",
+    }).json()
+    assert json.loads(body["result"]) == "Al"
+
+    response = client.post(f"/json-editor/documents/{document_id}/patch", json={"operations": [
+        {"op": "replace", "path": "/items/1/name", "value": "Ann"},
+    ]})
+    assert response.status_code == 200
+    body = client.get(f"/json-editor/documents/{document_id}").json()
+    assert json.loads(body["result"])["items"][1]["name"] == "Ann"
+
+    metrics = client.get("/json-editor/metrics").json()["document_store"]
+    assert metrics["documents"] == 1
+
+    assert client.delete(f"/json-editor/documents/{document_id}").json() == {"deleted": True}
+    assert client.get(f"/json-editor/documents/{document_id}").status_code == 404
+    assert client.delete(f"/json-editor/documents/{document_id}").status_code == 404
+
+def test_failed_patch_leaves_document_unchanged(client):
+    document_id = client.post("/json-editor/documents", files=upload('{"a": 1}')).json()["document_id"]
+    response = client.post(f"/json-editor/documents/{document_id}/patch", json={"operations": [
+        {"op": "replace", "path": "/a", "value": 2},
+        {"op": "remove", "path": "/missing"},
+    ]})
+    assert response.status_code == 400
+    body = client.get(f"/json-editor/documents/{document_id}").json()
+    assert json.loads(body["result"]) == {"a": 1}
+
+def test_document_upload_rejects_invalid_json(client):
+    response = client.post("/json-editor/documents", files=upload("{"))
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid JSON at line 1")
+
+def test_unknown_document_is_not_found(client):
+    assert client.get("/json-editor/documents/nope").status_code == 404
+    response = client.post("/json-editor/documents/nope/patch", json={"operations": []})
+    assert response.status_code == 404
+
+# /export
+
+def test_export_csv_with_query_and_columns(client):
+    response = client.post("/json-editor/export", json={
+        "input_json": json.dumps({"people": PEOPLE}),
+        "expression": "people",
+        "columns": ["name", "team.id"],
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="export.csv"'
+    assert read_csv(response) == [["name", "team.id"], ["Cy", "2"], ["Al", "1"], ["Bo", ""]]
+
+def test_export_parquet(client):
+    pq = pytest.importorskip("pyarrow.parquet")
+    response = client.post("/json-editor/export", json={"input_json": json.dumps(PEOPLE), "format": "parquet"})
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.column("name").to_pylist() == ["Cy", "Al", "Bo"]
+
+@pytest.mark.parametrize("request_body", [
+    {"input_json": "[{}]", "format": "xlsx"},
+    {"input_json": "["},
+    {"document_id": "nope"},
+])
+def test_export_rejects_bad_requests(client, request_body):
+    assert client.post("/json-editor/export", json=request_body).status_code == 400
+
+# /stream/*
+
+def test_stream_format(client):
+    response = client.post(
+        "/json-editor/stream/format",
+        files=upload('{"b": 1, "a": [true, null]}'),
+        data={"indent": "0", "sort_keys": "true", "minify": "true"},
+    )
+    assert response.status_code == 200
+    assert json.loads(response.text) == {"a": [True, None], "b": 1}
+    assert list(json.loads(response.text)) == ["a", "b"]
+    assert "\n" not in response.text.strip()
+
+@pytest.mark.parametrize("content, data", [("{", {}), ("{}", {"indent": "17"})])
+def test_stream_format_rejects_bad_input(client, content, data):
+    response = client.post("/json-editor/stream/format", files=upload(content), data=data)
+    assert response.status_code == 400
+
+def test_stream_validate(client):
+    body = client.post("/json-editor/stream/validate", files=upload('{"a": 1}')).json()
+    assert body == {"result": "Valid JSON", "success": True, "error": None}
+
+    body = client.post("/json-editor/stream/validate", files=upload('{"a": }')).json()
+    assert body["success"] is False
+    assert body["error"].startswith("Invalid JSON at line 1")
+
+    schema = json.dumps({"type": "object", "properties": {"a": {"type": "string"}}})
+    body = client.post(
+        "/json-editor/stream/validate",
+        files=upload('{"a": 1}'),
+        data={"validation_schema": schema},
+    ).json()
+    assert body["success"] is False
+    assert body["error"].startswith("1 schema error(s)")
+
+def test_stream_query(client):
+    body = client.post(
+        "/json-editor/stream/query",
+        files=upload(json.dumps({"people": PEOPLE})),
+        data={"expression": "max(people[*].age)"},
+    ).json()
+    assert body["success"], body["error"]
+    assert json.loads(body["result"]) == 41
+
+def test_stream_export(client):
+    response = client.post(
+        "/json-editor/stream/export",
+        files=upload(json.dumps({"people": PEOPLE})),
+        data={"expression": "people", "columns": "age,name"},
+    )
+    assert response.status_code == 200
+    assert read_csv(response) == [["age", "name"], ["41", "Cy"], ["25", "Al"], ["35", "Bo"]]
+
+def test_stream_export_rejects_bad_options(client):
+    response = client.post(
+        "/json-editor/stream/export",
+        files=upload(json.dumps(PEOPLE)),
+        data={"key_union": "some"},
+    )
+    assert response.status_code == 400
+
+def test_stream_uploads_are_cleaned_up(client, tmp_path):
+    client.post("/json-editor/stream/format", files=upload("[1, 2]"))
+    client.post("/json-editor/stream/export", files=upload(json.dumps(PEOPLE)))
+    assert not any((tmp_path / "temp").iterdir())
+
+# /ndjson/*
+
+NDJSON = "\n".join(json.dumps(person) for person in PEOPLE) + "\n"
+
+def test_ndjson_map(client):
+    response = client.post(
+        "/json-editor/ndjson/map",
+        files={"file": ("data.ndjson", NDJSON, "application/x-ndjson")},
+        data={"expression": "name"},
+    )
+    assert response.status_code == 200
+    assert [json.loads(line) for line in response.text.splitlines()] == ["Cy", "Al", "Bo"]
+
+def test_ndjson_map_rejects_bad_expression(client):
+    response = client.post(
+        "/json-editor/ndjson/map",
+        files={"file": ("data.ndjson", NDJSON, "application/x-ndjson")},
+        data={"expression": "filter("},
+    )
+    assert response.status_code == 400
+
+def test_ndjson_aggregate(client):
+    body = client.post(
+        "/json-editor/ndjson/aggregate",
+        files={"file": ("data.ndjson", NDJSON, "application/x-ndjson")},
+        data={"expression": "avg(age)"},
+    ).json()
+    assert body["success"], body["error"]
+    assert json.loads(body["result"]) == pytest.approx(101 / 3)
@@ -0,0 +1,77 @@
+import math
+import warnings
+
+import pytest
+
+from app.utils import json_query
+from app.utils.json_query import query_json
+
+@pytest.fixture(params=["numpy", "pure"])
+def backend(request, monkeypatch):
+    """Run projections with NumPy and with the pure-Python column fallback"""
+    if request.param == "numpy":
+        if json_query.np is None:
+            pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(json_query, "np", None)
+    json_query.compile_query.cache_clear()
+    yield request.param
+    json_query.compile_query.cache_clear()
+
+def rows(*pairs):
+    return {"x": [{"p": p, "q": q} for p, q in pairs]}
+
+def test_overflow_is_kept_as_infinity(backend):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert query_json(rows((1e308, 10), (1, 2)), "x.(p*q)") == [math.inf, 2.0]
+        assert query_json(rows((1e308, 10), (1, 2)), "sum(x.(p*q))") == math.inf
+
+def test_division_by_zero_drops_the_row(backend):
+    data = rows((1, 0), (1, 2), (3, 2))
+    assert query_json(data, "x.(p/q)") == [0.5, 1.5]
+    assert query_json(data, "x.(p%q)") == [1.0, 1.0]
+    assert query_json(data, "x.(p/0)") == []
+    assert query_json(data, "x.(6/3)") == [2.0, 2.0, 2.0]
+
+def test_integers_beyond_float_range(backend):
+    assert query_json(rows((10 ** 400, 1), (1, 2)), "x.(p*q)") == [math.inf, 2.0]
+    assert query_json(rows((10 ** 400, -1.5), (1, 2)), "x.(p*q)") == [-math.inf, 2.0]
+    # Exact integer arithmetic first, so results back in range are not lost
+    assert query_json(rows((10 ** 400, 10 ** 400 - 3)), "x.(p-q)") == [3.0]
+    assert query_json(rows((10 ** 400, 1)), "x.(p/p)") == [1.0]
+    assert query_json(rows((10 ** 400, 0)), "x.(p/q)") == []
+
+def test_filters_on_integers_beyond_float_range():
+    data = rows((10 ** 400, 1), (1, 2))
+    assert query_json(data, "x[?(@.p * 1.5 > 10)].q") == [1]
+    assert query_json(data, "x[?(@.p + 0.5 < 0)]") == []
+
+def test_literals_beyond_float_range(backend):
+    data = {"A": [{"x": 1}, {"x": -2}]}
+    assert query_json(data, "A.(x*1e999)") == [math.inf, -math.inf]
+    assert query_json(data, "sum(A.(x*1e999))") != query_json(data, "sum(A.(x*1e999))")  # inf - inf is nan
+    assert query_json(data, "avg(A.(x+1e400))") == math.inf
+    assert query_json(data, f"A.(x+{10 ** 400})") == [math.inf, math.inf]
+    assert query_json(data, "A.(x/1e999)") == [0.0, -0.0]
+
+COUNT_DATA = {
+    "a": [{"n": 1, "s": "x"}, {"n": "2", "s": None}, {"n": True}, {"n": 2.5}],
+    "b": [1, 2, "x", None, [3, {"c": 4}]],
+}
+
+@pytest.mark.parametrize("expression, expected", [
+    # Every matched non-null value counts, not only numbers
+    ("count(a.n)", 4),
+    ("count(a.s)", 1),
+    ("count(a)", 4),
+    ("count(b)", 5),  # nested arrays are flattened; the null is skipped
+    ("count(missing)", 0),
+    # Projections count the rows that produced a number
+    ("count(a.(n*2))", 3),
+    # sum and avg still use the numbers only (bools are not numbers)
+    ("sum(a.n)", 3.5),
+    ("avg(b)", 2.0),
+])
+def test_count_counts_every_matched_value(expression, expected):
+    assert query_json(COUNT_DATA, expression) == expected
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from app.utils import ndjson
+from app.utils.json_query import query_json
+
+RECORDS = [
+    {"a": {"level": "x"}, "ms": 5},
+    {"a": {"level": "y"}, "ms": 7},
+    {"level": "z", "ms": 9},
+    {"a": {"level": "x"}, "ms": 11},
+]
+
+def write_lines(path, records, blank_every=0):
+    lines = []
+    for i, record in enumerate(records):
+        lines.append(json.dumps(record))
+        if blank_every and i % blank_every == 0:
+            lines.append("")
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+@pytest.fixture
+def parallel(monkeypatch):
+    """Force tiny ranges through a real process pool"""
+    monkeypatch.setattr(ndjson, "NDJSON_WORKERS", 2)
+    monkeypatch.setattr(ndjson, "NDJSON_PARALLEL_MIN_BYTES", 0)
+    monkeypatch.setattr(ndjson, "NDJSON_CHUNK_BYTES", 64)
+    monkeypatch.setattr(ndjson, "_pool", None)
+    yield
+    ndjson.shutdown_pool()
+
+def test_pool_does_not_fork_the_server():
+    assert ndjson._pool_context().get_start_method() in ("forkserver", "spawn")
+
+def test_plan_ranges_cover_file_on_line_boundaries(tmp_path):
+    path = write_lines(tmp_path / "a.ndjson", [{"i": i, "pad": "x" * (i % 7)} for i in range(200)], blank_every=9)
+    data = open(path, "rb").read()
+    for chunk_bytes in (1, 10, 64, 1000, len(data), 10 * len(data)):
+        ranges = ndjson.plan_ranges(path, chunk_bytes)
+        assert ranges[0][0] == 0
+        assert ranges[-1][1] == len(data)
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert end == start
+            assert data[end - 1:end] == b"\n"
+
+def test_plan_ranges_without_trailing_newline(tmp_path):
+    path = tmp_path / "a.ndjson"
+    path.write_bytes(b'{"a":1}\n{"a":2}')
+    assert ndjson.plan_ranges(str(path), 3) == [(0, 8), (8, 15)]
+
+def test_plan_ranges_empty_file(tmp_path):
+    path = tmp_path / "a.ndjson"
+    path.write_bytes(b"")
+    assert ndjson.plan_ranges(str(path)) == []
+
+@pytest.mark.parametrize("expression", [
+    "group_by(a.level)",
+    "group_by(level)",
+    "group_by(a.level, sum(ms))",
+    "sum(ms)",
+    "percentile(ms, 50, 90)",
+    "distinct_count(a.level)",
+])
+def test_aggregate_matches_whole_document_query(tmp_path, expression):
+    path = write_lines(tmp_path / "a.ndjson", RECORDS * 50)
+    assert ndjson.ndjson_aggregate(path, expression) == query_json(RECORDS * 50, expression)
+
+def test_aggregate_across_process_pool(tmp_path, parallel):
+    records = RECORDS * 100
+    path = write_lines(tmp_path / "a.ndjson", records, blank_every=13)
+    assert len(ndjson.plan_ranges(path, ndjson.NDJSON_CHUNK_BYTES)) > 10
+    for expression in ("group_by(a.level, avg(ms))", "median(ms)", "count(ms)"):
+        assert ndjson.ndjson_aggregate(path, expression) == query_json(records, expression)
+
+def test_map_keeps_one_output_line_per_record(tmp_path):
+    path = write_lines(tmp_path / "a.ndjson", RECORDS, blank_every=2)
+    output = b"".join(ndjson.ndjson_map(path, "a.level")).decode().splitlines()
+    assert output == ['"x"', '"y"', "null", '"x"']
+
+def test_map_across_process_pool_keeps_order(tmp_path, parallel):
+    records = [{"i": i, "v": i} if i % 3 else {"i": i} for i in range(500)]
+    path = write_lines(tmp_path / "a.ndjson", records, blank_every=17)
+    assert len(ndjson.plan_ranges(path, ndjson.NDJSON_CHUNK_BYTES)) > 10
+    output = b"".join(ndjson.ndjson_map(path, "v")).decode().splitlines()
+    assert [json.loads(line) for line in output] == [record.get("v") for record in records]
+
+def test_invalid_line_reports_byte_offset(tmp_path):
+    path = tmp_path / "a.ndjson"
+    path.write_bytes(b'{"a":1}\n{"a":\n')
+    with pytest.raises(ValueError, match="byte 8"):
+        ndjson.ndjson_aggregate(str(path), "sum(a)")
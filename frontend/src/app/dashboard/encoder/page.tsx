@@ -1,13 +1,13 @@
 'use client'
 
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { useSearchParams } from 'next/navigation'
 import { Button } from '@/components/ui/Button'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/Card'
 import { Input } from '@/components/ui/Input'
 // import { Textarea } from '@/components/ui/Textarea'
 import { Select } from '@/components/ui/Select'
-import { encoderAPI } from '@/lib/api'
+import { encoderAPI, createEncoderSocket } from '@/lib/api'
 import toast from 'react-hot-toast'
 import { Copy, ArrowRightLeft, Loader2, ArrowLeftRight, Trash2 } from 'lucide-react'
 
@@ -19,18 +19,19 @@ type EncoderTool = {
   decode?: any
   transform?: any
   requiresSecret?: boolean
+  liveOps?: { encode: string; decode: string }
 }
 
 const tools: EncoderTool[] = [
   // Encoders/Decoders
-  { id: 'jwt', name: 'JWT', category: 'Encoders/Decoders', encode: (t: string, s: string) => encoderAPI.jwtEncode(t, s), decode: (t: string, s: string) => encoderAPI.jwtDecode(t, s), requiresSecret: true },
-  { id: 'base32', name: 'Base32', category: 'Encoders/Decoders', encode: encoderAPI.base32Encode, decode: encoderAPI.base32Decode },
-  { id: 'base64', name: 'Base64', category: 'Encoders/Decoders', encode: encoderAPI.base64Encode, decode: encoderAPI.base64Decode },
-  { id: 'url-base64', name: 'URL Base64', category: 'Encoders/Decoders', encode: encoderAPI.urlBase64Encode, decode: encoderAPI.urlBase64Decode },
-  { id: 'mime-base64', name: 'MIME Base64', category: 'Encoders/Decoders', encode: encoderAPI.mimeBase64Encode, decode: encoderAPI.mimeBase64Decode },
-  { id: 'url', name: 'URL Encoding', category: 'Encoders/Decoders', encode: encoderAPI.urlEncode, decode: encoderAPI.urlDecode },
-  { id: 'html', name: 'HTML Encoding', category: 'Encoders/Decoders', encode: encoderAPI.htmlEncode, decode: encoderAPI.htmlDecode },
-  { id: 'unicode', name: 'Unicode', category: 'Encoders/Decoders', encode: encoderAPI.unicodeEscape, decode: encoderAPI.unicodeUnescape },
+  { id: 'jwt', name: 'JWT', category: 'Encoders/Decoders', encode: (t: string, s: string) => encoderAPI.jwtEncode(t, s), decode: (t: string, s: string) => encoderAPI.jwtDecode(t, s), requiresSecret: true, liveOps: { encode: 'jwt/encode', decode: 'jwt/decode' } },
+  { id: 'base32', name: 'Base32', category: 'Encoders/Decoders', encode: encoderAPI.base32Encode, decode: encoderAPI.base32Decode, liveOps: { encode: 'base32/encode', decode: 'base32/decode' } },
+  { id: 'base64', name: 'Base64', category: 'Encoders/Decoders', encode: encoderAPI.base64Encode, decode: encoderAPI.base64Decode, liveOps: { encode: 'base64/encode', decode: 'base64/decode' } },
+  { id: 'url-base64', name: 'URL Base64', category: 'Encoders/Decoders', encode: encoderAPI.urlBase64Encode, decode: encoderAPI.urlBase64Decode, liveOps: { encode: 'url-base64/encode', decode: 'url-base64/decode' } },
+  { id: 'mime-base64', name: 'MIME Base64', category: 'Encoders/Decoders', encode: encoderAPI.mimeBase64Encode, decode: encoderAPI.mimeBase64Decode, liveOps: { encode: 'mime-base64/encode', decode: 'mime-base64/decode' } },
+  { id: 'url', name: 'URL Encoding', category: 'Encoders/Decoders', encode: encoderAPI.urlEncode, decode: encoderAPI.urlDecode, liveOps: { encode: 'url/encode', decode: 'url/decode' } },
+  { id: 'html', name: 'HTML Encoding', category: 'Encoders/Decoders', encode: encoderAPI.htmlEncode, decode: encoderAPI.htmlDecode, liveOps: { encode: 'html/encode', decode: 'html/decode' } },
+  { id: 'unicode', name: 'Unicode', category: 'Encoders/Decoders', encode: encoderAPI.unicodeEscape, decode: encoderAPI.unicodeUnescape, liveOps: { encode: 'unicode/escape', decode: 'unicode/unescape' } },
   
   // Cryptography - Hashing
   { id: 'md5', name: 'MD5', category: 'Cryptography', transform: encoderAPI.hashMD5 },
@@ -94,7 +95,22 @@ export default function EncoderPage() {
     }
   }, [searchParams])
 
-  // Removed auto-processing - now using button
+  // Live preview over a single WebSocket; the server drops superseded requests
+  const liveSocket = useRef<ReturnType<typeof createEncoderSocket> | null>(null)
+
+  useEffect(() => {
+    liveSocket.current = createEncoderSocket((reply) => {
+      setOutputText(reply.error ? `Error: ${reply.error}` : reply.result ?? '')
+    })
+    return () => liveSocket.current?.close()
+  }, [])
+
+  useEffect(() => {
+    const ops = selectedTool.liveOps
+    if (!ops || !inputText.trim()) return
+    if (selectedTool.requiresSecret && secret.trim().length < 3) return
+    liveSocket.current?.send(ops[activeTab], inputText, { secret: secret || undefined })
+  }, [inputText, secret, activeTab, selectedTool])
 
   const validateInput = (): boolean => {
     // Reset errors
@@ -1,12 +1,12 @@
 'use client'
 
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { Button } from '@/components/ui/Button'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/Card'
 import { Textarea } from '@/components/ui/Textarea'
 import { Input } from '@/components/ui/Input'
 import { Select } from '@/components/ui/Select'
-import api from '@/lib/api'
+import api, { jsonDocumentAPI } from '@/lib/api'
 import toast from 'react-hot-toast'
 import { Copy, Play, AlertCircle, CheckCircle } from 'lucide-react'
 
@@ -70,6 +70,8 @@ export default function JSONEditorPage() {
   const [error, setError] = useState('')
   const [isValid, setIsValid] = useState(true)
   const [selectedExample, setSelectedExample] = useState('default')
+  // Server-side copy of the input, re-uploaded only when the text changes
+  const storedDocument = useRef<{ text: string; id: string } | null>(null)
 
   // Update expression when operation changes
   useEffect(() => {
@@ -97,11 +99,28 @@ export default function JSONEditorPage() {
     setError('')
     
     try {
-      const response = await api.post('/json-editor/transform', {
-        input_json: inputJSON,
+      // Several queries (one per line) are answered from a single parse
+      const queryLines = expression.split('\n').map((line) => line.trim()).filter(Boolean)
+      const runTransform = async (documentId: string) => api.post('/json-editor/transform', {
+        document_id: documentId,
         expression: expression || undefined,
+        expressions: operation === 'query' && queryLines.length > 1 ? queryLines : undefined,
         operation: operation
       })
+      const uploadDocument = async () => {
+        const previous = storedDocument.current
+        const id = await jsonDocumentAPI.upload(inputJSON)
+        storedDocument.current = { text: inputJSON, id }
+        if (previous) jsonDocumentAPI.remove(previous.id).catch(() => {})
+        return id
+      }
+
+      const current = storedDocument.current
+      let response = await runTransform(current && current.text === inputJSON ? current.id : await uploadDocument())
+      if (!response.data.success && response.data.error?.includes('Document not found')) {
+        // The stored copy expired or was evicted; upload it again
+        response = await runTransform(await uploadDocument())
+      }
       
       if (response.data.success) {
         setOutput(response.data.result)
@@ -111,7 +130,7 @@ export default function JSONEditorPage() {
         toast.error(response.data.error || 'Transformation failed')
       }
     } catch (err: any) {
-      const errorMsg = err.response?.data?.error || err.message || 'An error occurred'
+      const errorMsg = err.response?.data?.error || err.response?.data?.detail || err.message || 'An error occurred'
       setError(errorMsg)
       toast.error(errorMsg)
     } finally {
@@ -387,7 +406,7 @@ export default function JSONEditorPage() {
                     placeholder={
                       operation === 'query' 
                         ? 'e.g., $sum(Account.Order.Product.(Price * Quantity))' 
-                        : 'e.g., keys, values, length, sort, reverse, unique'
+                        : 'e.g., filter(.age > 30) | sort_by(.name) | unique_by(.id) | limit(10)'
                     }
                     value={expression}
                     onChange={(e) => setExpression(e.target.value)}
@@ -406,7 +425,7 @@ export default function JSONEditorPage() {
                   />
                   {operation === 'query' && (
                     <div className="mt-2 text-xs text-gray-500">
-                      💡 Press Ctrl+Enter (Cmd+Enter on Mac) to run | Supports: $sum(), $avg(), $min(), $max(), $count()
+                      💡 Press Ctrl+Enter (Cmd+Enter on Mac) to run | One query per line | Supports: $sum(), $avg(), $min(), $max(), $count(), $median(), $percentile(), $stddev(), $distinct_count(), group_by(), [*], [1:3], [?(@.x > 1)], ..name
                     </div>
                   )}
                 </CardContent>
@@ -471,6 +490,11 @@ export default function JSONEditorPage() {
                   <li>$min(scores) → Minimum</li>
                   <li>$max(scores) → Maximum</li>
                   <li>$count(items) → Count</li>
+                  <li>$median(items.price) → Median</li>
+                  <li>$percentile(items.price, 90, 99) → Percentiles</li>
+                  <li>$stddev(scores) → Std. deviation</li>
+                  <li>$distinct_count(items.tag) → Distinct values</li>
+                  <li>group_by(items.tag, sum(price)) → Per group</li>
                 </ul>
                 <h4 className="font-semibold mt-3 mb-2">Complex Math:</h4>
                 <ul className="space-y-1 text-gray-600 font-mono text-xs">
@@ -360,4 +360,84 @@ export const encoderAPI = {
   },
 }
 
+// JSON document sessions: upload once, then reference the document by id
+export const jsonDocumentAPI = {
+  upload: async (json: string): Promise<string> => {
+    const formData = new FormData()
+    formData.append('file', new Blob([json], { type: 'application/json' }), 'document.json')
+    const response = await api.post('/json-editor/documents', formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    })
+    return response.data.document_id
+  },
+
+  patch: async (documentId: string, operations: Record<string, unknown>[]) => {
+    const response = await api.post(`/json-editor/documents/${documentId}/patch`, { operations })
+    return response.data
+  },
+
+  remove: async (documentId: string) => {
+    await api.delete(`/json-editor/documents/${documentId}`)
+  },
+}
+
 export default api
+
+// Live encoder channel (WebSocket)
+// Sends {seq, op, text, params}; the server only answers the newest request,
+// so callers can send on every keystroke without flooding the API.
+export type LiveEncoderParams = {
+  secret?: string
+  algorithm?: string
+  indent?: number
+}
+
+export type LiveEncoderReply = {
+  seq: number
+  result?: string
+  error?: string
+}
+
+export const createEncoderSocket = (onReply: (reply: LiveEncoderReply) => void) => {
+  const wsUrl = API_URL.replace(/^http/, 'ws') + '/encoder/ws'
+  let socket: WebSocket | null = null
+  let seq = 0
+  let queued: string | null = null
+
+  const connect = () => {
+    socket = new WebSocket(wsUrl)
+    socket.onopen = () => {
+      if (queued) {
+        socket?.send(queued)
+        queued = null
+      }
+    }
+    socket.onmessage = (event) => {
+      const reply: LiveEncoderReply = JSON.parse(event.data)
+      // Ignore replies to requests that have since been superseded
+      if (reply.seq === seq) {
+        onReply(reply)
+      }
+    }
+    socket.onclose = () => {
+      socket = null
+    }
+  }
+
+  return {
+    send: (op: string, text: string, params: LiveEncoderParams = {}) => {
+      seq += 1
+      const message = JSON.stringify({ seq, op, text, params })
+      if (socket?.readyState === WebSocket.OPEN) {
+        socket.send(message)
+      } else {
+        queued = message
+        if (!socket) connect()
+      }
+    },
+    close: () => {
+      socket?.close()
+      socket = null
+    },
+  }
+}